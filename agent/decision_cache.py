@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+import config
+from vision.maze_graph import DIRECTIONS, step_direction
+
+# Manhattan distance upper bounds of the ghost distance buckets (anything further is the last bucket)
+GHOST_DISTANCE_BUCKETS = (2, 5, 10)
+
+
+class CachedAgent:
+    """
+    Memoizes decisions of any agent with a `decide_action(state)` method.
+
+    Consecutive frames often show the same situation, so the decision is looked
+    up by a quantized key before the wrapped agent plans:
+    - Pac-Man's cell and heading (direction of its last cell change),
+    - each ghost as (distance bucket, direction sign) relative to Pac-Man,
+    - the pellet bits in a small window around Pac-Man.
+
+    A decision that cannot change the position (a move into a wall) is never
+    stored, and a cached decision is dropped when Pac-Man leaves the cell in
+    another direction (the turn was not taken), so neither gets replayed.
+    Entries expire after DECISION_CACHE_PELLET_SLACK more pellets were eaten
+    (pellets outside the window can change the plan), and the whole cache is
+    cleared when the level changes. On a hit the wrapped agent's last_action
+    and last_path are set to the cached decision's.
+
+    Meant for the deterministic planners (create_agent only wraps 'search' and
+    'mcts'): a stateful agent such as SimplePolicyAgent keeps its own plan.
+    """
+
+    def __init__(self, agent, max_size: int = None, pellet_radius: int = None, pellet_slack: int = None):
+        self.agent = agent
+        if max_size is None:
+            max_size = getattr(config, 'DECISION_CACHE_SIZE', 0) or 4096  # 0 in config only disables the wrapping
+        self.max_size = max_size
+        self.pellet_radius = pellet_radius if pellet_radius is not None else getattr(config, 'DECISION_CACHE_RADIUS', 3)
+        self.pellet_slack = pellet_slack if pellet_slack is not None else getattr(config, 'DECISION_CACHE_PELLET_SLACK', 10)
+
+        # key -> (action, path, pellets_remaining when decided)
+        self._cache: 'OrderedDict[Tuple, Tuple[str, list, int]]' = OrderedDict()
+        self._level_key = None
+        # Pac-Man's tracked cell and the direction it last moved in
+        self._pos = None
+        self._heading = None
+        # Last decision handed out, until Pac-Man leaves the cell: (key, entry, cell)
+        self._issued = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejected = 0
+
+    def decide_action(self, state: Dict[str, Any]) -> str:
+        """
+        Return the cached decision for this situation, or ask the wrapped agent.
+        """
+        self._check_invalidation(state)
+        self._track(state.get('pacman_pos'))
+
+        key = self._make_key(state)
+        if key is None:
+            return self.agent.decide_action(state)
+
+        remaining = state.get('pellets_remaining') or 0
+        entry = self._cache.get(key)
+        if entry is not None and entry[2] - remaining > self.pellet_slack:
+            del self._cache[key]
+            entry = None
+        if entry is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            self._restore(entry)
+        else:
+            self.misses += 1
+            action = self.agent.decide_action(state)
+            entry = (action, list(getattr(self.agent, 'last_path', None) or []), remaining)
+            if self._can_move(state['grid'], key[0], action):
+                self._store(key, entry)
+            else:
+                self.rejected += 1
+        self._issued = (key, entry, key[0])
+        return entry[0]
+
+    def _track(self, pos):
+        """Follow Pac-Man's cell; check the issued decision once it has left the cell."""
+        if not pos or tuple(pos) == self._pos:
+            return
+        pos = tuple(pos)
+        moved = step_direction(self._pos, pos) if self._pos else None
+        if self._issued is not None:
+            key, entry, cell = self._issued
+            if cell == self._pos and moved is not None and moved != entry[0] and self._cache.get(key) is entry:
+                # The decided move was not taken (missed turn): ask the agent next time
+                del self._cache[key]
+                self.rejected += 1
+            self._issued = None
+        self._pos, self._heading = pos, moved
+
+    @staticmethod
+    def _can_move(grid: np.ndarray, pos: Tuple[int, int], action: str) -> bool:
+        """False if `action` runs into a wall from `pos` (the tunnel wraps horizontally)."""
+        vec = DIRECTIONS.get(action)
+        if vec is None:
+            return False
+        h, w = grid.shape[:2]
+        x, y = (pos[0] + vec[0]) % w, pos[1] + vec[1]
+        return 0 <= y < h and grid[y, x] != 1
+
+    def _store(self, key: Tuple, entry: Tuple[str, list, int]):
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def _restore(self, entry: Tuple[str, list, int]):
+        # Keep the wrapped agent's view in sync, as if it had made the decision itself
+        action, path, _ = entry
+        if hasattr(self.agent, 'last_action'):
+            self.agent.last_action = action
+        if hasattr(self.agent, 'last_path'):
+            self.agent.last_path = list(path)
+
+    def _check_invalidation(self, state: Dict[str, Any]):
+        # A new graph or pellet total means a new maze / level
+        level_key = (id(state.get('graph')), state.get('pellets_total'))
+        if level_key != self._level_key:
+            if self._cache:
+                self._cache.clear()
+                self.invalidations += 1
+            self._level_key = level_key
+            self._pos = self._heading = self._issued = None
+
+    def _make_key(self, state: Dict[str, Any]) -> Optional[Tuple]:
+        pos = state.get('pacman_pos')
+        grid = state.get('grid')
+        if not pos or grid is None:
+            return None
+        px, py = pos
+
+        ghosts = []
+        for gx, gy in state.get('ghost_positions') or []:
+            dx, dy = gx - px, gy - py
+            dist = abs(dx) + abs(dy)
+            bucket = len(GHOST_DISTANCE_BUCKETS)
+            for i, limit in enumerate(GHOST_DISTANCE_BUCKETS):
+                if dist <= limit:
+                    bucket = i
+                    break
+            ghosts.append((bucket, int(np.sign(dx)), int(np.sign(dy))))
+
+        r = self.pellet_radius
+        h, w = grid.shape[:2]
+        window = grid[max(0, py - r):min(h, py + r + 1), max(0, px - r):min(w, px + r + 1)]
+        local_pellets = np.packbits(window == 2).tobytes()
+
+        return (tuple(pos), self._heading, tuple(sorted(ghosts)), local_pellets)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._cache),
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'rejected': self.rejected,
+        }
+
+    def __getattr__(self, name):
+        # Expose the wrapped agent's attributes (last_stats, last_path, close, ...)
+        if name == 'agent':
+            raise AttributeError(name)
+        return getattr(self.agent, name)
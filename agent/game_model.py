@@ -0,0 +1,132 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from vision.maze_graph import DIRECTIONS
+
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+
+# Probability that a ghost takes the step that closes in on Pac-Man.
+# The rest is spread uniformly over its other exits.
+GHOST_CHASE_PROB = 0.7
+
+
+class GameModel:
+    """
+    Lightweight forward model of the maze used by the planning agents.
+
+    Cells are flattened to ints (y * width + x) and all legal moves are
+    precomputed once per maze, so simulating a step is a list lookup.
+    """
+
+    def __init__(self, grid: np.ndarray):
+        self.height, self.width = grid.shape[:2]
+        self.size = self.width * self.height
+        walls = (np.asarray(grid) == 1).ravel()
+        self.walls = walls
+
+        # moves[i] = [(action, next cell), ...] for every walkable cell
+        self.moves: List[List[Tuple[str, int]]] = [[] for _ in range(self.size)]
+        for i in np.flatnonzero(~walls).tolist():
+            x, y = i % self.width, i // self.width
+            for action in ACTIONS:
+                dx, dy = DIRECTIONS[action]
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < self.width and 0 <= ny < self.height and not walls[ny * self.width + nx]:
+                    self.moves[i].append((action, ny * self.width + nx))
+
+        # Zobrist keys for the pellet layer: the hash of a pellet set is the XOR of its cells,
+        # so eating a pellet is one XOR and the same board always hashes the same way.
+        rng = np.random.default_rng(0x9AC)
+        self.zobrist = [int(v) for v in rng.integers(1, 2**63 - 1, size=self.size, dtype=np.int64)]
+
+    def index(self, cell: Tuple[int, int]) -> int:
+        return cell[1] * self.width + cell[0]
+
+    def cell(self, i: int) -> Tuple[int, int]:
+        return (i % self.width, i // self.width)
+
+    def matches(self, grid: np.ndarray) -> bool:
+        """True if this model was built for the same walls layout."""
+        return grid.shape[:2] == (self.height, self.width) and np.array_equal((np.asarray(grid) == 1).ravel(), self.walls)
+
+    def pellet_hash(self, pellets: Sequence[bool]) -> int:
+        h = 0
+        for i, has_pellet in enumerate(pellets):
+            if has_pellet:
+                h ^= self.zobrist[i]
+        return h
+
+    def manhattan(self, a: int, b: int) -> int:
+        return abs(a % self.width - b % self.width) + abs(a // self.width - b // self.width)
+
+    def ghost_outcomes(self, ghost: int, target: int) -> List[Tuple[int, float]]:
+        """
+        Possible next cells for a ghost with their probabilities.
+        The ghost chases `target` with GHOST_CHASE_PROB and wanders otherwise.
+        """
+        exits = self.moves[ghost]
+        if not exits:
+            return [(ghost, 1.0)]
+        if len(exits) == 1:
+            return [(exits[0][1], 1.0)]
+
+        best = min(exits, key=lambda m: self.manhattan(m[1], target))[1]
+        wander = (1.0 - GHOST_CHASE_PROB) / (len(exits) - 1)
+        return [(nxt, GHOST_CHASE_PROB if nxt == best else wander) for _, nxt in exits]
+
+    def ghost_step(self, ghost: int, target: int, roll: float) -> int:
+        """
+        Sample one ghost move (same distribution as ghost_outcomes) from a uniform roll in [0, 1).
+        This is the hot path of rollouts, so it avoids building the outcome list.
+        """
+        exits = self.moves[ghost]
+        if len(exits) <= 1:
+            return exits[0][1] if exits else ghost
+
+        w = self.width
+        tx, ty = target % w, target // w
+        best = exits[0][1]
+        best_d = 1 << 30
+        for _, nxt in exits:
+            d = abs(nxt % w - tx) + abs(nxt // w - ty)
+            if d < best_d:
+                best, best_d = nxt, d
+        if roll < GHOST_CHASE_PROB:
+            return best
+
+        others = [nxt for _, nxt in exits if nxt != best]
+        k = int((roll - GHOST_CHASE_PROB) / (1.0 - GHOST_CHASE_PROB) * len(others))
+        return others[min(k, len(others) - 1)]
+
+    def pellet_distances(self, pellets: Sequence[bool]) -> List[int]:
+        """Multi-source BFS: steps from every cell to the nearest pellet (size if none)."""
+        dist = [self.size] * self.size
+        frontier = [i for i, has_pellet in enumerate(pellets) if has_pellet]
+        for i in frontier:
+            dist[i] = 0
+        d = 0
+        while frontier:
+            d += 1
+            nxt_frontier = []
+            for i in frontier:
+                for _, j in self.moves[i]:
+                    if dist[j] > d:
+                        dist[j] = d
+                        nxt_frontier.append(j)
+            frontier = nxt_frontier
+        return dist
+
+    def state_from(self, state) -> Optional[Tuple[int, Tuple[int, ...], List[bool]]]:
+        """
+        Extract (Pac-Man cell, ghost cells, pellet flags) from a game_state.
+        Returns None when there is nothing to plan on.
+        """
+        grid = state.get('grid')
+        pos = state.get('pacman_pos')
+        if grid is None or not pos:
+            return None
+        pac = self.index(pos)
+        if self.walls[pac]:
+            return None
+        ghosts = tuple(self.index(g) for g in state.get('ghost_positions', []) or [])
+        pellets = (np.asarray(grid) == 2).ravel().tolist()
+        return pac, ghosts, pellets
@@ -1,12 +1,14 @@
+from collections import deque
 from typing import List, Tuple
 
 class PathFinder:
     """
     Handles pathfinding algorithms (BFS, A*) on the grid.
+    If a MazeGraph is available, paths are planned over junction nodes instead of cells.
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, graph=None):
+        self.graph = graph
         
     def find_path(self, grid, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
         """
@@ -20,10 +22,47 @@ class PathFinder:
         Returns:
             List of (x, y) coordinates representing the path.
         """
-        # TODO: Implement A* or BFS.
+        if self.graph is not None:
+            return self.graph.shortest_path(start, goal) or []
+
+        # Fallback: plain BFS over cells
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = came_from[cell]
+                return path[::-1]
+            for nxt in self._neighbours(grid, cell):
+                if nxt not in came_from:
+                    came_from[nxt] = cell
+                    queue.append(nxt)
         return []
 
     def find_nearest_pellet(self, grid, start: Tuple[int, int]) -> Tuple[int, int]:
         """Find the coordinates of the nearest safe pellet."""
-        # TODO: BFS search for nearest pellet.
+        # BFS outwards until we step on a pellet (2)
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            x, y = queue.popleft()
+            if grid[y, x] == 2:
+                return (x, y)
+            for nxt in self._neighbours(grid, (x, y)):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
         return None
+
+    def _neighbours(self, grid, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        x, y = cell
+        h, w = grid.shape[:2]
+        result = []
+        for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < w and 0 <= ny < h and grid[ny, nx] != 1:
+                result.append((nx, ny))
+        return result
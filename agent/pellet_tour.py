@@ -0,0 +1,347 @@
+import time
+from typing import Dict, List, Optional, Tuple
+import config
+
+Cell = Tuple[int, int]
+Key = Tuple[str, int]                   # ('e', edge id) or ('n', node id)
+Mode = Tuple[int, int, int]             # (entry node, exit node, cost of clearing the cluster)
+
+INF = 1 << 30
+
+
+class PelletTour:
+    """
+    Keeps an approximate shortest tour through the remaining pellets.
+
+    Pellets are grouped into corridor clusters: the pellets on one MazeGraph edge
+    (plus pellets on its end nodes), or a lone node pellet. A cluster can be cleared
+    by running through the corridor in either direction, or by going in from one end
+    and coming back. The tour is an order of clusters, each with one of these modes,
+    scored with node-to-node shortest path distances; it starts at Pac-Man.
+
+    `update()` repairs the previous tour instead of replanning: emptied clusters
+    are dropped, new ones are inserted at their cheapest position, and the cluster
+    Pac-Man is in is pinned first. The rest of the time budget goes to 2-opt and
+    relocate moves. Only a new map or a pellet refill builds a new tour (nearest
+    neighbour). Construction and repair stop at the deadline too: whatever did not
+    fit is appended and improved on later updates. The work after the last deadline
+    check (the move in progress, the bookkeeping) is measured and kept free at the
+    end of the next budget, so the budget holds as a hard limit.
+    """
+
+    def __init__(self, time_budget: float = None):
+        self.time_budget = time_budget if time_budget is not None else getattr(config, 'PELLET_TOUR_BUDGET', 0.003)
+        self.graph = None
+        self._dist: List[List[int]] = []   # Node distance table; the last row/column is Pac-Man ("start")
+        self._start = 0
+        self._grid = None
+        self._pellets_total = 0
+        self.clusters: Dict[Key, List[int]] = {}   # Pellet offsets along the edge (0 = node a, length = node b)
+        self.tour: List[List] = []                  # [key, entry, exit, cost] per cluster, in visiting order
+        self._pinned: Optional[Key] = None          # Cluster Pac-Man is inside of (first in the tour)
+        self._pin_modes: List[Mode] = []
+        self._pin_offset = 0
+        self._reserve = self.time_budget * 0.05     # Measured overrun past the deadline (s), kept free next time
+        self.last_stats = {'clusters': 0, 'cost': 0, 'elapsed_ms': 0.0, 'moves': 0, 'rebuilt': False}
+
+    # --- Map ---
+
+    def _compile(self, graph):
+        """All-pairs node distances (once per map) plus a spare row/column for the start."""
+        self.graph = graph
+        n = len(graph.nodes)
+        self._start = n
+        self._dist = [[INF] * (n + 1) for _ in range(n + 1)]
+        for u, cell in enumerate(graph.nodes):
+            dist, _ = graph.node_distances(cell)
+            row = self._dist[u]
+            for v, d in dist.items():
+                row[v] = d
+        self.clusters = {}
+        self.tour = []
+        self._grid = None
+
+    def _cell(self, edge_id: int, offset: int) -> Cell:
+        edge = self.graph.edges[edge_id]
+        if offset == 0:
+            return self.graph.nodes[edge.a]
+        if offset == edge.length:
+            return self.graph.nodes[edge.b]
+        return edge.cells[offset - 1]
+
+    def _scan(self, grid) -> Dict[Key, List[int]]:
+        """Group the grid's pellets into clusters."""
+        graph = self.graph
+        clusters: Dict[Key, List[int]] = {}
+        for edge_id, edge in enumerate(graph.edges):
+            offsets = [i + 1 for i, (x, y) in enumerate(edge.cells) if grid[y, x] == 2]
+            if offsets:
+                clusters[('e', edge_id)] = offsets
+        for node_id, (x, y) in enumerate(graph.nodes):
+            if grid[y, x] != 2:
+                continue
+            # Attach the node pellet to a corridor that is being cleared anyway
+            for edge_id, _ in graph.adjacency[node_id]:
+                offsets = clusters.get(('e', edge_id))
+                if offsets is not None:
+                    edge = graph.edges[edge_id]
+                    offsets.insert(0, 0) if node_id == edge.a else offsets.append(edge.length)
+                    break
+            else:
+                clusters[('n', node_id)] = [0]
+        return clusters
+
+    def _modes(self, key: Key) -> List[Mode]:
+        if key == self._pinned:
+            return self._pin_modes
+        kind, idx = key
+        if kind == 'n':
+            return [(idx, idx, 0)]
+        edge = self.graph.edges[idx]
+        offsets = self.clusters[key]
+        length = edge.length
+        return [(edge.a, edge.b, length), (edge.b, edge.a, length),
+                (edge.a, edge.a, 2 * offsets[-1]), (edge.b, edge.b, 2 * (length - offsets[0]))]
+
+    def _set_start(self, pacman_pos: Cell):
+        """Distances from Pac-Man, and the start modes of the cluster he is inside (if any)."""
+        n = self._start
+        dist, _ = self.graph.node_distances(pacman_pos)
+        row = self._dist[n]
+        for u in range(n):
+            row[u] = dist.get(u, INF)
+            self._dist[u][n] = INF  # Nothing leads back to the start
+        row[n] = 0
+
+        self._pinned, self._pin_modes = None, []
+        node_id, edge_id, offset = self.graph.locate(pacman_pos)
+        key = ('e', edge_id)
+        if edge_id is None or key not in self.clusters:
+            return
+        edge = self.graph.edges[edge_id]
+        offsets = self.clusters[key]
+        left = [o for o in offsets if o < offset]
+        right = [o for o in offsets if o >= offset]
+        # Clear the far side first (there and back), then leave through the other end
+        to_b = (2 * (offset - left[0]) if left else 0) + (edge.length - offset)
+        to_a = (2 * (right[-1] - offset) if right else 0) + offset
+        self._pinned, self._pin_offset = key, offset
+        self._pin_modes = [(n, edge.b, to_b), (n, edge.a, to_a)]
+
+    # --- Tour cost ---
+
+    def _link(self, i: int, entry: int) -> int:
+        """Cost of reaching `entry` from the cluster before position i (or from the start)."""
+        return self._dist[self.tour[i - 1][2] if i > 0 else self._start][entry]
+
+    def cost(self) -> int:
+        total = 0
+        for i, (_, entry, _, c) in enumerate(self.tour):
+            total += self._link(i, entry) + c
+        return total
+
+    def _best_mode(self, i: int) -> bool:
+        """Re-pick the mode of the cluster at position i given its neighbours. Returns True if it changed."""
+        item = self.tour[i]
+        nxt = self.tour[i + 1][1] if i + 1 < len(self.tour) else None
+        best, best_cost = None, INF
+        for entry, exit_, c in self._modes(item[0]):
+            total = self._link(i, entry) + c + (self._dist[exit_][nxt] if nxt is not None else 0)
+            if total < best_cost:
+                best, best_cost = (entry, exit_, c), total
+        if best is None or tuple(item[1:]) == best:
+            return False
+        item[1:] = best
+        return True
+
+    def _insert(self, key: Key) -> int:
+        """Cheapest insertion of a cluster (any position, any mode). Returns the added cost."""
+        best, best_delta = None, INF
+        first = 1 if self._pinned is not None and self.tour and self.tour[0][0] == self._pinned else 0
+        for pos in range(first, len(self.tour) + 1):
+            prev_exit = self.tour[pos - 1][2] if pos > 0 else self._start
+            nxt = self.tour[pos][1] if pos < len(self.tour) else None
+            old = self._dist[prev_exit][nxt] if nxt is not None else 0
+            for entry, exit_, c in self._modes(key):
+                delta = self._dist[prev_exit][entry] + c + (self._dist[exit_][nxt] if nxt is not None else 0) - old
+                if delta < best_delta:
+                    best, best_delta = (pos, [key, entry, exit_, c]), delta
+        if best is None:
+            self.tour.append([key] + list(self._modes(key)[0]))
+            return INF
+        self.tour.insert(best[0], best[1])
+        return best_delta
+
+    # --- Construction / repair ---
+
+    def _build(self, deadline: float):
+        """Nearest-neighbour tour from the start; clusters left at the deadline are appended as they are."""
+        remaining = set(self.clusters)
+        self.tour = []
+        if self._pinned is not None:
+            self.tour.append([self._pinned] + list(min(self._pin_modes, key=lambda m: m[2])))
+            remaining.discard(self._pinned)
+        at = self.tour[-1][2] if self.tour else self._start
+        while remaining and time.perf_counter() < deadline:
+            row = self._dist[at]
+            best, best_cost = None, INF
+            for key in remaining:
+                for entry, exit_, c in self._modes(key):
+                    if row[entry] + c < best_cost:
+                        best, best_cost = [key, entry, exit_, c], row[entry] + c
+            if best is None:
+                break
+            self.tour.append(best)
+            remaining.discard(best[0])
+            at = best[2]
+        for key in sorted(remaining):
+            self.tour.append([key] + list(self._modes(key)[0]))
+
+    def _repair(self, clusters: Dict[Key, List[int]], deadline: float):
+        """Carry the previous tour over to the new pellet state; new clusters left at the deadline are appended."""
+        self.tour = [item for item in self.tour if item[0] in clusters]
+        in_tour = {item[0] for item in self.tour}
+        if self._pinned is not None and self._pinned in in_tour and self.tour[0][0] != self._pinned:
+            self.tour = [item for item in self.tour if item[0] != self._pinned]
+            in_tour.discard(self._pinned)
+        if self._pinned is not None and self._pinned not in in_tour:
+            self.tour.insert(0, [self._pinned] + list(self._pin_modes[0]))
+            in_tour.add(self._pinned)
+        for i in range(len(self.tour)):
+            self._best_mode(i)
+        for key in sorted(set(clusters) - in_tour):
+            if time.perf_counter() < deadline:
+                self._insert(key)
+            else:
+                self.tour.append([key] + list(self._modes(key)[0]))
+
+    # --- Improvement ---
+
+    def _two_opt(self, deadline: float) -> int:
+        """Segment reversals (each cluster in it is run the other way round). Returns moves made."""
+        tour, dist = self.tour, self._dist
+        first = 1 if self._pinned is not None else 0
+        moves = 0
+        n = len(tour)
+        for i in range(first, n - 1):
+            if time.perf_counter() > deadline:
+                break
+            prev_exit = tour[i - 1][2] if i > 0 else self._start
+            for j in range(i + 1, n):
+                nxt = tour[j + 1][1] if j + 1 < n else None
+                old = dist[prev_exit][tour[i][1]] + (dist[tour[j][2]][nxt] if nxt is not None else 0)
+                new = dist[prev_exit][tour[j][2]] + (dist[tour[i][1]][nxt] if nxt is not None else 0)
+                if new < old:
+                    segment = tour[i:j + 1]
+                    segment.reverse()
+                    for item in segment:
+                        item[1], item[2] = item[2], item[1]
+                    tour[i:j + 1] = segment
+                    moves += 1
+        return moves
+
+    def _relocate(self, deadline: float) -> int:
+        """Move single clusters to their cheapest position. Returns moves made."""
+        first = 1 if self._pinned is not None else 0
+        moves = 0
+        i = first
+        while i < len(self.tour):
+            if time.perf_counter() > deadline:
+                break
+            item = self.tour[i]
+            nxt = self.tour[i + 1][1] if i + 1 < len(self.tour) else None
+            saved = self._link(i, item[1]) + item[3]
+            if nxt is not None:
+                saved += self._dist[item[2]][nxt] - self._link(i, nxt)
+            del self.tour[i]
+            if self._insert(item[0]) < saved:
+                moves += 1
+            else:
+                # Put it back as it was
+                self.tour = [t for t in self.tour if t[0] != item[0]]
+                self.tour.insert(i, item)
+            i += 1
+        return moves
+
+    # --- Public API ---
+
+    def update(self, graph, grid, pacman_pos: Cell) -> Optional[Cell]:
+        """
+        Bring the tour up to date with the board and return the pellet to head for
+        (None when there is nothing left or no map). Stays within `time_budget`,
+        except for the one-off distance table of a new map.
+        """
+        start = time.perf_counter()
+        if graph is None or grid is None or not pacman_pos:
+            return None
+        rebuilt = False
+        if graph is not self.graph:
+            self._compile(graph)
+            start = time.perf_counter()
+        # Keep room for the work that cannot be interrupted at the deadline
+        deadline = start + self.time_budget - self._reserve
+
+        if grid is not self._grid:
+            clusters = self._scan(grid)
+            total = sum(len(v) for v in clusters.values())
+            refill = total > self._pellets_total
+            self._pellets_total = total
+            self.clusters = clusters
+            self._grid = grid
+        else:
+            clusters, refill = self.clusters, False
+
+        self._set_start(tuple(pacman_pos))
+        if refill or not self.tour:
+            self._build(deadline)
+            rebuilt = True
+        else:
+            self._repair(clusters, deadline)
+
+        moves = 0
+        while time.perf_counter() < deadline:
+            made = self._two_opt(deadline)
+            made += self._relocate(deadline)
+            for i in range(len(self.tour)):
+                if time.perf_counter() > deadline:
+                    break
+                made += self._best_mode(i)
+            moves += made
+            if not made:
+                break
+
+        self.last_stats = {
+            'clusters': len(self.tour),
+            'cost': self.cost() if self.tour else 0,
+            'elapsed_ms': (time.perf_counter() - start) * 1000.0,
+            'moves': moves,
+            'rebuilt': rebuilt,
+        }
+        target = self.target()
+        # Twice the overrun, as the next move in progress may be longer; decays slowly (to 5%
+        # of the budget, for the bookkeeping), so one quiet update does not give the margin away
+        overrun = time.perf_counter() - deadline
+        self._reserve = min(self.time_budget / 2, max(2 * overrun, self._reserve * 0.95, self.time_budget * 0.05))
+        return target
+
+    def target(self) -> Optional[Cell]:
+        """Pellet cell to head for: the next pellet of the first cluster, from the side it is cleared."""
+        if not self.tour:
+            return None
+        key, entry, exit_, _ = self.tour[0]
+        kind, idx = key
+        if kind == 'n':
+            return self.graph.nodes[idx]
+        edge = self.graph.edges[idx]
+        offsets = self.clusters[key]
+        if key == self._pinned:
+            left = [o for o in offsets if o < self._pin_offset]
+            right = [o for o in offsets if o >= self._pin_offset]
+            # Next pellet along the corridor in the clearing direction
+            if exit_ == edge.b:
+                return self._cell(idx, left[-1] if left else right[0])
+            return self._cell(idx, right[0] if right else left[-1])
+        return self._cell(idx, offsets[0] if entry == edge.a else offsets[-1])
+
+    def pellets_left(self) -> int:
+        return sum(len(v) for v in self.clusters.values())
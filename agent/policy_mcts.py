@@ -0,0 +1,330 @@
+import math
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import config
+from agent.game_model import GameModel, ACTIONS
+
+# Shared memory layout: int32 header, then walls (uint8, H*W), then pellets (uint8, H*W)
+MAX_GHOSTS = 8
+_H_VERSION, _H_WIDTH, _H_HEIGHT, _H_PAC, _H_NGHOSTS, _H_GHOSTS = 0, 1, 2, 3, 4, 5
+HEADER_INTS = _H_GHOSTS + MAX_GHOSTS
+
+PELLET_REWARD = 1.0
+DEATH_PENALTY = -5.0
+DISCOUNT = 0.95
+EXPLORATION = 1.0
+ROLLOUT_DEPTH = 20
+
+
+class _Node:
+    """Open-loop MCTS node: statistics for a sequence of Pac-Man actions."""
+    __slots__ = ('visits', 'value', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.children: Dict[str, '_Node'] = {}
+
+
+def run_mcts(model: GameModel, pellets: List[bool], pac: int, ghosts: Tuple[int, ...],
+             deadline: float, rng: random.Random) -> Tuple[Dict[str, Tuple[int, float]], int]:
+    """
+    Run UCT iterations from the given position until `deadline` (time.monotonic()).
+    Ghost moves are sampled from the model on every iteration (open-loop tree).
+
+    Returns ({action: (visits, total value)} for the root, number of iterations).
+    """
+    root = _Node()
+    iterations = 0
+    while time.monotonic() < deadline:
+        iterations += 1
+        node = root
+        path = [root]
+        p, gs = pac, list(ghosts)
+        eaten = set()
+        ret = 0.0
+        discount = 1.0
+        alive = True
+        prev = -1
+
+        # --- Selection / expansion ---
+        while alive:
+            moves = model.moves[p]
+            if not moves:
+                break
+            untried = [m for m in moves if m[0] not in node.children]
+            if untried:
+                action, nxt = untried[rng.randrange(len(untried))]
+                child = _Node()
+                node.children[action] = child
+            else:
+                log_n = math.log(node.visits)
+                action, nxt = max(moves, key=lambda m: node.children[m[0]].value / node.children[m[0]].visits
+                                  + EXPLORATION * math.sqrt(log_n / node.children[m[0]].visits))
+                child = node.children[action]
+
+            prev = p
+            r, p, gs, alive = _step(model, pellets, eaten, p, nxt, gs, rng)
+            ret += discount * r
+            discount *= DISCOUNT
+            node = child
+            path.append(node)
+            if untried:
+                break
+
+        # --- Rollout: random walk that avoids reversing ---
+        last = prev
+        for _ in range(ROLLOUT_DEPTH):
+            if not alive:
+                break
+            moves = model.moves[p]
+            if not moves:
+                break
+            forward = [m for m in moves if m[1] != last] or moves
+            _, nxt = forward[rng.randrange(len(forward))]
+            last = p
+            r, p, gs, alive = _step(model, pellets, eaten, p, nxt, gs, rng)
+            ret += discount * r
+            discount *= DISCOUNT
+
+        # --- Backpropagation ---
+        for n in path:
+            n.visits += 1
+            n.value += ret
+
+    stats = {action: (child.visits, child.value) for action, child in root.children.items()}
+    return stats, iterations
+
+
+def _step(model: GameModel, pellets: List[bool], eaten: set, pac: int, nxt: int,
+          ghosts: List[int], rng: random.Random) -> Tuple[float, int, List[int], bool]:
+    """Advance one tick: Pac-Man moves, then every ghost samples a move."""
+    if nxt in ghosts:
+        return DEATH_PENALTY, nxt, ghosts, False
+    reward = 0.0
+    if pellets[nxt] and nxt not in eaten:
+        eaten.add(nxt)
+        reward = PELLET_REWARD
+    ghosts = [model.ghost_step(g, nxt, rng.random()) for g in ghosts]
+    if nxt in ghosts:
+        return reward + DEATH_PENALTY, nxt, ghosts, False
+    return reward, nxt, ghosts, True
+
+
+def _worker_main(worker_id: int, shm_name: str, tasks, results):
+    """Worker process: waits for a decision, searches from the shared state, returns root stats."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        header = np.ndarray((HEADER_INTS,), dtype=np.int32, buffer=shm.buf)
+        model = None
+        model_version = -1
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            decision_id, deadline, seed = task
+
+            width, height = int(header[_H_WIDTH]), int(header[_H_HEIGHT])
+            cells = width * height
+            offset = HEADER_INTS * 4
+            if header[_H_VERSION] != model_version:
+                walls = np.ndarray((height, width), dtype=np.uint8, buffer=shm.buf, offset=offset)
+                model = GameModel(walls.copy())
+                model_version = int(header[_H_VERSION])
+            # Copy out of shared memory so the main process can reuse the block right away
+            pellets = np.ndarray((cells,), dtype=np.uint8, buffer=shm.buf, offset=offset + cells).astype(bool).tolist()
+            pac = int(header[_H_PAC])
+            ghosts = tuple(int(g) for g in header[_H_GHOSTS:_H_GHOSTS + header[_H_NGHOSTS]])
+
+            stats, iterations = run_mcts(model, pellets, pac, ghosts, deadline, random.Random(seed))
+            results.put((decision_id, worker_id, stats, iterations))
+    finally:
+        del header
+        shm.close()
+
+
+class ParallelMCTSAgent:
+    """
+    Root-parallel MCTS.
+
+    A persistent pool of worker processes receives the current state once per
+    decision through shared memory. Every worker grows its own tree until the
+    deadline, and the main process merges the root statistics (visit counts)
+    to pick the move. With workers=0 the search runs in-process.
+    """
+
+    def __init__(self, workers: int = None, time_budget: float = None):
+        if workers is None:
+            workers = getattr(config, 'MCTS_WORKERS', None)
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self.workers = workers
+        self.time_budget = time_budget if time_budget is not None else getattr(config, 'MCTS_TIME_BUDGET', 0.025)
+        # Part of the budget kept for collecting the workers' answers: they search
+        # until deadline - collect_grace, and slow ones are given up on at the deadline
+        self.collect_grace = min(0.010, self.time_budget / 2)
+
+        self.model: Optional[GameModel] = None
+        self.model_version = 0
+
+        self._shm = None
+        self._header = None
+        self._walls = None
+        self._pellets = None
+        self._procs = []
+        self._tasks = []
+        self._results = None
+        self._decision_id = 0
+
+        self.last_action = None
+        self.last_stats = {'workers': workers, 'rollouts': 0, 'elapsed_ms': 0.0, 'ipc_ms': 0.0, 'responses': 0}
+
+    # --- Pool management ---
+
+    def _start_pool(self, width: int, height: int):
+        self.close()
+        cells = width * height
+        self._shm = shared_memory.SharedMemory(create=True, size=HEADER_INTS * 4 + 2 * cells)
+        self._header = np.ndarray((HEADER_INTS,), dtype=np.int32, buffer=self._shm.buf)
+        self._header[:] = 0
+        self._walls = np.ndarray((height, width), dtype=np.uint8, buffer=self._shm.buf, offset=HEADER_INTS * 4)
+        self._pellets = np.ndarray((height, width), dtype=np.uint8, buffer=self._shm.buf, offset=HEADER_INTS * 4 + cells)
+
+        ctx = mp.get_context()
+        self._results = ctx.Queue()
+        for worker_id in range(self.workers):
+            tasks = ctx.Queue()
+            proc = ctx.Process(target=_worker_main, args=(worker_id, self._shm.name, tasks, self._results), daemon=True)
+            proc.start()
+            self._tasks.append(tasks)
+            self._procs.append(proc)
+        print(f"MCTS: started {self.workers} worker processes.")
+
+    def close(self):
+        """Stop the worker processes and release the shared memory block."""
+        for tasks in self._tasks:
+            tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout=1.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._tasks = []
+        self._procs = []
+        if self._shm is not None:
+            self._header = self._walls = self._pellets = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    # --- Decision ---
+
+    def decide_action(self, state: Dict[str, Any]) -> str:
+        """
+        Decide the next move based on the current state.
+
+        Args:
+            state: The structured game state from StateEstimator.
+
+        Returns:
+            One of 'UP', 'DOWN', 'LEFT', 'RIGHT'.
+        """
+        start = time.monotonic()
+        deadline = start + self.time_budget
+
+        grid = state.get('grid')
+        pos = state.get('pacman_pos')
+        if grid is None or not pos:
+            return self._fallback()
+
+        if self.model is None or not self.model.matches(grid):
+            self.model = GameModel(grid)
+            self.model_version += 1
+        pac = self.model.index(pos)
+        if not self.model.moves[pac]:
+            return self._fallback()
+        ghosts = tuple(self.model.index(g) for g in (state.get('ghost_positions') or [])[:MAX_GHOSTS])
+
+        if self.workers <= 0:
+            pellets = (np.asarray(grid) == 2).ravel().tolist()
+            stats, rollouts = run_mcts(self.model, pellets, pac, ghosts, deadline, random.Random())
+            merged = stats
+            responses = 1
+            ipc = 0.0
+        else:
+            merged, rollouts, responses, ipc = self._search_parallel(grid, pac, ghosts, deadline)
+
+        if merged:
+            # Most visited root move is the robust choice
+            action = max(merged, key=lambda a: merged[a][0])
+        else:
+            legal = [a for a, _ in self.model.moves[pac]]
+            action = self.last_action if self.last_action in legal else legal[0]
+
+        self.last_stats = {
+            'workers': self.workers,
+            'rollouts': rollouts,
+            'elapsed_ms': (time.monotonic() - start) * 1000.0,
+            'ipc_ms': ipc * 1000.0,
+            'responses': responses,
+        }
+        self.last_action = action
+        return action
+
+    def _search_parallel(self, grid, pac: int, ghosts: Tuple[int, ...], deadline: float):
+        height, width = grid.shape[:2]
+        if self._shm is None or self._walls.shape != (height, width) or not all(p.is_alive() for p in self._procs):
+            self._start_pool(width, height)
+
+        # --- Publish state (IPC cost #1: shared memory write + task dispatch) ---
+        t0 = time.monotonic()
+        search_deadline = deadline - self.collect_grace
+        self._decision_id += 1
+        if self._header[_H_VERSION] != self.model_version:
+            np.copyto(self._walls, (np.asarray(grid) == 1))
+        np.copyto(self._pellets, (np.asarray(grid) == 2))
+        self._header[_H_WIDTH] = width
+        self._header[_H_HEIGHT] = height
+        self._header[_H_PAC] = pac
+        self._header[_H_NGHOSTS] = len(ghosts)
+        self._header[_H_GHOSTS:_H_GHOSTS + len(ghosts)] = ghosts
+        self._header[_H_VERSION] = self.model_version
+        for worker_id, tasks in enumerate(self._tasks):
+            tasks.put((self._decision_id, search_deadline, (self._decision_id << 8) + worker_id))
+        ipc = time.monotonic() - t0
+
+        # --- Merge root statistics (IPC cost #2: waiting for results past the search deadline) ---
+        merged: Dict[str, List[float]] = {}
+        rollouts = 0
+        responses = 0
+        while responses < self.workers:
+            try:
+                decision_id, _, stats, iterations = self._results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if decision_id != self._decision_id:
+                continue  # Late answer to an older decision
+            responses += 1
+            rollouts += iterations
+            for action, (visits, value) in stats.items():
+                entry = merged.setdefault(action, [0, 0.0])
+                entry[0] += visits
+                entry[1] += value
+        ipc += max(0.0, time.monotonic() - search_deadline)
+
+        return {a: (v[0], v[1]) for a, v in merged.items()}, rollouts, responses, ipc
+
+    def _fallback(self) -> str:
+        self.last_action = self.last_action or random.choice(ACTIONS)
+        return self.last_action
@@ -0,0 +1,243 @@
+import random
+import time
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+import config
+from agent.game_model import GameModel, ACTIONS
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the per-frame deadline has passed."""
+
+
+class SearchPolicyAgent:
+    """
+    Lookahead agent: expectimax over Pac-Man moves and predicted ghost moves.
+
+    - Iterative deepening, stopped by a hard per-frame deadline. The move from the
+      deepest fully searched depth is played.
+    - Transposition table keyed by (Pac-Man cell, ghost cells, Zobrist hash of the
+      pellets). The pellet hash of a position does not depend on the path that led
+      to it, so the table (and with it the subtree searched last frame) stays valid
+      after Pac-Man moves or eats a pellet.
+    - Reports nodes searched and depth reached in `last_stats`.
+    """
+
+    PELLET_REWARD = 10.0
+    DEATH_PENALTY = -500.0
+    DISCOUNT = 0.95
+    # Ghosts further away than this many steps per remaining ply are assumed to stay put
+    GHOST_HORIZON = 2
+
+    def __init__(self, time_budget: float = None, max_depth: int = None, table_size: int = None):
+        self.time_budget = time_budget if time_budget is not None else getattr(config, 'SEARCH_TIME_BUDGET', 0.010)
+        self.max_depth = max_depth if max_depth is not None else getattr(config, 'SEARCH_MAX_DEPTH', 12)
+        self.table_size = table_size if table_size is not None else getattr(config, 'SEARCH_TABLE_SIZE', 200000)
+
+        self.model: Optional[GameModel] = None
+        # (pac, ghosts, pellet hash) -> (depth, value, best action)
+        self.table: Dict[Tuple[int, Tuple[int, ...], int], Tuple[int, float, Optional[str]]] = {}
+
+        # Per-board data, recomputed only when the grid snapshot changes
+        self._board_grid = None
+        self._pellets: List[bool] = []
+        self._pellet_hash = 0
+        self._pellet_dist: List[int] = []
+
+        self._deadline = 0.0
+        self._nodes = 0
+        self._hits = 0
+
+        self.last_action = None
+        self.last_path: List[Tuple[int, int]] = []
+        self.last_stats = {'nodes': 0, 'depth': 0, 'elapsed_ms': 0.0, 'table_hits': 0, 'table_size': 0}
+
+    def decide_action(self, state: Dict[str, Any]) -> str:
+        """
+        Decide the next move based on the current state.
+
+        Args:
+            state: The structured game state from StateEstimator.
+
+        Returns:
+            One of 'UP', 'DOWN', 'LEFT', 'RIGHT'.
+        """
+        start = time.perf_counter()
+        self._deadline = start + self.time_budget
+
+        root = self._prepare(state)
+        if root is None:
+            return self._fallback()
+        pac, ghosts = root
+        if not self.model.moves[pac]:
+            return self._fallback()
+
+        self._nodes = 0
+        self._hits = 0
+        best_action = None
+        depth_reached = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                _, action = self._max_node(pac, ghosts, self._pellet_hash, frozenset(), depth)
+            except _SearchTimeout:
+                break
+            best_action = action
+            depth_reached = depth
+
+        if best_action is None:
+            # Not even depth 1 finished: keep going if we can, else take any legal move
+            legal = [a for a, _ in self.model.moves[pac]]
+            best_action = self.last_action if self.last_action in legal else legal[0]
+
+        self.last_path = self._principal_variation(pac, ghosts, depth_reached)
+        self.last_stats = {
+            'nodes': self._nodes,
+            'depth': depth_reached,
+            'elapsed_ms': (time.perf_counter() - start) * 1000.0,
+            'table_hits': self._hits,
+            'table_size': len(self.table),
+        }
+
+        # Bound memory: the table is rebuilt quickly from the next searches
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        self.last_action = best_action
+        return best_action
+
+    # --- Setup ---
+
+    def _prepare(self, state: Dict[str, Any]) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        grid = state.get('grid')
+        if grid is None:
+            return None
+
+        if grid is not self._board_grid:
+            if self.model is None or not self.model.matches(grid):
+                # New maze: nothing in the table applies any more
+                self.model = GameModel(grid)
+                self.table.clear()
+            extracted = self.model.state_from(state)
+            if extracted is None:
+                return None
+            _, _, pellets = extracted
+            self._board_grid = grid
+            self._pellets = pellets
+            self._pellet_hash = self.model.pellet_hash(pellets)
+            self._pellet_dist = self.model.pellet_distances(pellets)
+
+        pos = state.get('pacman_pos')
+        if not pos:
+            return None
+        pac = self.model.index(pos)
+        if self.model.walls[pac]:
+            return None
+        ghosts = tuple(sorted(self.model.index(g) for g in state.get('ghost_positions', []) or []))
+        return pac, ghosts
+
+    def _fallback(self) -> str:
+        self.last_path = []
+        self.last_stats = {'nodes': 0, 'depth': 0, 'elapsed_ms': 0.0, 'table_hits': 0, 'table_size': len(self.table)}
+        self.last_action = self.last_action or random.choice(ACTIONS)
+        return self.last_action
+
+    # --- Search ---
+
+    def _max_node(self, pac: int, ghosts: Tuple[int, ...], pellet_hash: int,
+                  eaten: FrozenSet[int], depth: int) -> Tuple[float, Optional[str]]:
+        self._nodes += 1
+        if (self._nodes & 63) == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        if depth == 0:
+            return self._evaluate(pac, ghosts, eaten), None
+
+        key = (pac, ghosts, pellet_hash)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            self._hits += 1
+            return entry[1], entry[2]
+
+        moves = self.model.moves[pac]
+        if entry is not None and entry[2] is not None:
+            # Try last known best move first
+            moves = sorted(moves, key=lambda m: m[0] != entry[2])
+
+        best_value = float('-inf')
+        best_action = None
+        for action, nxt in moves:
+            value = self._chance_node(nxt, ghosts, pellet_hash, eaten, depth)
+            if value > best_value:
+                best_value = value
+                best_action = action
+
+        self.table[key] = (depth, best_value, best_action)
+        return best_value, best_action
+
+    def _chance_node(self, pac: int, ghosts: Tuple[int, ...], pellet_hash: int,
+                     eaten: FrozenSet[int], depth: int) -> float:
+        # Walking into a ghost (this also covers swapping cells with it)
+        if pac in ghosts:
+            return self.DEATH_PENALTY
+
+        reward = 0.0
+        if self._pellets[pac] and pac not in eaten:
+            reward = self.PELLET_REWARD
+            pellet_hash ^= self.model.zobrist[pac]
+            eaten = eaten | {pac}
+
+        value = 0.0
+        for cells, p in self._ghost_joint(ghosts, pac, depth):
+            # Caught after the ghosts move
+            if pac in cells:
+                value += p * self.DEATH_PENALTY
+            else:
+                v, _ = self._max_node(pac, tuple(sorted(cells)), pellet_hash, eaten, depth - 1)
+                value += p * v
+        return reward + self.DISCOUNT * value
+
+    def _ghost_joint(self, ghosts: Tuple[int, ...], pac: int, depth: int) -> List[Tuple[Tuple[int, ...], float]]:
+        """Joint distribution of the next ghost cells (only nearby ghosts branch)."""
+        joint = [((), 1.0)]
+        horizon = self.GHOST_HORIZON * depth
+        for g in ghosts:
+            if self.model.manhattan(g, pac) <= horizon:
+                outcomes = self.model.ghost_outcomes(g, pac)
+            else:
+                outcomes = [(g, 1.0)]
+            joint = [(cells + (c,), p * q) for cells, p in joint for c, q in outcomes]
+        return joint
+
+    def _evaluate(self, pac: int, ghosts: Tuple[int, ...], eaten: FrozenSet[int]) -> float:
+        """Heuristic value of a leaf: close to pellets, away from ghosts."""
+        if pac in eaten:
+            # Pellet map is from the root, so look one step further for a cell we haven't cleared
+            dist = 1 + min((self._pellet_dist[j] for _, j in self.model.moves[pac] if j not in eaten),
+                           default=self.model.size)
+        else:
+            dist = self._pellet_dist[pac]
+
+        value = -float(dist)
+        for g in ghosts:
+            d = self.model.manhattan(g, pac)
+            if d < 6:
+                value -= 40.0 / (d + 1)
+        return value
+
+    def _principal_variation(self, pac: int, ghosts: Tuple[int, ...], depth: int) -> List[Tuple[int, int]]:
+        """Cells along the expected line of play (most likely ghost moves)."""
+        path = [self.model.cell(pac)]
+        pellet_hash = self._pellet_hash
+        eaten = frozenset()
+        for remaining in range(depth, 0, -1):
+            entry = self.table.get((pac, ghosts, pellet_hash))
+            if entry is None or entry[2] is None:
+                break
+            nxt = dict(self.model.moves[pac])[entry[2]]
+            if self._pellets[nxt] and nxt not in eaten:
+                pellet_hash ^= self.model.zobrist[nxt]
+                eaten = eaten | {nxt}
+            cells, _ = max(self._ghost_joint(ghosts, nxt, remaining), key=lambda o: o[1])
+            ghosts = tuple(sorted(cells))
+            pac = nxt
+            path.append(self.model.cell(pac))
+        return path
@@ -1,5 +1,8 @@
 import random
 from typing import Dict, Any
+import config
+from vision.maze_graph import DIRECTIONS, OPPOSITE, step_direction
+from agent.pellet_tour import PelletTour
 
 class SimplePolicyAgent:
     """
@@ -7,7 +10,9 @@ class SimplePolicyAgent:
     """
     
     def __init__(self):
-        pass
+        self.last_action = None
+        self.last_path = []
+        self.tour = PelletTour() if getattr(config, 'PELLET_TOUR_ENABLED', True) else None
         
     def decide_action(self, state: Dict[str, Any]) -> str:
         """
@@ -24,5 +29,45 @@ class SimplePolicyAgent:
         # 2. If safe, find path to nearest pellet.
         # 3. Return first step of that path.
         
+        # Between junctions there is only one sensible move: keep following the corridor
+        # and only plan again once we reach a decision point.
+        graph = state.get('graph')
+        pos = state.get('pacman_pos')
+        self.last_path = []
+        if self.tour is not None and graph is not None and pos:
+            action = self._follow_tour(graph, state.get('grid'), tuple(pos))
+            if action:
+                self.last_action = action
+                return action
+
+        if graph is not None and pos and self.last_action and not graph.is_decision_point(pos):
+            action = self._follow_corridor(graph, pos)
+            if action:
+                self.last_action = action
+                return action
+
         # MVP: Random walk
-        return random.choice(['UP', 'DOWN', 'LEFT', 'RIGHT'])
+        self.last_action = random.choice(['UP', 'DOWN', 'LEFT', 'RIGHT'])
+        return self.last_action
+
+    def _follow_tour(self, graph, grid, pos) -> str:
+        """First step towards the next pellet of the planned pellet tour."""
+        target = self.tour.update(graph, grid, pos)
+        if target is None:
+            return None
+        path = graph.shortest_path(pos, target)
+        if not path or len(path) < 2:
+            return None
+        self.last_path = path
+        return step_direction(path[0], path[1])
+
+    def _follow_corridor(self, graph, pos) -> str:
+        """Continue in the current direction, or take the bend of the corridor."""
+        x, y = pos
+        candidates = [self.last_action] + [d for d in DIRECTIONS if d not in (self.last_action, OPPOSITE[self.last_action])]
+        for direction in candidates:
+            dx, dy = DIRECTIONS[direction]
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < graph.width and 0 <= ny < graph.height and graph.walkable[ny, nx]:
+                return direction
+        return None
@@ -1,29 +1,67 @@
 import os
-# import google.generativeai as genai # Uncomment when installed
+import config
+
+PROMPT = (
+    "You are coaching an agent that plays Pac-Man. The image is the current game screen. "
+    "Known state: {summary}. "
+    "Reply with one short sentence of strategic advice (which area to clear next, which ghost to avoid)."
+)
 
 class GeminiHelper:
     """
     Interface for Google's Gemini AI.
     Used for high-level strategy and analysis, not per-frame control.
+
+    Needs the google-generativeai package and an API key; the SDK is imported
+    when the helper is created, so the rest of the agent runs without it.
+    Failed calls raise, which StrategistService counts as errors instead of
+    publishing advice.
     """
-    
-    def __init__(self, api_key: str):
+
+    def __init__(self, api_key: str, model_name: str = None):
+        if not api_key:
+            raise ValueError("GeminiHelper needs an API key (GOOGLE_API_KEY in .env)")
+        import google.generativeai as genai
         self.api_key = api_key
-        # TODO: Initialize Gemini client
-        # genai.configure(api_key=self.api_key)
-        # self.model = genai.GenerativeModel('gemini-pro-vision')
-        pass
-        
+        genai.configure(api_key=self.api_key)
+        self.model = genai.GenerativeModel(model_name or getattr(config, 'GEMINI_MODEL', 'gemini-1.5-flash'))
+
     def analyze_game_state(self, screenshot_path: str, current_state_summary: str) -> str:
         """
         Send a screenshot and state summary to Gemini for strategic advice.
         """
-        # TODO: Implement API call.
-        # response = self.model.generate_content([img, prompt])
-        return "Suggestion: Keep up the good work."
+        image_bytes, mime_type = self._read_image(screenshot_path)
+        return self._generate(image_bytes, mime_type, PROMPT.format(summary=current_state_summary))
+
+    def analyze_frame(self, image_bytes: bytes, current_state_summary: str) -> str:
+        """
+        Same as analyze_game_state, but takes an in-memory JPEG
+        so callers never have to write the frame to disk first.
+        """
+        return self._generate(image_bytes, 'image/jpeg', PROMPT.format(summary=current_state_summary))
 
     def debug_detection(self, screenshot_path: str, detections: dict) -> str:
         """
         Ask Gemini if the detections look correct overlayed on the image.
         """
-        return "Diagnostics: Looks plausible."
+        image_bytes, mime_type = self._read_image(screenshot_path)
+        prompt = (f"These boxes (x, y, w, h) were detected on this Pac-Man screen: {detections}. "
+                  "Do they match Pac-Man and the ghosts? Answer briefly.")
+        return self._generate(image_bytes, mime_type, prompt)
+
+    @staticmethod
+    def _read_image(path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(path)[1].lower()
+        return data, ('image/png' if ext == '.png' else 'image/jpeg')
+
+    def _generate(self, image_bytes: bytes, mime_type: str, prompt: str) -> str:
+        parts = [prompt]
+        if image_bytes:
+            parts.insert(0, {'mime_type': mime_type, 'data': image_bytes})
+        response = self.model.generate_content(parts)
+        text = (response.text or '').strip()
+        if not text:
+            raise RuntimeError("Gemini returned an empty response")
+        return text
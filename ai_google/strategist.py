@@ -0,0 +1,253 @@
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Dict, Any, NamedTuple, Optional
+import config
+
+
+class Advice(NamedTuple):
+    """One piece of strategic advice, as published to the agent."""
+    text: str
+    version: int          # Increments with every publication
+    created_at: float     # time.monotonic() when it was published
+    summary_hash: str     # Hash of the state summary it answers
+    cached: bool          # True if served from the response cache
+
+
+def summarize_state(game_state: Dict[str, Any]) -> str:
+    """Compact text summary of a game_state, used as the prompt and as the cache key."""
+    pos = game_state.get('pacman_pos')
+    ghosts = game_state.get('ghost_positions') or []
+    return (f"Pac-Man at {tuple(pos) if pos else 'unknown'}; "
+            f"ghosts at {sorted(tuple(g) for g in ghosts)}; "
+            f"pellets {game_state.get('pellets_remaining', 0)}/{game_state.get('pellets_total', 0)}")
+
+
+# --- Transports ---
+
+class GeminiTransport:
+    """
+    Sends requests through GeminiHelper.
+    The SDK call is blocking, so it runs in the default executor.
+    """
+
+    def __init__(self, helper=None):
+        if helper is None:
+            from ai_google.gemini_helper import GeminiHelper
+            helper = GeminiHelper(api_key=config.GOOGLE_API_KEY)
+        self.helper = helper
+
+    async def request(self, image_bytes: bytes, summary: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.helper.analyze_frame, image_bytes, summary)
+
+
+class HttpTransport:
+    """
+    POSTs {"summary", "image_b64"} as JSON and expects {"advice": "..."} back.
+    Point it at tools/strategist_stub_server.py to run without network access.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def request(self, image_bytes: bytes, summary: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._post, image_bytes, summary)
+
+    def _post(self, image_bytes: bytes, summary: str) -> str:
+        body = json.dumps({
+            'summary': summary,
+            'image_b64': base64.b64encode(image_bytes).decode('ascii') if image_bytes else None,
+        }).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode('utf-8'))['advice']
+
+
+# --- Service ---
+
+class StrategistService:
+    """
+    Asynchronous strategist that keeps Gemini off the control loop's critical path.
+
+    - `submit(frame, game_state)` is cheap and thread-safe: it only parks the request
+      in a one-slot mailbox. Requests submitted while another one is waiting replace
+      it, so a burst collapses into a single call with the latest state.
+    - Calls are rate limited to one per `min_interval` seconds.
+    - Responses are cached by a hash of the state summary; a cached answer is
+      published immediately without touching the network or the rate limit.
+    - Advice is published by swapping a single reference (`latest_advice`), so the
+      control loop reads it without taking any lock.
+    - The transport is anything with `async request(image_bytes, summary) -> str`.
+    """
+
+    def __init__(self, transport=None, min_interval: float = None, cache_size: int = 128, jpeg_quality: int = 70):
+        self.transport = transport if transport is not None else GeminiTransport()
+        self.min_interval = min_interval if min_interval is not None else getattr(config, 'STRATEGIST_MIN_INTERVAL', 5.0)
+        self.cache_size = cache_size
+        self.jpeg_quality = jpeg_quality
+
+        self.latest_advice: Optional[Advice] = None
+
+        self._pending = None  # (frame, summary) waiting to be sent
+        self._pending_lock = threading.Lock()
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._last_sent = float('-inf')
+        self._version = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping = False
+
+        self.stats = {'submitted': 0, 'coalesced': 0, 'sent': 0, 'cache_hits': 0, 'errors': 0}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Start the event loop in a background thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_loop, name="strategist", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout: float = 2.0):
+        if self._thread is None:
+            return
+        self._stopping = True
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+                loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # The loop has just closed on its own
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self._ready.clear()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._worker())
+        finally:
+            # Unpublish the loop first, so submit() stops scheduling on it
+            loop, self._loop = self._loop, None
+            loop.close()
+
+    # --- Producer side (control loop thread) ---
+
+    def submit(self, frame, game_state: Dict[str, Any]):
+        """
+        Queue the current frame and state for advice. Never blocks on I/O.
+        The frame is copied, since the caller usually draws on it afterwards.
+        """
+        request = (frame.copy() if frame is not None else None, summarize_state(game_state))
+        with self._pending_lock:
+            if self._pending is not None:
+                self.stats['coalesced'] += 1
+            self._pending = request
+        self.stats['submitted'] += 1
+        loop = self._loop
+        if loop is not None and not self._stopping:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # Closed by stop() in the meantime; the request waits for the next start()
+
+    # --- Consumer side (event loop thread) ---
+
+    def _take_pending(self):
+        with self._pending_lock:
+            request, self._pending = self._pending, None
+        return request
+
+    async def _worker(self):
+        while not self._stopping:
+            await self._wake.wait()
+            self._wake.clear()
+
+            request = self._take_pending()
+            if request is None:
+                continue
+            if self._serve_cached(request[1]):
+                continue
+
+            # Rate limit: anything submitted while we wait supersedes this request
+            delay = self._last_sent + self.min_interval - time.monotonic()
+            if delay > 0:
+                # Wait on the stop event, so stop() does not have to outlast the rate limit
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                if self._stopping:
+                    break
+                newer = self._take_pending()
+                if newer is not None:
+                    self.stats['coalesced'] += 1
+                    request = newer
+                    if self._serve_cached(request[1]):
+                        continue
+            if self._stopping:
+                break
+
+            await self._send(*request)
+
+    def _serve_cached(self, summary: str) -> bool:
+        key = self._hash(summary)
+        text = self._cache.get(key)
+        if text is None:
+            return False
+        self._cache.move_to_end(key)
+        self.stats['cache_hits'] += 1
+        self._publish(text, key, cached=True)
+        return True
+
+    async def _send(self, frame, summary: str):
+        self._last_sent = time.monotonic()
+        try:
+            image_bytes = await self._loop.run_in_executor(None, self._encode, frame)
+            text = await self.transport.request(image_bytes, summary)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Strategist request failed: {e}")
+            return
+        self.stats['sent'] += 1
+
+        key = self._hash(summary)
+        self._cache[key] = text
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self._publish(text, key, cached=False)
+
+    def _publish(self, text: str, key: str, cached: bool):
+        self._version += 1
+        # Single reference assignment: readers see either the old or the new advice
+        self.latest_advice = Advice(text, self._version, time.monotonic(), key, cached)
+
+    def _encode(self, frame) -> bytes:
+        if frame is None:
+            return b''
+        import cv2
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buf.tobytes() if ok else b''
+
+    @staticmethod
+    def _hash(summary: str) -> str:
+        return hashlib.sha1(summary.encode('utf-8')).hexdigest()
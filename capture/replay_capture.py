@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class ReplayCapturer:
+    """
+    Drop-in replacement for ScreenCapturer that plays back recorded frames.
+
+    The source is either a DataLogger session (frames in data.jsonl order) or
+    any folder of images (sorted by name). Lets the whole pipeline run
+    headless, e.g. under the supervisor or in benchmarks.
+    """
+
+    def __init__(self, source: str, fps: Optional[float] = None, loop: bool = True, preload: bool = True,
+                 region: Dict[str, int] = None):
+        """
+        Args:
+            source: Session directory or image folder.
+            fps: Pace playback like a live capture (None = as fast as frames are requested).
+            loop: Start over at the end instead of returning None.
+            preload: Decode every frame up front (playback then costs one copy per frame).
+            region: Kept for interface compatibility with ScreenCapturer.
+        """
+        self.source = source
+        self.fps = fps
+        self.loop = loop
+        self.region = region
+        self.paths = self._list_frames(source)
+        if not self.paths:
+            raise FileNotFoundError(f"No frames found in {source}")
+        self._frames = [self._read(p) for p in self.paths] if preload else None
+        self._index = 0
+        self._next_time = None
+        self.frames_served = 0
+
+    @staticmethod
+    def _list_frames(source: str) -> List[str]:
+        log_file = os.path.join(source, 'data.jsonl')
+        if os.path.exists(log_file):
+            paths = []
+            with open(log_file) as f:
+                for line in f:
+                    if line.strip():
+                        paths.append(os.path.join(source, json.loads(line)['image_file']))
+            return paths
+        if not os.path.isdir(source):
+            return []
+        return [os.path.join(source, f) for f in sorted(os.listdir(source)) if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+    @staticmethod
+    def _read(path: str) -> np.ndarray:
+        import cv2
+        frame = cv2.imread(path)
+        if frame is None:
+            raise IOError(f"Unreadable frame: {path}")
+        return frame
+
+    def capture(self) -> Optional[np.ndarray]:
+        """Next recorded frame (a fresh copy the caller may draw on), or None when done."""
+        if self._index >= len(self.paths):
+            if not self.loop:
+                return None
+            self._index = 0
+
+        if self.fps:
+            now = time.perf_counter()
+            if self._next_time is None:
+                self._next_time = now
+            elif now < self._next_time:
+                time.sleep(self._next_time - now)
+            self._next_time = max(self._next_time + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+        i = self._index
+        self._index += 1
+        self.frames_served += 1
+        if self._frames is not None:
+            return self._frames[i].copy()
+        return self._read(self.paths[i])
+
+    def update_region(self, region: Dict[str, int]):
+        """Update the capture region (no effect on playback)."""
+        self.region = region
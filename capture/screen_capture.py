@@ -1,6 +1,5 @@
 import mss
 import numpy as np
-import cv2
 import time
 from typing import Dict, Any
 
@@ -0,0 +1,280 @@
+import os
+import math
+import time
+import random
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+from utils.sample_maze import sample_grid, PACMAN_START
+from vision.maze_graph import DIRECTIONS, OPPOSITE
+
+# Pac-Man sprite color (BGR) used by the simulator and its templates
+SIM_PACMAN_COLOR = (0, 255, 255)
+# Ghost colors (BGR) the simulator draws, in order: the GAME_COLORS ghosts that cannot be
+# mistaken for Pac-Man (the gold #ffd22c ghost is too close to his yellow to tell apart)
+SIM_GHOST_COLORS = [c for c in config.GAME_COLORS['GHOSTS']
+                    if np.linalg.norm(np.subtract(c, SIM_PACMAN_COLOR, dtype=np.float32)) > 120]
+
+
+class SimGame:
+    """
+    Small real-time Pac-Man simulation that is both a capture source and a controller.
+
+    Lets the whole pipeline (and tools such as the latency probe) run offline
+    with known timing:
+    - the game advances in fixed ticks (`tick_hz`) on the wall clock,
+    - a key press reaches the game `input_delay` seconds after it is sent and is
+      applied on the next tick (reversals at once, turns at the next cell center),
+    - with `key_memory` a requested turn waits until it is possible (arcade style);
+      without it, the key must still be held when Pac-Man reaches the junction,
+    - `capture()` shows the game as it was `display_delay` seconds ago.
+
+    Frames use the configured GRID_PADDING around a grid of `cell` pixel cells,
+    so the vision stack maps them exactly like a live capture.
+    """
+
+    def __init__(self, grid: np.ndarray = None, cell: int = 8, speed: float = 8.0, tick_hz: float = 60.0,
+                 input_delay: float = 0.030, display_delay: float = 0.017, ghosts: int = 2, seed: int = 0,
+                 key_memory: bool = True):
+        self.grid = (grid if grid is not None else sample_grid()).copy()
+        self.height, self.width = self.grid.shape
+        self.cell = cell
+        self.speed = speed                  # cells per second
+        self.tick = 1.0 / tick_hz
+        self.input_delay = input_delay
+        self.display_delay = display_delay
+        self.key_memory = key_memory
+        self._rng = random.Random(seed)
+
+        self.pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+        self.frame_shape = (self.pad['top'] + self.height * cell + self.pad['bottom'],
+                            self.pad['left'] + self.width * cell + self.pad['right'], 3)
+
+        # Pac-Man: position in cell units (cell centers at integers), current and queued direction
+        self.pos = [float(PACMAN_START[0]), float(PACMAN_START[1])]
+        self.direction = 'LEFT'
+        self.queued = None
+        self._queued_until = math.inf       # Game time the queued turn's key is released
+        self.ghosts = [self._random_walkable() for _ in range(ghosts)]
+        self._ghost_dirs = ['UP'] * ghosts
+
+        self._inputs = deque()              # (time the game sees it, action, time it sees the release)
+        self._history = deque()             # (time, pos, direction, ghosts) per tick
+        self._start = time.perf_counter()
+        self._now = self._start
+        self._background = self._render_background()
+        self.ticks = 0
+        self.turns = []                     # (time, action) when the game applied a direction change
+
+    # --- Game logic ---
+
+    def _walkable(self, x: int, y: int) -> bool:
+        x %= self.width  # Tunnel wraps horizontally
+        return 0 <= y < self.height and self.grid[y, x] != 1
+
+    def _random_walkable(self) -> List[float]:
+        cells = np.argwhere(self.grid != 1)
+        y, x = cells[self._rng.randrange(len(cells))]
+        return [float(x), float(y)]
+
+    def _step_pacman(self, now: float):
+        while self._inputs and self._inputs[0][0] <= now:
+            _, action, released = self._inputs.popleft()
+            if action == OPPOSITE[self.direction]:
+                # Reversing is always allowed immediately
+                self.direction = action
+                self.queued = None
+                self.turns.append((now, action))
+            elif action != self.direction:
+                self.queued = action
+                self._queued_until = math.inf if self.key_memory else released
+        if self.queued and now > self._queued_until:
+            self.queued = None  # Key let go before the junction
+
+        step = self.speed * self.tick
+        x, y = self.pos
+        cx, cy = round(x), round(y)
+        at_center = abs(x - cx) < 1e-6 and abs(y - cy) < 1e-6
+        if at_center:
+            if self.queued and self._walkable(cx + DIRECTIONS[self.queued][0], cy + DIRECTIONS[self.queued][1]):
+                self.direction = self.queued
+                self.queued = None
+                self.turns.append((now, self.direction))
+            dx, dy = DIRECTIONS[self.direction]
+            if not self._walkable(cx + dx, cy + dy):
+                return
+        dx, dy = DIRECTIONS[self.direction]
+        # Move, stopping exactly on the next cell center so turns can happen there
+        if dx:
+            target = cx + dx if at_center else (math.ceil(x) if dx > 0 else math.floor(x))
+            x = min(x + step, target) if dx > 0 else max(x - step, target)
+        else:
+            target = cy + dy if at_center else (math.ceil(y) if dy > 0 else math.floor(y))
+            y = min(y + step, target) if dy > 0 else max(y - step, target)
+        if x < -0.5:
+            x += self.width
+        elif x > self.width - 0.5:
+            x -= self.width
+        self.pos = [float(x), float(y)]
+        gx, gy = round(x) % self.width, round(y)
+        if self.grid[gy, gx] == 2:
+            self.grid[gy, gx] = 0
+            self._erase_pellet(gx, gy)
+
+    def _step_ghosts(self):
+        step = self.speed * 0.8 * self.tick
+        for i, g in enumerate(self.ghosts):
+            x, y = g
+            cx, cy = round(x), round(y)
+            if abs(x - cx) < 1e-6 and abs(y - cy) < 1e-6:
+                back = OPPOSITE[self._ghost_dirs[i]]
+                options = [a for a, d in DIRECTIONS.items() if a != back and self._walkable(cx + d[0], cy + d[1])]
+                if not options:
+                    options = [a for a, d in DIRECTIONS.items() if self._walkable(cx + d[0], cy + d[1])]
+                if not options:
+                    continue
+                self._ghost_dirs[i] = self._rng.choice(options)
+                dx, dy = DIRECTIONS[self._ghost_dirs[i]]
+                target = (cx + dx, cy + dy)
+            else:
+                dx, dy = DIRECTIONS[self._ghost_dirs[i]]
+                target = (math.ceil(x) if dx > 0 else math.floor(x) if dx < 0 else x,
+                          math.ceil(y) if dy > 0 else math.floor(y) if dy < 0 else y)
+            nx = min(x + step, target[0]) if dx > 0 else max(x - step, target[0]) if dx < 0 else x
+            ny = min(y + step, target[1]) if dy > 0 else max(y - step, target[1]) if dy < 0 else y
+            if 0 <= round(nx) < self.width:
+                self.ghosts[i] = [float(nx), float(ny)]
+
+    def advance(self, until: float = None):
+        """Run every tick up to `until` (default: now)."""
+        until = until if until is not None else time.perf_counter()
+        while self._now + self.tick <= until:
+            self._now += self.tick
+            self._step_pacman(self._now)
+            self._step_ghosts()
+            self.ticks += 1
+            self._history.append((self._now, tuple(self.pos), self.direction, [tuple(g) for g in self.ghosts]))
+        # Keep about a second of history for delayed display
+        while len(self._history) > 2 and self._history[1][0] < until - 1.0:
+            self._history.popleft()
+
+    def step(self, seconds: float):
+        """Advance the game by `seconds` of game time, independent of the wall clock (offline recording)."""
+        self.advance(self._now + seconds + 1e-9)
+
+    def steer(self, action: str):
+        """Request a direction as of the current game time (no input delay, no key hold)."""
+        if action in DIRECTIONS:
+            self._inputs.append((self._now, action, math.inf))
+
+    # --- Rendering / capture ---
+
+    def _cell_rect(self, x: int, y: int) -> Tuple[int, int, int, int]:
+        c = self.cell
+        return self.pad['left'] + x * c, self.pad['top'] + y * c, c, c
+
+    def _render_background(self) -> np.ndarray:
+        frame = np.zeros(self.frame_shape, dtype=np.uint8)
+        wall = config.GAME_COLORS['WALLS'][0]
+        pellet = config.GAME_COLORS['PELLETS'][0]
+        c = self.cell
+        for y in range(self.height):
+            for x in range(self.width):
+                px, py, _, _ = self._cell_rect(x, y)
+                if self.grid[y, x] == 1:
+                    frame[py:py + c, px:px + c] = wall
+                elif self.grid[y, x] == 2:
+                    r = max(1, c // 8)
+                    frame[py + c // 2 - r:py + c // 2 + r, px + c // 2 - r:px + c // 2 + r] = pellet
+        return frame
+
+    def _erase_pellet(self, x: int, y: int):
+        px, py, c, _ = self._cell_rect(x, y)
+        self._background[py:py + c, px:px + c] = 0
+
+    def _sprite_center(self, pos) -> Tuple[float, float]:
+        return (self.pad['left'] + (pos[0] + 0.5) * self.cell, self.pad['top'] + (pos[1] + 0.5) * self.cell)
+
+    def _draw_ghost(self, image: np.ndarray, cx: float, cy: float, color):
+        """Ghost sprite: round head over a square body with a notched skirt (unlike Pac-Man's disc)."""
+        import cv2
+        shift = 4
+        one = 1 << shift
+        r = self.cell * 0.45
+        cv2.ellipse(image, (int(cx * one), int((cy - r * 0.2) * one)), (int(r * one), int(r * one)), 0, 180, 360,
+                    color, -1, cv2.LINE_AA, shift)
+        body = np.array([[cx - r, cy - r * 0.2], [cx + r, cy - r * 0.2], [cx + r, cy + r], [cx + r / 3, cy + r * 0.5],
+                         [cx, cy + r], [cx - r / 3, cy + r * 0.5], [cx - r, cy + r]])
+        cv2.fillPoly(image, [(body * one).astype(np.int32)], color, cv2.LINE_AA, shift)
+
+    def render(self, pos, ghosts) -> np.ndarray:
+        import cv2
+        frame = self._background.copy()
+        shift = 4  # Sub-pixel sprite positions (1/16 px)
+        radius = int(self.cell * 0.45 * (1 << shift))
+        for i, g in enumerate(ghosts):
+            self._draw_ghost(frame, *self._sprite_center(g), SIM_GHOST_COLORS[i % len(SIM_GHOST_COLORS)])
+        cx, cy = self._sprite_center(pos)
+        cv2.circle(frame, (int(cx * (1 << shift)), int(cy * (1 << shift))), radius, SIM_PACMAN_COLOR, -1, cv2.LINE_AA, shift)
+        return frame
+
+    def capture(self) -> Optional[np.ndarray]:
+        """Frame as displayed now: the game state `display_delay` seconds ago."""
+        now = time.perf_counter()
+        self.advance(now)
+        shown = now - self.display_delay
+        state = None
+        for entry in reversed(self._history):
+            if entry[0] <= shown:
+                state = entry
+                break
+        if state is None:
+            return self.render(self.pos, self.ghosts)
+        return self.render(state[1], state[3])
+
+    def update_region(self, region: Dict[str, int]):
+        pass
+
+    def pixel_position(self, pos=None) -> Tuple[float, float]:
+        """Pac-Man's sprite center in frame pixels (ground truth)."""
+        return self._sprite_center(pos if pos is not None else self.pos)
+
+    def cell_of(self, pos) -> Tuple[int, int]:
+        """Grid cell a sprite at `pos` (cell units) is shown in (ground truth)."""
+        return int(round(pos[0])) % self.width, int(round(pos[1]))
+
+    # --- Control ---
+
+    def press_key(self, key_name: str, duration: float = 0.05):
+        """Key down now (seen by the game after input_delay), then hold like KeyboardController."""
+        if key_name in DIRECTIONS:
+            seen = time.perf_counter() + self.input_delay
+            self._inputs.append((seen, key_name, seen + max(duration, self.tick)))
+        if duration > 0:
+            time.sleep(duration)
+
+    def execute_action(self, action: str):
+        if action and action != 'STOP':
+            self.press_key(action, getattr(config, 'KEY_PRESS_DURATION', 0.05))
+
+    def emergency_stop(self):
+        pass
+
+    # --- Templates ---
+
+    def write_templates(self, template_dir: str):
+        """
+        Write pacman.png and one ghost template per simulated ghost colour
+        (ghost.png, ghost_1.png, ...) matching the rendered sprites (for ObjectDetectorCV).
+        """
+        import cv2
+        os.makedirs(template_dir, exist_ok=True)
+        size = self.cell + 2
+        img = np.zeros((size, size, 3), dtype=np.uint8)
+        cv2.circle(img, (size * 8, size * 8), int(self.cell * 0.45 * 16), SIM_PACMAN_COLOR, -1, cv2.LINE_AA, 4)
+        cv2.imwrite(os.path.join(template_dir, 'pacman.png'), img)
+        for i, color in enumerate(SIM_GHOST_COLORS[:max(1, len(self.ghosts))]):
+            img = np.zeros((size, size, 3), dtype=np.uint8)
+            self._draw_ghost(img, size / 2.0, size / 2.0, color)
+            cv2.imwrite(os.path.join(template_dir, 'ghost.png' if i == 0 else f'ghost_{i}.png'), img)
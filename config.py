@@ -8,6 +8,19 @@ CAPTURE_REGION = {'top': 158, 'left': 944, 'width': 969, 'height': 498}
 
 # Target Frames Per Second for the main loop
 TARGET_FPS = 30
+# What the loop does after overrunning a frame deadline:
+# 'skip' drops the missed slots and realigns, 'catchup' runs frames back to back until on schedule
+LOOP_MISS_POLICY = 'skip'
+# The last part of each wait is busy-waited for precise wake-ups (seconds; 0 = sleep only)
+LOOP_SPIN_SECONDS = 0.001
+
+# Power saving: drop to IDLE_FPS while the screen shows no motion (pause, menus)
+ACTIVITY_MONITOR_ENABLED = True
+IDLE_FPS = 4
+IDLE_AFTER_SECONDS = 1.5          # No motion for this long -> idle
+ACTIVITY_DOWNSCALE = 4            # Frame differences are taken on the maze area shrunk this many times (pyramid level, power of two)
+ACTIVITY_PIXEL_THRESHOLD = 12     # Gray level change that counts a (downscaled) pixel as changed
+ACTIVITY_MIN_PIXELS = 4           # Changed pixels needed to count a frame as motion
 
 # --- Control Settings ---
 # Key mappings for the game
@@ -22,6 +35,22 @@ KEY_MAP = {
 # Duration to hold a key press (seconds)
 KEY_PRESS_DURATION = 0.05
 
+# Turn pre-buffering: press the next turn of the agent's planned path (search agent)
+# shortly before Pac-Man reaches the junction, from a timing thread of its own
+TURN_BUFFER_ENABLED = True
+TURN_PRESS_LEAD = 0.10      # Press this long before the predicted arrival (s); cover input + capture latency
+TURN_HOLD_AFTER = 0.05      # ...and keep holding this long after it (s)
+TURN_PLAN_HORIZON = 1.0     # Only schedule turns this close (s)
+
+# Change gating: the agent, key presses, logging and the debug overlay only run when
+# their inputs (Pac-Man/ghost cells, pellets, map, action) changed since they last ran
+CHANGE_GATING_ENABLED = True
+# ...but at least every this many frames (re-press keys the game may have missed)
+CHANGE_REFRESH_FRAMES = 15
+# An action was issued but Pac-Man has not left its cell for this long (e.g. it ran
+# into a wall): the agent is asked again without waiting for the refresh
+AGENT_STALL_SECONDS = 0.25
+
 # --- Vision Settings ---
 # Path to template images
 TEMPLATE_DIR = 'assets/templates'
@@ -29,6 +58,38 @@ TEMPLATE_DIR = 'assets/templates'
 # Thresholds for template matching
 MATCH_THRESHOLD = 0.8
 
+# 'full': vision works on the captured pixels. 'tile': the maze area is resampled once per
+# frame to TILE_PIXELS x TILE_PIXELS pixels per grid cell and detection / maze mapping run on that
+VISION_MODE = 'full'
+TILE_PIXELS = 8
+# Lowered template match thresholds in tile mode (more recall on small sprites, less precision)
+TILE_MATCH_RELAX = 0.0
+
+# Sprite detector: 'template' (template matching) or 'background' (subtract the clean map,
+# connected components, classify each blob by colour; see vision/sprite_localizer.py)
+DETECTOR = 'template'
+SPRITE_DIFF_THRESHOLD = 40     # Channel difference to the clean map that marks a sprite pixel
+SPRITE_MIN_AREA = 0.2          # Smallest blob, in grid cells
+SPRITE_COLOR_TOLERANCE = 100.0 # Max distance of a blob's (brightness-normalised) colour to a reference colour
+SPRITE_PYRAMID_LEVEL = 1       # Full mode: ROI pyramid level (FrameContext.pyramid) the difference is taken on
+
+# Learned per-cell classifier (tools/train_cell_classifier.py) used instead of the
+# color rules when mapping the maze. None = color rules. Trained on rendered maps plus
+# 'sim' or 'verified' golden corpora; record logged sessions with tools/record_golden.py
+# --source and verify them (tools/label_golden.py) to train and compare on real captures.
+CELL_CLASSIFIER_WEIGHTS = None
+
+# Labelled frames + committed baseline for tools/vision_regression.py (recorded with tools/record_golden.py)
+# The committed corpora are synthetic: simulator frames (capture/sim_game.py) with exact labels and
+# flat sprites. It catches regressions in the vision stack; it does not measure accuracy on the real game.
+# For that, record a session (tools/record_golden.py --source logs/<session>), correct and verify its
+# labels (tools/label_golden.py) and add the corpus to GOLDEN_DIRS.
+GOLDEN_DIR = 'assets/golden'
+# Corpora tools/vision_regression.py checks by default, each against its own baseline and with the
+# detector / vision mode recorded in it: 8 px cells in full mode, and 24 px cells in tile mode
+# (where the tile image is really downsampled, so tile-mode regressions show up)
+GOLDEN_DIRS = [GOLDEN_DIR, 'assets/golden_cell24']
+
 # --- Debugging ---
 DEBUG_MODE = True
 SHOW_CV_WINDOW = True  # Show the computer vision view window
@@ -45,17 +106,87 @@ GRID_SIZE = (28, 31)
 # Useful if the capture includes borders or headers
 GRID_PADDING = {'top': 77, 'bottom': 142, 'left': 20, 'right': 12}
 
+# --- Agent Settings ---
+# Which policy drives Pac-Man: 'simple' (heuristic), 'search' (expectimax lookahead)
+# or 'mcts' (root-parallel Monte Carlo tree search across worker processes)
+AGENT_TYPE = 'simple'
+# Hard time budget per decision for the search agent (seconds)
+SEARCH_TIME_BUDGET = 0.010
+# Maximum lookahead depth (plies) for iterative deepening
+SEARCH_MAX_DEPTH = 12
+# Max transposition table entries kept between frames
+SEARCH_TABLE_SIZE = 200000
+# Worker processes for the MCTS agent (None = one per core minus the main loop, 0 = in-process)
+MCTS_WORKERS = None
+# Time budget per decision for the MCTS agent (seconds)
+MCTS_TIME_BUDGET = 0.025
+# Memoize decisions by quantized situation (max entries, 0 = disabled).
+# Only wraps the planners ('search', 'mcts'), never the stateful simple agent.
+DECISION_CACHE_SIZE = 0
+# Radius (cells) of the pellet window around Pac-Man that is part of the cache key
+DECISION_CACHE_RADIUS = 3
+# A cached decision expires after this many more pellets were eaten (anywhere on the board)
+DECISION_CACHE_PELLET_SLACK = 10
+# Simple agent: follow a pellet tour (order of corridor pellet clusters) instead of a random walk
+PELLET_TOUR_ENABLED = True
+# Time budget per frame for repairing / improving the pellet tour (seconds)
+PELLET_TOUR_BUDGET = 0.003
+
+# --- Map Cache ---
+# Reuse the mapped maze across restarts when the capture setup and maze are unchanged
+MAP_CACHE_ENABLED = True
+MAP_CACHE_DIR = 'logs/map_cache'
+# Max mean thumbnail difference (0-255) for a live frame to match the cached map
+MAP_CACHE_TOLERANCE = 4.0
+
+# --- Level Monitor ---
+# Watch for a pellet refill (level cleared / game reset) or a different maze and remap in the background
+LEVEL_MONITOR_ENABLED = True
+# Consecutive frames a change must be seen before remapping
+LEVEL_CONFIRM_FRAMES = 3
+# Frames collected (every other frame) for the median of the new clean map
+LEVEL_REMAP_FRAMES = 20
+# Mean per-cell color difference (0-255) on wall cells that means the maze itself changed
+LEVEL_MAZE_TOLERANCE = 25.0
+
+# --- Multi-instance supervisor (supervisor.py) ---
+# One worker process (capture -> vision -> agent -> control) per entry. Keys:
+#   name        label used in the health report
+#   region      capture region, like CAPTURE_REGION
+#   source      'screen', or a recorded session / image folder to replay
+#   controller  'keyboard' (focused window, only safe for one instance),
+#               'xdotool' (keys go to `window`, an X11 window id or name) or 'null'
+#   cpu         core to pin the worker to (default: instance index modulo core count)
+#   agent       optional per-instance AGENT_TYPE override
+INSTANCES = [
+    {'name': 'main', 'region': CAPTURE_REGION, 'source': 'screen', 'controller': 'keyboard'},
+]
+# Restarts per worker before giving up (None = keep restarting)
+SUPERVISOR_MAX_RESTARTS = None
+# A worker that has not reported for this many seconds is considered hung and restarted
+SUPERVISOR_HEALTH_TIMEOUT = 15.0
+# Seconds between health reports (workers) and aggregated summaries (supervisor)
+SUPERVISOR_REPORT_INTERVAL = 2.0
+
 LOG_LEVEL = 'INFO'
 ENABLE_LOGGING = False # Set to True to collect training data
 
 # --- Google AI ---
 # API Key for Gemini (Load from environment variable)
+# Resolved on first access (see __getattr__ below) so that importing config
+# stays cheap for tools that only need a few constants.
 import os
-from dotenv import load_dotenv
-
-load_dotenv() # Load variables from .env file if present
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
+# Asynchronous Gemini strategist (runs off the control loop)
+ENABLE_STRATEGIST = False
+# Minimum seconds between two requests actually sent to the model
+STRATEGIST_MIN_INTERVAL = 5.0
+# How often the main loop offers the current frame/state to the strategist (seconds)
+STRATEGIST_SUBMIT_INTERVAL = 1.0
+# Set to an HTTP endpoint (e.g. tools/strategist_stub_server.py) to bypass Gemini
+STRATEGIST_URL = None
+# Gemini model the strategist asks (google-generativeai)
+GEMINI_MODEL = 'gemini-1.5-flash'
 
 # Areas to ignore detections in (relative to game region)
 # format: (x, y, w, h)
@@ -71,6 +202,9 @@ GAME_COLORS = {
         (0, 112, 101)   # #657000 (R=101, G=112, B=0 -> BGR=0, 112, 101)
     ],
     'PATH': (0, 0, 0),
+    'PACMAN': [
+        (0, 255, 255)   # #ffff00 (Yellow)
+    ],
     'GHOSTS': [
         (44, 210, 255), # #ffd22c (Cyan/Gold?) -> BGR
         (204, 123, 255),# #ff7bcc
@@ -85,3 +219,14 @@ GAME_COLORS = {
         (143, 170, 255)  # #FFAA8F -> BGR
     ]
 }
+
+
+def __getattr__(name):
+    """Lazily resolved settings (PEP 562): only pay for python-dotenv when a secret is used."""
+    if name == 'GOOGLE_API_KEY':
+        from dotenv import load_dotenv
+        load_dotenv() # Load variables from .env file if present
+        value = os.getenv("GOOGLE_API_KEY", "")
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
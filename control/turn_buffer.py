@@ -0,0 +1,202 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import config
+from vision.maze_graph import OPPOSITE, step_direction
+
+Cell = Tuple[int, int]
+
+
+class SpeedTracker:
+    """
+    Pac-Man's speed (cells/s) and heading from the tracked grid position.
+
+    The grid position changes when the sprite center crosses a cell border, so
+    the time of each change is the moment Pac-Man entered the cell, half a cell
+    before its center. Speed is an EMA over consecutive one-cell moves.
+    """
+
+    def __init__(self, default_speed: float = 8.0, smoothing: float = 0.3, max_gap: float = 0.5):
+        self.speed = default_speed
+        self.smoothing = smoothing
+        self.max_gap = max_gap          # Longer than this between cells = Pac-Man was stopped
+        self.cell: Optional[Cell] = None
+        self.entered_at = 0.0
+        self.direction: Optional[str] = None
+        self.samples = 0
+
+    def observe(self, cell: Optional[Cell], t: float) -> Optional[Tuple[Cell, Cell]]:
+        """Feed the tracked cell at time `t`. Returns (from, to) when Pac-Man changed cell."""
+        if cell is None or cell == self.cell:
+            return None
+        prev, prev_t = self.cell, self.entered_at
+        self.cell, self.entered_at = cell, t
+        if prev is None:
+            return None
+        direction = step_direction(prev, cell)
+        if direction is None:
+            # Jumped (detection glitch or death): no speed or heading information
+            self.direction = None
+            return prev, cell
+        gap = t - prev_t
+        if direction == self.direction and 0 < gap < self.max_gap:
+            self.speed += self.smoothing * (1.0 / gap - self.speed)
+            self.samples += 1
+        self.direction = direction
+        return prev, cell
+
+    def arrival(self, steps: int) -> float:
+        """Predicted time Pac-Man reaches the center of the cell `steps` cells ahead along its path."""
+        return self.entered_at + (steps + 0.5) / self.speed
+
+
+class TurnBuffer:
+    """
+    Actuation layer that presses turn keys shortly before Pac-Man reaches the junction.
+
+    The frame loop passes the agent's short planned path (cells, starting at the
+    current one) to `plan()` every frame. The next turn on the path is scheduled
+    `lead` seconds before the predicted arrival at its cell and held until `hold_after`
+    seconds past it, so the key is already down when Pac-Man gets there instead of
+    depending on where the frame loop happens to be. Presses run on a timing thread
+    of their own; replanning replaces the pending press.
+
+    Observed turns are counted as pre-buffered (a scheduled press for that junction
+    and direction fired before Pac-Man turned) or reactive (the turn came from the
+    frame loop's own key presses). Scheduled presses after which Pac-Man went
+    straight on count as missed.
+
+    Same interface as KeyboardController (press_key / execute_action / emergency_stop),
+    so it can stand in for the controller it wraps.
+    """
+
+    def __init__(self, controller, lead: float = None, hold_after: float = None, horizon: float = None,
+                 tracker: SpeedTracker = None):
+        self.controller = controller
+        self.lead = lead if lead is not None else getattr(config, 'TURN_PRESS_LEAD', 0.10)
+        self.hold_after = hold_after if hold_after is not None else getattr(config, 'TURN_HOLD_AFTER', 0.05)
+        self.horizon = horizon if horizon is not None else getattr(config, 'TURN_PLAN_HORIZON', 1.0)
+        self.tracker = tracker or SpeedTracker()
+
+        self.stats = {'prebuffered': 0, 'reactive': 0, 'missed': 0, 'scheduled': 0, 'fired': 0}
+        self._queue: List[Tuple[float, int, str, Cell, float]] = []  # (fire time, seq, action, junction, hold)
+        self._seq = 0
+        self._scheduled: Optional[Tuple[Cell, str]] = None
+        self._fired: Dict[Cell, Tuple[str, float]] = {}  # junction -> (action, fire time)
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="turn-buffer", daemon=True)
+        self._thread.start()
+
+    # --- Frame loop side ---
+
+    def plan(self, path: Optional[List[Cell]], pacman_pos: Optional[Cell], t: float = None):
+        """
+        Update with this frame's tracked position and the agent's planned path.
+        `t` is when the frame was captured (perf_counter); defaults to now.
+        """
+        t = t if t is not None else time.perf_counter()
+        heading = self.tracker.direction
+        moved = self.tracker.observe(tuple(pacman_pos) if pacman_pos else None, t)
+        if moved is not None:
+            self._account(moved[0], heading, self.tracker.direction)
+
+        turn = self._next_turn(path, pacman_pos)
+        with self._cond:
+            if turn is None:
+                self._cancel()
+                return
+            steps, junction, action = turn
+            fired = self._fired.get(junction)
+            if fired is not None and fired[0] == action:
+                return  # Already pressed for this junction
+            fire_at = self.tracker.arrival(steps) - self.lead
+            if fire_at - t > self.horizon:
+                self._cancel()
+                return
+            entry = (fire_at, self._seq, action, junction, self.lead + self.hold_after)
+            if self._scheduled == (junction, action) and self._queue:
+                # Same turn: only refresh its timing from the latest speed estimate
+                self._queue[0] = entry
+            else:
+                self._cancel()
+                self._seq += 1
+                entry = (fire_at, self._seq) + entry[2:]
+                heapq.heappush(self._queue, entry)
+                self._scheduled = (junction, action)
+                self.stats['scheduled'] += 1
+            self._cond.notify()
+
+    def _next_turn(self, path: Optional[List[Cell]], pacman_pos: Optional[Cell]) -> Optional[Tuple[int, Cell, str]]:
+        """First direction change along the path as (steps from Pac-Man, junction cell, new direction)."""
+        if not path or not pacman_pos or len(path) < 2 or tuple(path[0]) != tuple(pacman_pos):
+            return None
+        heading = self.tracker.direction
+        for i in range(len(path) - 1):
+            direction = step_direction(tuple(path[i]), tuple(path[i + 1]))
+            if direction is None:
+                return None
+            if heading is not None and direction != heading:
+                if direction == OPPOSITE[heading]:
+                    return None  # Reversals are instant; the frame loop handles them
+                return i, tuple(path[i]), direction
+            heading = direction
+        return None
+
+    def _cancel(self):
+        self._queue.clear()
+        self._scheduled = None
+
+    def _account(self, junction: Cell, before: Optional[str], after: Optional[str]):
+        """Classify the move out of `junction`: a turn (pre-buffered or reactive), or going past a planned one."""
+        now = time.perf_counter()
+        with self._cond:
+            fired = self._fired.pop(junction, None)
+            for cell in [c for c, (_, t) in self._fired.items() if now - t > 2.0]:
+                del self._fired[cell]
+        turned = before is not None and after is not None and after not in (before, OPPOSITE[before])
+        if fired is not None and fired[0] == after:
+            self.stats['prebuffered'] += 1
+        elif turned:
+            self.stats['reactive'] += 1
+        if fired is not None and fired[0] != after:
+            self.stats['missed'] += 1
+
+    # --- Timing thread ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                fire_at, _, action, junction, hold = self._queue[0]
+                delay = fire_at - time.perf_counter()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue  # Re-check: the plan may have changed while waiting
+                heapq.heappop(self._queue)
+                self._fired[junction] = (action, time.perf_counter())
+                self.stats['fired'] += 1
+            self.controller.press_key(action, hold)
+
+    # --- Controller interface ---
+
+    def press_key(self, key_name: str, duration: float = 0.05):
+        self.controller.press_key(key_name, duration)
+
+    def execute_action(self, action: str):
+        self.controller.execute_action(action)
+
+    def emergency_stop(self):
+        self.close()
+        self.controller.emergency_stop()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,98 @@
+import subprocess
+import time
+from collections import Counter
+from typing import Optional
+
+# xdotool key names for the agent's actions
+XDOTOOL_KEYS = {
+    'UP': 'Up',
+    'DOWN': 'Down',
+    'LEFT': 'Left',
+    'RIGHT': 'Right',
+    'ESC': 'Escape'
+}
+
+
+class XdotoolController:
+    """
+    Sends key events to one specific X11 window with xdotool, instead of to
+    whatever window has focus (pynput). Several agents can then drive several
+    game windows on the same desktop without their keystrokes mixing.
+    Same interface as KeyboardController.
+    """
+
+    def __init__(self, window: str):
+        """
+        Args:
+            window: X11 window id (decimal or hex) or a window name to search for.
+        """
+        self.window = self._resolve(str(window))
+        self.enabled = self.window is not None
+
+    @staticmethod
+    def _resolve(window: str) -> Optional[str]:
+        if window.isdigit() or window.lower().startswith('0x'):
+            return window
+        try:
+            out = subprocess.run(["xdotool", "search", "--name", window], check=True,
+                                 capture_output=True, text=True).stdout.split()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: could not find window '{window}' with xdotool: {e}")
+            return None
+        if not out:
+            print(f"Warning: no window named '{window}'.")
+            return None
+        if len(out) > 1:
+            print(f"Warning: {len(out)} windows named '{window}', using the first one.")
+        return out[0]
+
+    def press_key(self, key_name: str, duration: float = 0.05):
+        """
+        Simulate a key press on the target window.
+        """
+        if not self.enabled:
+            return
+        if key_name not in XDOTOOL_KEYS:
+            print(f"Warning: Key {key_name} not in key map.")
+            return
+
+        key = XDOTOOL_KEYS[key_name]
+        try:
+            subprocess.run(["xdotool", "keydown", "--window", self.window, key], check=True)
+            time.sleep(duration)
+            subprocess.run(["xdotool", "keyup", "--window", self.window, key], check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error pressing key on window {self.window}: {e}")
+
+    def execute_action(self, action: str):
+        """
+        Execute the action decided by the agent.
+        Wrapper around press_key.
+        """
+        if action and action != 'STOP':
+            self.press_key(action)
+
+    def emergency_stop(self):
+        pass
+
+
+class NullController:
+    """
+    Controller that sends nothing and only records the actions it was given.
+    Used for replay/simulated sources and for benchmarks.
+    """
+
+    def __init__(self):
+        self.actions = Counter()
+        self.last_action = None
+
+    def press_key(self, key_name: str, duration: float = 0.05):
+        self.actions[key_name] += 1
+        self.last_action = key_name
+
+    def execute_action(self, action: str):
+        if action and action != 'STOP':
+            self.press_key(action)
+
+    def emergency_stop(self):
+        pass
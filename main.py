@@ -9,81 +9,323 @@ Architecture:
 5. Loop: Repeat at target FPS.
 """
 
+import os
 import time
-import cv2
-import numpy as np
 import config
-from capture.screen_capture import ScreenCapturer
-from control.keyboard_controller import KeyboardController
-from vision.object_detection_cv import ObjectDetectorCV
-from vision.state_estimator import StateEstimator
-from agent.policy_simple import SimplePolicyAgent
-from utils.data_logger import DataLogger
+
+# Heavy modules (cv2, numpy, mss, pynput, the vision stack and the agents) are
+# imported inside main() so that `import main` and --help style use stay instant.
+
+def create_agent(agent_type: str = None):
+    """
+    Build the configured policy ('simple', 'search' or 'mcts'). The planners are
+    wrapped in the decision cache when it is enabled; the simple agent keeps its
+    own corridor and tour state and is never cached. Also used by supervisor.py workers.
+    """
+    agent_type = agent_type or getattr(config, 'AGENT_TYPE', 'simple')
+    if agent_type == 'search':
+        from agent.policy_search import SearchPolicyAgent
+        agent = SearchPolicyAgent()
+    elif agent_type == 'mcts':
+        from agent.policy_mcts import ParallelMCTSAgent
+        agent = ParallelMCTSAgent()
+    else:
+        from agent.policy_simple import SimplePolicyAgent
+        agent = SimplePolicyAgent()
+    if agent_type in ('search', 'mcts') and getattr(config, 'DECISION_CACHE_SIZE', 0) > 0:
+        from agent.decision_cache import CachedAgent
+        agent = CachedAgent(agent)
+    return agent
+
+def draw_maze_overlay(shape, game_state):
+    """
+    Debug overlay of the grid (lines, walls, pellets, Pac-Man's cell) as a layer the
+    size of the frame plus the mask of drawn pixels, or None without a Pac-Man position.
+    """
+    import cv2
+    import numpy as np
+    if not game_state['pacman_pos']:
+        return None
+    gx, gy = game_state['pacman_pos']
+    frame = np.zeros(shape, dtype=np.uint8)
+    
+    # Draw local grid for verification
+    # Draw a small circle on the center of the current grid cell
+    h, w = frame.shape[:2]
+    gw, gh = config.GRID_SIZE
+    pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+    
+    eff_w = w - pad['left'] - pad['right']
+    eff_h = h - pad['top'] - pad['bottom']
+    
+    if eff_w <= 0 or eff_h <= 0:
+        return None
+    cell_w = eff_w / gw
+    cell_h = eff_h / gh
+    
+    cx = int(pad['left'] + (gx + 0.5) * cell_w)
+    cy = int(pad['top'] + (gy + 0.5) * cell_h)
+    cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
+    
+    # Draw walls (ALL of them for debug)
+    grid = game_state['grid']
+    
+    # Draw Grid Lines for alignment check
+    for c in range(gw + 1): # Vertical lines
+        x = int(pad['left'] + c * cell_w)
+        cv2.line(frame, (x, pad['top']), (x, h - pad['bottom']), (50, 50, 50), 1)
+    for r in range(gh + 1): # Horizontal lines
+        y = int(pad['top'] + r * cell_h)
+        cv2.line(frame, (pad['left'], y), (w - pad['right'], y), (50, 50, 50), 1)
+
+    for r in range(gh):
+        for c in range(gw):
+            if grid[r, c] == 1:
+                wx = int(pad['left'] + c * cell_w)
+                wy = int(pad['top'] + r * cell_h)
+                cv2.rectangle(frame, (wx, wy), (int(wx+cell_w), int(wy+cell_h)), (0, 0, 100), 1)
+            elif grid[r, c] == 2: # Pellet
+                cx = int(pad['left'] + (c + 0.5) * cell_w)
+                cy = int(pad['top'] + (r + 0.5) * cell_h)
+                # Draw larger Green circle for visibility
+                cv2.circle(frame, (cx, cy), 4, (0, 255, 0), -1)
+    return frame, frame.any(axis=2)
+
+class AgentLoop:
+    """
+    The per-frame pipeline, shared by main() and the supervisor.py workers.
+
+    `step(frame)` runs one frame: preprocessing, the activity and level
+    monitors, detection, state estimation, the strategist, then the agent,
+    control and logging stages. The stages after vision are gated by a
+    ChangeTracker (stages 'agent', 'control', 'logger' and 'overlay'; the
+    caller draws the overlay). Besides the state, the agent is due when an
+    action was issued but Pac-Man stayed in its cell for AGENT_STALL_SECONDS
+    (the 'stall' input), so a move into a wall is corrected quickly even at
+    IDLE_FPS or with a long CHANGE_REFRESH_FRAMES. Optional parts follow the config and are None
+    when disabled: turn_buffer (wraps the controller), strategist, level_monitor,
+    activity and logger. Capture, drawing, windows and pacing (`scheduler`) stay
+    with the caller; `close()` shuts the parts down.
+    """
+
+    def __init__(self, estimator, detector, controller, agent, fps: float = None, logger=None, map_cache=None):
+        from vision.frame_context import FramePreprocessor
+        from utils.scheduler import FrameScheduler
+        from utils.change_tracker import ChangeTracker, STATE_FIELDS
+        from utils.activity import ActivityMonitor
+
+        self.estimator = estimator
+        self.detector = detector
+        self.agent = agent
+        self.fps = fps
+        # Shared per-frame preprocessing (ROI, gray, HSV, palette, pyramid, tile image) with reused buffers
+        self.preprocessor = FramePreprocessor()
+
+        self.turn_buffer = None
+        if getattr(config, 'TURN_BUFFER_ENABLED', True):
+            from control.turn_buffer import TurnBuffer
+            controller = self.turn_buffer = TurnBuffer(controller)
+        self.controller = controller
+        self.logger = logger
+
+        self.strategist = None
+        if getattr(config, 'ENABLE_STRATEGIST', False):
+            from ai_google.strategist import StrategistService, HttpTransport
+            url = getattr(config, 'STRATEGIST_URL', None)
+            self.strategist = StrategistService(transport=HttpTransport(url) if url else None)
+            self.strategist.start()
+        self._last_strategist_submit = 0.0
+
+        # Remap automatically when the level is cleared, the game resets or the maze changes
+        self.level_monitor = None
+        if getattr(config, 'LEVEL_MONITOR_ENABLED', True) and estimator.clean_map is not None:
+            from vision.level_monitor import LevelMonitor
+            self.level_monitor = LevelMonitor(estimator, on_remap=map_cache.save if map_cache else None)
+
+        # Paces the loop on absolute frame deadlines and counts misses and jitter
+        self.scheduler = FrameScheduler(fps,
+                                        policy=getattr(config, 'LOOP_MISS_POLICY', 'skip'),
+                                        spin=getattr(config, 'LOOP_SPIN_SECONDS', 0.001))
+        # Stages after vision only run when their inputs changed (or every CHANGE_REFRESH_FRAMES frames)
+        self.changes = ChangeTracker(enabled=getattr(config, 'CHANGE_GATING_ENABLED', True))
+        self.changes.stage('agent', STATE_FIELDS + ('advice', 'stall'))
+        self.changes.stage('control', ('action', 'pacman'))
+        self.changes.stage('logger', ('action', 'pacman', 'ghosts', 'pellets'))
+        self.changes.stage('overlay', ('pacman', 'pellets', 'map'))
+        # Runs the loop at IDLE_FPS while nothing moves on screen (pause, menus)
+        self.activity = ActivityMonitor() if fps and getattr(config, 'ACTIVITY_MONITOR_ENABLED', True) else None
+
+        self.action = None
+        self.game_state = None
+        self.detections = None
+        self.frames = 0
+
+        # Stall detection: Pac-Man's cell, since when it has been there, stalls seen so far
+        self.stall_seconds = getattr(config, 'AGENT_STALL_SECONDS', 0.25)
+        self._stall_cell = None
+        self._stall_since = 0.0
+        self.stalls = 0
+
+    def step(self, frame, now: float = None):
+        """Run one captured frame through the pipeline. Returns the frame's game state."""
+        now = now if now is not None else time.perf_counter()
+        self.frames += 1
+        changes = self.changes
+
+        # --- Vision (Detection & State) ---
+        ctx = self.preprocessor.begin(frame)
+        if self.activity is not None:
+            self.activity.observe(frame, ctx)
+            self.scheduler.set_fps(self.activity.frame_rate(self.fps))
+        if self.level_monitor:
+            self.level_monitor.observe(frame, ctx)
+        self.detections = self.detector.detect_objects(frame, ctx)
+        game_state = self.game_state = self.estimator.update(self.detections, frame, ctx)
+
+        # Strategist: offer the frame now and then, pick up whatever advice is ready
+        strategist = self.strategist
+        if strategist is not None:
+            if now - self._last_strategist_submit >= config.STRATEGIST_SUBMIT_INTERVAL:
+                strategist.submit(frame, game_state)
+                self._last_strategist_submit = now
+            game_state['advice'] = strategist.latest_advice
+
+        # Diff against the previous frame (the state's own `version` only moves when the board changed)
+        changes.update(game_state)
+        if strategist is not None:
+            changes.note('advice', game_state['advice'])
+        changes.note('stall', self._check_stall(game_state['pacman_pos'], now))
+
+        # --- Agent (Decision) ---
+        if changes.should_run('agent'):
+            with changes.timed('agent'):
+                self.action = self.agent.decide_action(game_state)
+                if self.turn_buffer is not None:
+                    # Pre-press the next turn of the planned path ahead of the junction
+                    self.turn_buffer.plan(getattr(self.agent, 'last_path', None), game_state['pacman_pos'], now)
+        changes.note('action', self.action)
+
+        # --- Control (Action) ---
+        if changes.should_run('control'):
+            with changes.timed('control'):
+                self.controller.execute_action(self.action)
+                if self.action and self.action != 'STOP':
+                    # Hold the key as well, so a turn is still pressed when Pac-Man reaches the junction
+                    self.controller.press_key(self.action, duration=config.KEY_PRESS_DURATION)
+
+        # --- Logging ---
+        if self.logger is not None and config.ENABLE_LOGGING and changes.should_run('logger'):
+            with changes.timed('logger'):
+                # Check for interesting events (e.g., ghost detected)
+                metadata = {"interesting": len(self.detections.get('ghosts', [])) > 0}
+                self.logger.log_step(frame, game_state, self.action, metadata)
+        return game_state
+
+    def _check_stall(self, pos, now: float) -> int:
+        """Count of stalls: an action is out but Pac-Man has not left its cell for stall_seconds."""
+        if pos != self._stall_cell:
+            self._stall_cell, self._stall_since = pos, now
+        elif pos is not None and self.action and now - self._stall_since >= self.stall_seconds:
+            self.stalls += 1
+            self._stall_since = now  # Ask again every stall_seconds while it stays stuck
+        return self.stalls
+
+    def close(self, summary: bool = True):
+        """Stop the background parts (turn buffer, agent workers, strategist); print the loop stats."""
+        if summary:
+            self.scheduler.print_summary()
+            self.changes.print_summary()
+            if self.activity is not None:
+                self.activity.print_summary()
+        if self.turn_buffer is not None:
+            self.turn_buffer.close()
+            if summary:
+                stats = self.turn_buffer.stats
+                print(f"Turns: {stats['prebuffered']} pre-buffered, {stats['reactive']} reactive, {stats['missed']} missed")
+        if hasattr(self.agent, 'close'):
+            self.agent.close()
+        if self.strategist is not None:
+            self.strategist.stop()
 
 def main():
+    import cv2
+    import numpy as np
+    from capture.screen_capture import ScreenCapturer
+    from control.keyboard_controller import KeyboardController
+    from vision.object_detection_cv import create_detector
+    from vision.state_estimator import StateEstimator
+    from vision.map_cache import MapCache
+    from agent.decision_cache import CachedAgent
+    from utils.data_logger import DataLogger
+
     print("Initializing Pac-Man AI Agent...")
     
     # Initialize modules
     capturer = ScreenCapturer(region=config.CAPTURE_REGION)
-    detector = ObjectDetectorCV(template_dir=config.TEMPLATE_DIR)
     estimator = StateEstimator()
-    controller = KeyboardController()
-    agent = SimplePolicyAgent()
-    logger = DataLogger()
+    # Template matching or clean-map subtraction (config.DETECTOR)
+    detector = create_detector(estimator)
+    # Templates load in the background while we map the maze
+    detector.preload_async()
     
     # --- Mapping Phase ---
     print("--- MAPPING PHASE ---")
-    print("Please ensure the game is visible and running.")
-    print("Do NOT move the window.")
-    time.sleep(1) # Give user a sec
     
-    from vision.map_extractor import MapExtractor
-    map_extractor = MapExtractor()
-    map_extractor.capture_frames(capturer, duration=3.0)
-    clean_map = map_extractor.extract_clean_map()
+    # Warm start: reuse the last run's map if the live maze still looks the same
+    map_cache = MapCache() if getattr(config, 'MAP_CACHE_ENABLED', True) else None
+    first_frame = capturer.capture()
+    cached_map = map_cache.load(first_frame) if map_cache else None
     
-    if clean_map is not None:
-        print("Map extracted successfully!")
-        estimator.initialize_from_map(clean_map)
-        # Save it for debug
-        import cv2
-        cv2.imwrite("logs/clean_map_debug.png", clean_map)
+    if cached_map is not None:
+        estimator.initialize_from_cache(cached_map['clean_map'], cached_map['walls'], first_frame)
     else:
-        print("WARNING: Map extraction failed. Using dynamic updates.")
+        print("Please ensure the game is visible and running.")
+        print("Do NOT move the window.")
+        time.sleep(1) # Give user a sec
+        
+        from vision.map_extractor import MapExtractor
+        map_extractor = MapExtractor()
+        map_extractor.capture_frames(capturer, duration=3.0)
+        clean_map = map_extractor.extract_clean_map()
+        
+        if clean_map is not None:
+            print("Map extracted successfully!")
+            estimator.initialize_from_map(clean_map)
+            if map_cache:
+                map_cache.save(clean_map, estimator.maze)
+            # Save it for debug
+            os.makedirs("logs", exist_ok=True)
+            cv2.imwrite("logs/clean_map_debug.png", clean_map)
+        else:
+            print("WARNING: Map extraction failed. Using dynamic updates.")
+
+    # Vision -> strategist -> agent -> control -> logging, one frame per step()
+    loop = AgentLoop(estimator, detector, KeyboardController(), create_agent(),
+                     fps=config.TARGET_FPS, logger=DataLogger(), map_cache=map_cache)
+    agent = loop.agent
+    scheduler = loop.scheduler
 
     print(f"Starting Pac-Man AI Agent... (Target FPS: {config.TARGET_FPS})")
     print("Press 'q' to quit. Press 's' to save a snapshot.")
 
-    frame_duration = 1.0 / config.TARGET_FPS
-    last_time = time.time()
+    maze_overlay = None
     
     try:
         while True:
-            loop_start = time.time()
+            loop_start = time.perf_counter()
             
             # --- 1. Capture ---
             frame = capturer.capture()
             if frame is None:
                 print("Failed to capture frame.")
                 time.sleep(0.1)
+                scheduler.reset()
                 continue
 
-            # --- 2. Vision (Detection & State) ---
-            # TODO: In the future, we might skip detection on some frames for performance
-            detections = detector.detect_objects(frame)
-            game_state = estimator.update(detections, frame)
-            
-            # --- 3. Agent (Decision) ---
-            action = agent.decide_action(game_state)
-            
-            # --- 4. Control (Action) ---
-            controller.execute_action(action)
-            
-            # --- 5. Logging ---
-            if config.ENABLE_LOGGING:
-                # Check for interesting events (e.g., ghost detected)
-                metadata = {"interesting": len(detections.get('ghosts', [])) > 0}
-                logger.log_step(frame, game_state, action, metadata)
+            # --- 2-5. Vision, agent, control and logging ---
+            game_state = loop.step(frame, loop_start)
+            detections = loop.detections
+            action = loop.action
 
             if config.DEBUG_MODE:
                 # Draw detections
@@ -95,46 +337,13 @@ def main():
                     gx, gy = game_state['pacman_pos']
                     cv2.putText(frame, f"Grid: ({gx}, {gy})", (10, 60), 
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    
-                    # Draw local grid for verification
-                    # Draw a small circle on the center of the current grid cell
-                    h, w = frame.shape[:2]
-                    gw, gh = config.GRID_SIZE
-                    pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
-                    
-                    eff_w = w - pad['left'] - pad['right']
-                    eff_h = h - pad['top'] - pad['bottom']
-                    
-                    if eff_w > 0 and eff_h > 0:
-                        cell_w = eff_w / gw
-                        cell_h = eff_h / gh
-                        
-                        cx = int(pad['left'] + (gx + 0.5) * cell_w)
-                        cy = int(pad['top'] + (gy + 0.5) * cell_h)
-                        cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
-                        
-                        # Draw walls (ALL of them for debug)
-                        grid = game_state['grid']
-                        
-                        # Draw Grid Lines for alignment check
-                        for c in range(gw + 1): # Vertical lines
-                            x = int(pad['left'] + c * cell_w)
-                            cv2.line(frame, (x, pad['top']), (x, h - pad['bottom']), (50, 50, 50), 1)
-                        for r in range(gh + 1): # Horizontal lines
-                            y = int(pad['top'] + r * cell_h)
-                            cv2.line(frame, (pad['left'], y), (w - pad['right'], y), (50, 50, 50), 1)
-
-                        for r in range(gh):
-                            for c in range(gw):
-                                if grid[r, c] == 1:
-                                    wx = int(pad['left'] + c * cell_w)
-                                    wy = int(pad['top'] + r * cell_h)
-                                    cv2.rectangle(frame, (wx, wy), (int(wx+cell_w), int(wy+cell_h)), (0, 0, 100), 1)
-                                elif grid[r, c] == 2: # Pellet
-                                    cx = int(pad['left'] + (c + 0.5) * cell_w)
-                                    cy = int(pad['top'] + (r + 0.5) * cell_h)
-                                    # Draw larger Green circle for visibility
-                                    cv2.circle(frame, (cx, cy), 4, (0, 255, 0), -1)
+
+                # Maze grid, walls and pellets: redrawn only when Pac-Man's cell, the pellets or the map changed
+                if loop.changes.should_run('overlay') or (maze_overlay is not None and maze_overlay[0].shape != frame.shape):
+                    with loop.changes.timed('overlay'):
+                        maze_overlay = draw_maze_overlay(frame.shape, game_state)
+                if maze_overlay is not None:
+                    np.copyto(frame, maze_overlay[0], where=maze_overlay[1][..., None])
                 
                 for (x, y, w, h) in detections['ghosts']:
                     cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
@@ -149,14 +358,33 @@ def main():
                     f"Pellets: {remaining}/{total}",
                     f"Eaten: {eaten}"
                 ]
+                # Search agents report how much they managed to look ahead this frame
+                stats = getattr(agent, 'last_stats', None)
+                if stats and 'depth' in stats:
+                    hud_text.append(f"Search: d{stats['depth']} {stats['nodes']} nodes")
+                elif stats and 'rollouts' in stats:
+                    hud_text.append(f"MCTS: {stats['rollouts']} rollouts, IPC {stats['ipc_ms']:.1f}ms")
+                level_monitor = loop.level_monitor
+                if level_monitor and level_monitor.state != level_monitor.WATCHING:
+                    hud_text.append(f"Remapping ({level_monitor.last_event})...")
+                if loop.strategist is not None and loop.strategist.latest_advice:
+                    hud_text.append(f"Coach: {loop.strategist.latest_advice.text[:40]}")
+                if isinstance(agent, CachedAgent):
+                    hud_text.append(f"Cache hits: {agent.stats['hit_rate'] * 100:.0f}%")
+                turn_buffer = loop.turn_buffer
+                if turn_buffer is not None and turn_buffer.stats['fired']:
+                    hud_text.append(f"Turns: {turn_buffer.stats['prebuffered']} pre-buffered, "
+                                    f"{turn_buffer.stats['reactive']} reactive")
+                if loop.activity is not None and loop.activity.mode == loop.activity.IDLE:
+                    hud_text.append(f"Idle: {loop.activity.idle_fps} FPS")
+                if scheduler.misses:
+                    hud_text.append(f"Deadline misses: {scheduler.misses}/{scheduler.frames}")
                 
                 for i, line in enumerate(hud_text):
                     cv2.putText(frame, line, (10, 30 + i*30), 
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
             
-            controller.press_key(action, duration=config.KEY_PRESS_DURATION)
-            
-            # --- 5. Visualization ---
+            # --- 6. Visualization ---
             if config.SHOW_CV_WINDOW:
                 window_name = "Pac-Man AI Vision"
                 # Create window if it doesn't exist (implicitly handled by imshow, but needed for moveWindow)
@@ -181,20 +409,16 @@ def main():
                     cv2.imwrite(filename, frame)
                     print(f"Snapshot saved to {filename}")
             
-            # --- 6. FPS Control ---
-            loop_end = time.time()
-            elapsed = loop_end - loop_start
-            sleep_time = frame_duration - elapsed
-            
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            else:
-                if config.DEBUG_MODE:
-                    print(f"Warning: Lagging behind target FPS. Loop took {elapsed:.4f}s")
+            # --- 7. FPS Control ---
+            late = scheduler.wait()
+            if late > 0 and config.DEBUG_MODE:
+                print(f"Warning: Missed frame deadline by {late * 1000:.1f}ms "
+                      f"(loop took {time.perf_counter() - loop_start:.4f}s)")
 
     except KeyboardInterrupt:
         print("\nStopping agent...")
     finally:
+        loop.close()
         cv2.destroyAllWindows()
         print("Agent stopped.")
 
@@ -0,0 +1,367 @@
+"""
+Pac-Man AI Agent - Multi-instance supervisor
+
+Runs one worker process per entry of config.INSTANCES. Each worker owns the
+whole pipeline for one game window (capture -> vision -> agent -> control),
+is pinned to its own CPU, reports health on a shared queue and is restarted
+with backoff when it crashes or stops reporting.
+
+    python supervisor.py                          # config.INSTANCES
+    python supervisor.py --replay logs/<session> --count 4 --duration 20
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import traceback
+import multiprocessing as mp
+from typing import Any, Dict, List, Optional
+import config
+
+# Backoff between restarts of a crashing worker (seconds)
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = 30.0
+# A worker that ran this long is considered healthy again and its backoff resets
+STABLE_RUN_SECONDS = 60.0
+
+
+# --- Worker side ---
+
+def _pin_cpu(instance: Dict[str, Any], index: int) -> Optional[int]:
+    """Pin this process to one core (Linux only). Returns the core or None."""
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    cpu = instance.get('cpu', cores[index % len(cores)])
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print(f"[{instance['name']}] Could not pin to CPU {cpu}: {e}")
+        return None
+    return cpu
+
+
+def _make_capturer(instance: Dict[str, Any]):
+    source = instance.get('source', 'screen')
+    if source == 'screen':
+        from capture.screen_capture import ScreenCapturer
+        return ScreenCapturer(region=instance.get('region'))
+    from capture.replay_capture import ReplayCapturer
+    return ReplayCapturer(source, fps=instance.get('replay_fps'), region=instance.get('region'))
+
+
+def _make_controller(instance: Dict[str, Any]):
+    kind = instance.get('controller', 'null')
+    if kind == 'keyboard':
+        from control.keyboard_controller import KeyboardController
+        return KeyboardController()
+    if kind == 'xdotool':
+        from control.window_controller import XdotoolController
+        return XdotoolController(instance['window'])
+    from control.window_controller import NullController
+    return NullController()
+
+
+def _worker_main(index: int, instance: Dict[str, Any], health, stop):
+    """Worker process: runs the agent loop for one instance until `stop` is set."""
+    name = instance['name']
+
+    def report(status: str, **fields):
+        fields.update(name=name, pid=os.getpid(), status=status, time=time.time())
+        try:
+            health.put_nowait(fields)
+        except queue.Full:
+            pass
+
+    try:
+        cpu = _pin_cpu(instance, index)
+        report('starting', cpu=cpu)
+
+        from main import create_agent, AgentLoop
+        from vision.object_detection_cv import create_detector
+        from vision.state_estimator import StateEstimator
+        from vision.map_extractor import MapExtractor
+        from vision.map_cache import MapCache
+        from utils.data_logger import DataLogger
+
+        capturer = _make_capturer(instance)
+        controller = _make_controller(instance)
+        estimator = StateEstimator()
+        detector = create_detector(estimator)
+        detector.preload_async()
+
+        # --- Mapping (warm start from the per-region cache for live windows) ---
+        report('mapping', cpu=cpu)
+        live = instance.get('source', 'screen') == 'screen'
+        map_cache = MapCache(region=instance.get('region')) if live and getattr(config, 'MAP_CACHE_ENABLED', True) else None
+        first_frame = capturer.capture()
+        cached_map = map_cache.load(first_frame) if map_cache else None
+        if cached_map is not None:
+            estimator.initialize_from_cache(cached_map['clean_map'], cached_map['walls'], first_frame)
+        else:
+            extractor = MapExtractor()
+            extractor.capture_frames(capturer, duration=instance.get('map_seconds', 3.0))
+            clean_map = extractor.extract_clean_map()
+            if clean_map is not None:
+                estimator.initialize_from_map(clean_map)
+                if map_cache:
+                    map_cache.save(clean_map, estimator.maze)
+
+        # --- Agent loop (the same per-frame pipeline as main.py, one log folder per instance) ---
+        loop = AgentLoop(estimator, detector, controller, create_agent(instance.get('agent')),
+                         fps=instance.get('fps', config.TARGET_FPS),
+                         logger=DataLogger(log_dir=os.path.join('logs', name)), map_cache=map_cache)
+        scheduler = loop.scheduler
+        report_interval = getattr(config, 'SUPERVISOR_REPORT_INTERVAL', 2.0)
+        max_frames = instance.get('max_frames')
+        frames = 0
+        window_frames = 0
+        window_busy = 0.0
+        window_max = 0.0
+        window_start = time.perf_counter()
+        game_state = {}
+        try:
+            while not stop.is_set():
+                loop_start = time.perf_counter()
+                frame = capturer.capture()
+                if frame is None:
+                    time.sleep(0.1)
+                    scheduler.reset()
+                    continue
+
+                game_state = loop.step(frame, loop_start)
+
+                busy = time.perf_counter() - loop_start
+                frames += 1
+                window_frames += 1
+                window_busy += busy
+                window_max = max(window_max, busy)
+
+                now = time.perf_counter()
+                if now - window_start >= report_interval:
+                    report('running', cpu=cpu, frames=frames,
+                           fps=window_frames / (now - window_start),
+                           loop_ms=window_busy / window_frames * 1000,
+                           max_loop_ms=window_max * 1000,
+                           misses=scheduler.misses,
+                           mode=loop.activity.mode if loop.activity is not None else 'active',
+                           pacman_pos=game_state.get('pacman_pos'),
+                           pellets_remaining=game_state.get('pellets_remaining'))
+                    window_frames, window_busy, window_max, window_start = 0, 0.0, 0.0, now
+
+                if max_frames and frames >= max_frames:
+                    break
+                scheduler.wait()
+        finally:
+            loop.close(summary=False)
+        report('stopped', cpu=cpu, frames=frames, pellets_remaining=game_state.get('pellets_remaining'))
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        report('error', error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+        raise
+
+
+# --- Supervisor side ---
+
+class _WorkerSlot:
+    """Bookkeeping for one instance across restarts."""
+
+    def __init__(self, index: int, instance: Dict[str, Any]):
+        self.index = index
+        self.instance = instance
+        self.process: Optional[mp.Process] = None
+        self.started_at = 0.0
+        self.last_seen = 0.0
+        self.last_health: Dict[str, Any] = {}
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF_MIN
+        self.next_start = 0.0
+        self.finished = False  # Exited cleanly or gave up
+
+
+class Supervisor:
+    """
+    Starts, watches and restarts one worker process per instance.
+
+    Workers put health dicts on a shared queue; the supervisor keeps the latest
+    one per worker, restarts workers that crash (non-zero exit) or go silent
+    for longer than the health timeout, and prints an aggregated summary.
+    """
+
+    def __init__(self, instances: List[Dict[str, Any]], max_restarts: int = None,
+                 health_timeout: float = None, report_interval: float = None):
+        names = [inst['name'] for inst in instances]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Instance names must be unique: {names}")
+        if sum(1 for inst in instances if inst.get('controller') == 'keyboard') > 1:
+            print("Warning: several instances use the 'keyboard' controller; their keys all go to the "
+                  "focused window. Use 'xdotool' with a window per instance.")
+
+        self.max_restarts = max_restarts if max_restarts is not None else getattr(config, 'SUPERVISOR_MAX_RESTARTS', None)
+        self.health_timeout = health_timeout if health_timeout is not None else getattr(config, 'SUPERVISOR_HEALTH_TIMEOUT', 15.0)
+        self.report_interval = report_interval if report_interval is not None else getattr(config, 'SUPERVISOR_REPORT_INTERVAL', 2.0)
+
+        self._ctx = mp.get_context()
+        self._health = self._ctx.Queue(maxsize=1024)
+        self._stop = self._ctx.Event()
+        self.slots = [_WorkerSlot(i, inst) for i, inst in enumerate(instances)]
+
+    # --- Lifecycle ---
+
+    def _spawn(self, slot: _WorkerSlot):
+        slot.process = self._ctx.Process(target=_worker_main, name=f"pacman-{slot.instance['name']}",
+                                         args=(slot.index, slot.instance, self._health, self._stop), daemon=True)
+        slot.process.start()
+        slot.started_at = slot.last_seen = time.monotonic()
+
+    def start(self):
+        for slot in self.slots:
+            self._spawn(slot)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for slot in self.slots:
+            if slot.process is not None:
+                slot.process.join(max(0.0, deadline - time.monotonic()))
+                if slot.process.is_alive():
+                    slot.process.terminate()
+                    slot.process.join(1.0)
+        self._drain()
+
+    # --- Monitoring ---
+
+    def _drain(self):
+        by_name = {slot.instance['name']: slot for slot in self.slots}
+        while True:
+            try:
+                msg = self._health.get_nowait()
+            except queue.Empty:
+                return
+            slot = by_name.get(msg['name'])
+            if slot is None:
+                continue
+            slot.last_seen = time.monotonic()
+            slot.last_health = msg
+            if msg['status'] == 'error':
+                print(f"[{msg['name']}] crashed: {msg['error']}\n{msg.get('traceback', '')}")
+
+    def _check(self, slot: _WorkerSlot):
+        now = time.monotonic()
+        proc = slot.process
+        if slot.finished:
+            return
+        if proc is None:
+            if now >= slot.next_start:
+                print(f"[{slot.instance['name']}] restarting (restart #{slot.restarts})")
+                self._spawn(slot)
+            return
+
+        if proc.is_alive():
+            if now - slot.last_seen > self.health_timeout:
+                print(f"[{slot.instance['name']}] no health report for {now - slot.last_seen:.0f}s, killing it")
+                proc.terminate()
+                proc.join(1.0)
+            else:
+                return
+
+        if proc.exitcode == 0 and slot.last_health.get('status') == 'stopped':
+            slot.finished = True
+            return
+
+        # Crashed or hung: schedule a restart with exponential backoff
+        if now - slot.started_at > STABLE_RUN_SECONDS:
+            slot.backoff = RESTART_BACKOFF_MIN
+        slot.process = None
+        if self.max_restarts is not None and slot.restarts >= self.max_restarts:
+            print(f"[{slot.instance['name']}] exited with {proc.exitcode}, giving up after {slot.restarts} restarts")
+            slot.finished = True
+            return
+        slot.restarts += 1
+        slot.next_start = now + slot.backoff
+        print(f"[{slot.instance['name']}] exited with {proc.exitcode}, restarting in {slot.backoff:.0f}s")
+        slot.backoff = min(slot.backoff * 2, RESTART_BACKOFF_MAX)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregated health: per-worker latest report plus totals."""
+        workers = []
+        for slot in self.slots:
+            h = slot.last_health
+            workers.append({
+                'name': slot.instance['name'],
+                'status': 'finished' if slot.finished and h.get('status') != 'stopped' else h.get('status', 'starting'),
+                'pid': h.get('pid'),
+                'cpu': h.get('cpu'),
+                'fps': h.get('fps', 0.0) if h.get('status') == 'running' else 0.0,
+                'loop_ms': h.get('loop_ms', 0.0),
+                'max_loop_ms': h.get('max_loop_ms', 0.0),
+                'frames': h.get('frames', 0),
+                'misses': h.get('misses', 0),
+                'mode': h.get('mode', 'active'),
+                'pellets_remaining': h.get('pellets_remaining'),
+                'restarts': slot.restarts,
+                'age_s': time.monotonic() - slot.last_seen,
+            })
+        return {
+            'workers': workers,
+            'total_fps': sum(w['fps'] for w in workers),
+            'running': sum(1 for w in workers if w['status'] == 'running'),
+            'restarts': sum(w['restarts'] for w in workers),
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        print(f"--- {s['running']}/{len(self.slots)} running, {s['total_fps']:.1f} FPS total, {s['restarts']} restarts ---")
+        for w in s['workers']:
+            print(f"  {w['name']:<12} {w['status']:<9} pid={w['pid']} cpu={w['cpu']} "
+                  f"fps={w['fps']:5.1f} loop={w['loop_ms']:5.1f}ms (max {w['max_loop_ms']:5.1f}) "
+                  f"frames={w['frames']} misses={w['misses']} {w['mode']} pellets={w['pellets_remaining']} restarts={w['restarts']}")
+
+    def run(self, duration: float = None):
+        """Supervise until interrupted, `duration` elapses or every worker finished."""
+        self.start()
+        end = time.monotonic() + duration if duration else None
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while end is None or time.monotonic() < end:
+                self._drain()
+                for slot in self.slots:
+                    self._check(slot)
+                if all(slot.finished for slot in self.slots):
+                    break
+                if time.monotonic() >= next_report:
+                    self.print_summary()
+                    next_report += self.report_interval
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("\nStopping workers...")
+        finally:
+            self.stop()
+            self.print_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one Pac-Man agent per configured game instance.")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--replay', type=str, default=None,
+                        help="Ignore config.INSTANCES and replay this session/image folder headless")
+    parser.add_argument('--count', type=int, default=2, help="Number of replay instances (with --replay)")
+    parser.add_argument('--fps', type=float, default=None, help="Per-worker FPS cap for replay instances (default: unpaced)")
+    args = parser.parse_args()
+
+    if args.replay:
+        instances = [{'name': f'replay{i}', 'source': args.replay, 'controller': 'null',
+                      'fps': args.fps, 'map_seconds': 1.0} for i in range(args.count)]
+    else:
+        instances = getattr(config, 'INSTANCES', None) or [
+            {'name': 'main', 'region': config.CAPTURE_REGION, 'source': 'screen', 'controller': 'keyboard'}]
+
+    print(f"Supervising {len(instances)} instance(s) on {os.cpu_count()} CPU(s)...")
+    Supervisor(instances).run(duration=args.duration)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the project modules (and tools/) from the repository root, like the scripts do
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
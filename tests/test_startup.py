@@ -0,0 +1,25 @@
+import subprocess
+import statistics
+import sys
+import pytest
+from tools.bench_startup import BUDGETS_MS, ROOT, import_time_ms
+
+# Fresh interpreters per module; the median absorbs one slow start
+RUNS = 5
+# Heavy packages that must stay off the startup path (imported lazily where they are used)
+DEFERRED = ('cv2', 'numpy', 'mss', 'pynput', 'dotenv')
+
+
+@pytest.mark.parametrize('module,budget_ms', [(m, b) for m, b in BUDGETS_MS.items() if b is not None])
+def test_import_time_within_budget(module, budget_ms):
+    median = statistics.median(import_time_ms(module) for _ in range(RUNS))
+    assert median <= budget_ms, f"import {module}: {median:.2f} ms (median of {RUNS}) > budget {budget_ms:.0f} ms"
+
+
+@pytest.mark.parametrize('module', ['config', 'main'])
+def test_heavy_imports_deferred(module):
+    code = f"import sys, {module}; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip()
+    assert not loaded, f"import {module} loads {loaded} at startup"
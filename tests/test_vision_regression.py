@@ -0,0 +1,32 @@
+import os
+import pytest
+import config
+from utils.golden import check, evaluate_corpus, load_baseline
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Runs per corpus; latencies take the fastest (accuracy is deterministic)
+REPEAT = 2
+CORPORA = list(getattr(config, 'GOLDEN_DIRS', [config.GOLDEN_DIR]))
+
+
+@pytest.fixture(scope='module', params=CORPORA)
+def evaluated(request):
+    """(corpus, metrics, baseline) for a committed corpus, under the settings its baseline records."""
+    corpus = os.path.join(ROOT, request.param)
+    baseline = load_baseline(corpus)
+    assert baseline is not None, f"{request.param} has no baseline.json (tools/vision_regression.py --update-baseline)"
+    metrics, _ = evaluate_corpus(corpus, repeat=REPEAT)
+    return request.param, metrics, baseline
+
+
+def test_accuracy(evaluated):
+    corpus, metrics, baseline = evaluated
+    failures = check(metrics, baseline, timing=False)
+    assert not failures, f"{corpus}: " + "; ".join(failures)
+
+
+def test_latency(evaluated):
+    # Relative to the reference workload timed in the same run (utils/golden.py latency_scale)
+    corpus, metrics, baseline = evaluated
+    failures = check(metrics, baseline, accuracy=False)
+    assert not failures, f"{corpus}: " + "; ".join(failures)
@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+from utils.dataset import ShardWriter, BatchLoader, read_session, _row, COLUMNS
+from utils.data_logger import DataLogger
+from utils.sample_maze import sample_grid
+
+CELL = 16
+
+def make_synthetic_session(log_dir: str, frames: int) -> str:
+    """Log `frames` rendered sample-maze frames through DataLogger (every frame is kept)."""
+    grid = sample_grid()
+    h, w = grid.shape
+    base = np.zeros((h * CELL, w * CELL, 3), dtype=np.uint8)
+    base[np.kron(grid == 1, np.ones((CELL, CELL), dtype=bool))] = (107, 0, 37)
+    walkable = [(x, y) for y in range(h) for x in range(w) if grid[y, x] != 1]
+    rng = random.Random(0)
+
+    logger = DataLogger(log_dir=log_dir)
+    for i in range(frames):
+        frame = base.copy()
+        x, y = walkable[(i * 7) % len(walkable)]
+        cv2.circle(frame, (x * CELL + CELL // 2, y * CELL + CELL // 2), CELL // 2 - 1, (0, 255, 255), -1)
+        state = {'pacman_pos': (x, y), 'ghost_positions': [rng.choice(walkable) for _ in range(4)],
+                 'pellets_remaining': 244 - i % 244, 'pellets_total': 244}
+        logger.frame_count = i * 10 + 9  # Land on the periodic trigger so every step is saved
+        logger.log_step(frame, state, rng.choice(['UP', 'DOWN', 'LEFT', 'RIGHT']))
+    return logger.session_dir
+
+def bench_raw_folders(sessions, batch_size, batches):
+    """Baseline: shuffled reads straight from the session folders (JSONL + one JPEG per frame)."""
+    start = time.perf_counter()
+    samples = [(s, e, i) for i, s in enumerate(sessions) for e in read_session(s)]
+    random.Random(1).shuffle(samples)
+    n = 0
+    for b in range(batches):
+        chunk = samples[b * batch_size:(b + 1) * batch_size]
+        if not chunk:
+            break
+        frames = np.stack([cv2.imread(os.path.join(s, e['image_file'])) for s, e, _ in chunk])
+        rows = [_row(e, i) for _, e, i in chunk]
+        {col: np.array([r[col] for r in rows], dtype=dtype) for col, dtype in COLUMNS.items()}
+        n += len(frames)
+    return n / (time.perf_counter() - start)
+
+def bench_loader(root, batch_size, batches, workers):
+    start = time.perf_counter()
+    n = 0
+    for b, batch in enumerate(BatchLoader(root, batch_size=batch_size, workers=workers, seed=1)):
+        n += len(batch['frames'])
+        if b + 1 >= batches:
+            break
+    return n / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dataset loading throughput: session folders vs shards.")
+    parser.add_argument('sessions', nargs='*', help="Session directories (default: a synthetic session)")
+    parser.add_argument('--frames', type=int, default=2000, help="Frames in the synthetic session")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--batches', type=int, default=25)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="pacman_dataset_")
+    try:
+        sessions = args.sessions
+        if not sessions:
+            print(f"Logging a synthetic session of {args.frames} frames...")
+            sessions = [make_synthetic_session(os.path.join(tmp, 'logs'), args.frames)]
+
+        results = [('session folders (JPEG + JSONL)', bench_raw_folders(sessions, args.batch_size, args.batches))]
+        for encoding in ('raw', 'jpeg'):
+            root = os.path.join(tmp, f'shards_{encoding}')
+            t0 = time.perf_counter()
+            writer = ShardWriter(root, shard_size=512, encoding=encoding)
+            for s in sessions:
+                writer.add_session(s)
+            writer.close()
+            print(f"Exported {encoding} shards in {time.perf_counter() - t0:.1f}s")
+            for workers in sorted({0, args.workers}):
+                results.append((f'shards {encoding}, {workers} workers',
+                                bench_loader(root, args.batch_size, args.batches, workers)))
+
+        baseline = results[0][1]
+        print(f"\n--- Loading throughput ({args.batches} shuffled batches of {args.batch_size}) ---")
+        print(f"{'source':<32} {'frames/s':>10} {'speedup':>8}")
+        for name, rate in results:
+            print(f"{name:<32} {rate:>10.0f} {rate / baseline:>7.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
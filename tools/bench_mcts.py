@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import argparse
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent.policy_mcts import ParallelMCTSAgent
+from utils.sample_maze import sample_grid
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure root-parallel MCTS throughput vs worker count.")
+    parser.add_argument('--budget', type=float, default=0.025, help="Time budget per decision (s)")
+    parser.add_argument('--decisions', type=int, default=40, help="Decisions per worker count")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    grid = sample_grid()
+    state = {
+        'grid': grid,
+        'pacman_pos': (13, 23),
+        'ghost_positions': [(12, 11), (15, 11), (6, 5), (21, 26)],
+    }
+
+    print(f"--- MCTS scaling ({args.budget * 1000:.0f} ms per decision, {args.decisions} decisions) ---")
+    print(f"{'workers':>7} {'rollouts/dec':>13} {'speedup':>8} {'ipc ms':>7} {'wall ms':>8}")
+
+    counts = [0] + [w for w in (1, 2, 4, 8, 16, 32) if w <= args.max_workers]
+    baseline = None
+    for workers in counts:
+        agent = ParallelMCTSAgent(workers=workers, time_budget=args.budget)
+        agent.decide_action(state)  # Warm up (starts the pool)
+        rollouts = ipc = wall = 0.0
+        for _ in range(args.decisions):
+            t0 = time.perf_counter()
+            agent.decide_action(state)
+            wall += time.perf_counter() - t0
+            rollouts += agent.last_stats['rollouts']
+            ipc += agent.last_stats['ipc_ms']
+        agent.close()
+
+        per_decision = rollouts / args.decisions
+        if baseline is None:
+            baseline = per_decision
+        label = "inproc" if workers == 0 else str(workers)
+        print(f"{label:>7} {per_decision:>13.0f} {per_decision / max(baseline, 1):>7.2f}x "
+              f"{ipc / args.decisions:>7.2f} {wall / args.decisions * 1000:>8.2f}")
+
+if __name__ == "__main__":
+    main()
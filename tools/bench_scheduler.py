@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import random
+import argparse
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from utils.scheduler import FrameScheduler
+
+def busy_work(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def run_naive(fps: float, frames: int, work):
+    """The old main() pacing: sleep(frame_duration - elapsed) on time.time()."""
+    frame_duration = 1.0 / fps
+    starts = []
+    for i in range(frames):
+        loop_start = time.time()
+        starts.append(time.perf_counter())
+        busy_work(work(i))
+        elapsed = time.time() - loop_start
+        if frame_duration - elapsed > 0:
+            time.sleep(frame_duration - elapsed)
+    return np.array(starts), None  # It has no notion of a deadline
+
+def run_scheduler(fps: float, frames: int, work, policy: str, spin: float):
+    scheduler = FrameScheduler(fps, policy=policy, spin=spin)
+    starts = []
+    for i in range(frames):
+        starts.append(time.perf_counter())
+        busy_work(work(i))
+        scheduler.wait()
+    return np.array(starts), scheduler.misses
+
+def report(name: str, fps: float, starts: np.ndarray, misses):
+    period = 1.0 / fps
+    intervals = np.diff(starts)
+    # Drift: where the last frame started compared to where a perfect clock would have it
+    drift = (starts[-1] - starts[0]) - period * (len(starts) - 1)
+    err = np.abs(intervals - period) * 1000
+    print(f"  {name:<18} {(len(starts) - 1) / (starts[-1] - starts[0]):7.2f} FPS  drift {drift * 1000:+8.1f} ms  "
+          f"interval error p50 {np.percentile(err, 50):6.3f} p99 {np.percentile(err, 99):6.3f} ms  misses {'n/a' if misses is None else misses}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loop pacing: old sleep-what's-left vs FrameScheduler.")
+    parser.add_argument('--rates', type=float, nargs='+', default=[30, 60, 120])
+    parser.add_argument('--seconds', type=float, default=3.0, help="Run length per rate and variant")
+    parser.add_argument('--load', type=float, default=0.5, help="Mean work per frame as a fraction of the period")
+    parser.add_argument('--spike-every', type=int, default=50, help="Every Nth frame overruns (1.5 periods); 0 = never")
+    parser.add_argument('--spin', type=float, default=0.001)
+    args = parser.parse_args()
+
+    for fps in args.rates:
+        period = 1.0 / fps
+        frames = int(args.seconds * fps)
+        rng = random.Random(0)
+        loads = [period * args.load * rng.uniform(0.5, 1.5) for _ in range(frames)]
+        if args.spike_every:
+            for i in range(args.spike_every - 1, frames, args.spike_every):
+                loads[i] = period * 1.5
+
+        print(f"--- {fps:.0f} Hz, {frames} frames, load {args.load:.0%}, spike every {args.spike_every} ---")
+        report('naive sleep', fps, *run_naive(fps, frames, lambda i: loads[i]))
+        report('scheduler skip', fps, *run_scheduler(fps, frames, lambda i: loads[i], 'skip', args.spin))
+        report('scheduler catchup', fps, *run_scheduler(fps, frames, lambda i: loads[i], 'catchup', args.spin))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import subprocess
+import statistics
+import argparse
+
+# Startup benchmark based on `python -X importtime`.
+# Exits with status 1 if a module's import time exceeds its budget:
+#   python tools/bench_startup.py
+# The same budgets are enforced by the test suite (tests/test_startup.py, `python -m pytest`).
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Module -> cumulative import budget in milliseconds (None = report only)
+BUDGETS_MS = {
+    'config': 10.0,
+    'main': 15.0,
+    'vision.maze_grid': None,
+    'vision.object_detection_cv': None,
+}
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) == 3 and parts[2].rstrip() == f' {module}':
+            return int(parts[1]) / 1000.0
+    raise RuntimeError(f"No importtime entry for {module}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check module import times against budgets.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module (median is used)")
+    args = parser.parse_args()
+
+    print(f"--- Startup import times (median of {args.runs}) ---")
+    failed = []
+    for module, budget in BUDGETS_MS.items():
+        try:
+            samples = [import_time_ms(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module:<30} skipped ({e})")
+            continue
+        median = statistics.median(samples)
+        if budget is None:
+            verdict = ""
+        elif median <= budget:
+            verdict = f"OK (budget {budget:.0f} ms)"
+        else:
+            verdict = f"OVER BUDGET ({budget:.0f} ms)"
+            failed.append(module)
+        print(f"{module:<30} {median:8.2f} ms  {verdict}")
+
+    if failed:
+        print(f"[FAIL] Over budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("[OK] All startup budgets met.")
+
+if __name__ == "__main__":
+    main()
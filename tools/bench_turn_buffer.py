@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from capture.sim_game import SimGame
+from control.turn_buffer import TurnBuffer
+from vision.object_detection_cv import ObjectDetectorCV
+from vision.frame_context import FramePreprocessor
+from vision.maze_graph import MazeGraph, step_direction
+from utils.scheduler import FrameScheduler
+
+def pacman_cell(game: SimGame, boxes):
+    """Grid cell of the first Pac-Man match cluster (mean center of neighbouring matches)."""
+    if not boxes:
+        return None
+    x0, y0 = boxes[0][:2]
+    near = [(x + w / 2.0, y + h / 2.0) for x, y, w, h in boxes if abs(x - x0) <= w and abs(y - y0) <= h]
+    px = sum(p[0] for p in near) / len(near)
+    py = sum(p[1] for p in near) / len(near)
+    gx = int((px - game.pad['left']) // game.cell)
+    gy = int((py - game.pad['top']) // game.cell)
+    if 0 <= gx < game.width and 0 <= gy < game.height:
+        return gx, gy
+    return None
+
+def run(buffered: bool, seconds: float, fps: float, path_cells: int, seed: int, template_dir: str):
+    """Drive the simulator along random routes; returns (waypoints reached, turns, TurnBuffer stats)."""
+    game = SimGame(ghosts=0, key_memory=False)
+    detector = ObjectDetectorCV(template_dir=template_dir)
+    preprocessor = FramePreprocessor()
+    graph = MazeGraph((game.grid == 1).astype('uint8'))
+    walkable = [(x, y) for y in range(game.height) for x in range(game.width) if game.grid[y, x] != 1]
+    rng = random.Random(seed)
+    # Without pre-buffering the TurnBuffer gets no path: it only tracks and counts turns
+    buffer = TurnBuffer(game)
+    scheduler = FrameScheduler(fps)
+
+    target, reached = None, 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        frame = game.capture()
+        ctx = preprocessor.begin(frame)
+        cell = pacman_cell(game, detector.detect_objects(frame, ctx)['pacman'])
+
+        path = None
+        if cell is not None:
+            if target is None or cell == target:
+                reached += target is not None
+                target = rng.choice(walkable)
+            path = graph.shortest_path(cell, target)
+        action = step_direction(path[0], path[1]) if path and len(path) > 1 else None
+
+        buffer.plan(path[:path_cells] if path and buffered else None, cell, t0)
+        if action:
+            # Like main.py: the loop holds the key for KEY_PRESS_DURATION
+            game.press_key(action, config.KEY_PRESS_DURATION)
+        scheduler.wait()
+
+    buffer.close()
+    return reached, len(game.turns), dict(buffer.stats)
+
+def main():
+    parser = argparse.ArgumentParser(description="Route-following on the simulator with and without turn pre-buffering.")
+    parser.add_argument('--seconds', type=float, default=20.0, help="Run length per variant")
+    parser.add_argument('--fps', type=float, default=config.TARGET_FPS)
+    parser.add_argument('--path-cells', type=int, default=12, help="Planned path length handed to the TurnBuffer")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="pacman_sim_templates_")
+    SimGame(ghosts=0).write_templates(template_dir)
+
+    print("Simulator without key memory: a turn only registers if the key is held at the junction.")
+    for buffered in (False, True):
+        reached, turns, stats = run(buffered, args.seconds, args.fps, args.path_cells, args.seed, template_dir)
+        name = "turn buffer" if buffered else "reactive only"
+        print(f"  {name:<14} waypoints reached {reached:3d}, direction changes {turns:4d}, "
+              f"turns pre-buffered {stats['prebuffered']}, reactive {stats['reactive']}, "
+              f"missed {stats['missed']} ({stats['fired']} presses)")
+
+if __name__ == "__main__":
+    main()
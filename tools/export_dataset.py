@@ -0,0 +1,33 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.dataset import ShardWriter
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack DataLogger sessions into training shards.")
+    parser.add_argument('sessions', nargs='+', help="Session directories (logs/<session_id>)")
+    parser.add_argument('--out', required=True, help="Output dataset directory")
+    parser.add_argument('--shard-size', type=int, default=1024, help="Frames per shard")
+    parser.add_argument('--jpeg', action='store_true', help="Store JPEG-compressed frames instead of decoded arrays")
+    parser.add_argument('--size', type=str, default=None, help="Resize frames to WxH (default: size of the first frame)")
+    args = parser.parse_args()
+
+    frame_size = tuple(int(v) for v in args.size.lower().split('x')) if args.size else None
+    writer = ShardWriter(args.out, shard_size=args.shard_size, encoding='jpeg' if args.jpeg else 'raw',
+                         frame_size=frame_size)
+    for session_dir in args.sessions:
+        if not os.path.exists(os.path.join(session_dir, 'data.jsonl')):
+            print(f"Skipping {session_dir}: no data.jsonl")
+            continue
+        added = writer.add_session(session_dir)
+        print(f"{session_dir}: {added} frames")
+
+    index = writer.close()
+    print(f"Wrote {index['total']} frames in {len(index['shards'])} shards to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.golden import decode_grid, encode_grid, load_manifest, save_manifest, MANIFEST_FILENAME
+
+# Review and correct the labels of a recorded corpus, then mark them verified:
+#   python tools/record_golden.py --source logs/<session> --out assets/golden_real
+#   python tools/label_golden.py review assets/golden_real             # overlays in <corpus>/review/
+#   python tools/label_golden.py edit assets/golden_real --frame 3 --pacman 13,23 --ghosts 12,11
+#   python tools/label_golden.py edit assets/golden_real --all --cell 5,7=2
+#   python tools/label_golden.py verify assets/golden_real --by "<name>"
+# 'auto' labels are the vision stack's own output; only 'verified' (and 'sim') corpora count as
+# ground truth (e.g. for tools/train_cell_classifier.py).
+
+REVIEW_DIR = 'review'
+# Overlay colours (BGR)
+COLORS = {'wall': (255, 80, 0), 'pellet': (255, 255, 255), 'pacman': (0, 255, 255), 'ghost': (0, 0, 255)}
+
+
+def parse_cell(text: str):
+    x, y = (int(v) for v in text.split(','))
+    return [x, y]
+
+
+def parse_assignment(text: str):
+    """'X,Y=V' -> ((x, y), v) with v in 0 (empty), 1 (wall), 2 (pellet)."""
+    cell, value = text.split('=')
+    value = int(value)
+    if value not in (0, 1, 2):
+        raise argparse.ArgumentTypeError(f"cell value must be 0, 1 or 2: {text}")
+    return tuple(parse_cell(cell)), value
+
+
+def cell_rects(frame_shape, grid_size):
+    """Frame rectangle (x1, y1, x2, y2) of every cell, like StateEstimator's padded grid."""
+    from vision.detection_mask import search_mask_for
+    x1, y1, x2, y2 = search_mask_for(frame_shape).roi
+    gw, gh = grid_size
+    xs = np.linspace(x1, x2, gw + 1).round().astype(int)
+    ys = np.linspace(y1, y2, gh + 1).round().astype(int)
+    return xs, ys
+
+
+def review(corpus: str):
+    """Write every frame with its labels drawn on it, plus a cell ruler, to <corpus>/review/."""
+    import cv2
+    from utils.golden import load_corpus
+    manifest, frames = load_corpus(corpus)
+    out = os.path.join(corpus, REVIEW_DIR)
+    os.makedirs(out, exist_ok=True)
+    for i, (entry, frame) in enumerate(zip(manifest['frames'], frames)):
+        image = frame.copy()
+        xs, ys = cell_rects(frame.shape, manifest['grid_size'])
+        grid = decode_grid(entry['grid'])
+        for gy in range(grid.shape[0]):
+            for gx in range(grid.shape[1]):
+                x1, y1, x2, y2 = xs[gx], ys[gy], xs[gx + 1] - 1, ys[gy + 1] - 1
+                if grid[gy, gx] == 1:
+                    cv2.rectangle(image, (x1, y1), (x2, y2), COLORS['wall'], 1)
+                elif grid[gy, gx] == 2:
+                    cv2.circle(image, ((x1 + x2) // 2, (y1 + y2) // 2), 1, COLORS['pellet'], -1)
+        cells = [('pacman', entry['pacman'])] if entry['pacman'] else []
+        cells += [('ghost', g) for g in entry['ghosts']]
+        for name, (gx, gy) in cells:
+            cv2.rectangle(image, (xs[gx], ys[gy]), (xs[gx + 1] - 1, ys[gy + 1] - 1), COLORS[name], 2)
+        # Column / row numbers every 5 cells, to read off the coordinates for `edit`
+        for gx in range(0, len(xs) - 1, 5):
+            cv2.putText(image, str(gx), (xs[gx], max(10, ys[0] - 4)), cv2.FONT_HERSHEY_PLAIN, 0.8, (200, 200, 200), 1)
+        for gy in range(0, len(ys) - 1, 5):
+            cv2.putText(image, str(gy), (max(0, xs[0] - 18), ys[gy] + 10), cv2.FONT_HERSHEY_PLAIN, 0.8, (200, 200, 200), 1)
+        cv2.imwrite(os.path.join(out, f"frame_{i:04d}.png"), image)
+    print(f"Wrote {len(frames)} annotated frames to {out} (yellow: Pac-Man, red: ghosts, blue: walls, dots: pellets).")
+
+
+def edit(corpus: str, args):
+    """Apply label corrections to the chosen frames (and the map labels)."""
+    manifest = load_manifest(corpus)
+    frames = manifest['frames']
+    if args.all:
+        selected = range(len(frames))
+    elif args.frame is not None:
+        last = args.to if args.to is not None else args.frame
+        selected = range(args.frame, min(last, len(frames) - 1) + 1)
+    else:
+        selected = range(0)
+    for i in selected:
+        entry = frames[i]
+        if args.pacman is not None:
+            entry['pacman'] = None if args.pacman == 'none' else parse_cell(args.pacman)
+        if args.ghosts is not None:
+            entry['ghosts'] = [parse_cell(g) for g in args.ghosts if g != 'none']
+        if args.cell:
+            grid = decode_grid(entry['grid'])
+            for (x, y), value in args.cell:
+                grid[y, x] = value
+            entry['grid'] = encode_grid(grid)
+    if args.map_cell:
+        grid = decode_grid(manifest['map']['grid'])
+        for (x, y), value in args.map_cell:
+            grid[y, x] = value
+        manifest['map']['grid'] = encode_grid(grid)
+
+    if manifest['source'] == 'verified':
+        # Edited after the review: needs another look
+        manifest['source'] = 'auto'
+        print("Labels changed after verification: the corpus is 'auto' again until re-verified.")
+    save_manifest(corpus, manifest)
+    print(f"Updated {len(selected)} frame(s){' and the map labels' if args.map_cell else ''} in {corpus}.")
+
+
+def verify(corpus: str, by: str):
+    """Mark reviewed 'auto' labels as ground truth."""
+    manifest = load_manifest(corpus)
+    if manifest['source'] == 'sim':
+        raise SystemExit("Simulator labels are exact already; nothing to verify.")
+    manifest['source'] = 'verified'
+    manifest['verified'] = {'by': by, 'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'frames': len(manifest['frames'])}
+    save_manifest(corpus, manifest)
+    print(f"{corpus}: {len(manifest['frames'])} frames marked verified by {by}.")
+    print(f"Next: python tools/vision_regression.py --corpus {corpus} --update-baseline")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review, correct and verify the labels of a golden corpus "
+                                                 "recorded from a session or the screen.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('review', help=f"Draw the labels on every frame into <corpus>/{REVIEW_DIR}/")
+    p.add_argument('corpus')
+
+    p = sub.add_parser('edit', help="Correct labels of one frame, a range or all frames")
+    p.add_argument('corpus')
+    p.add_argument('--frame', type=int, default=None, help="First frame to edit")
+    p.add_argument('--to', type=int, default=None, help="Last frame to edit (inclusive, default: --frame)")
+    p.add_argument('--all', action='store_true', help="Edit every frame")
+    p.add_argument('--pacman', default=None, help="Pac-Man's cell X,Y, or 'none'")
+    p.add_argument('--ghosts', nargs='*', default=None, help="Ghost cells X,Y ... (replaces the list; 'none' for no ghosts)")
+    p.add_argument('--cell', nargs='*', type=parse_assignment, default=[], help="Grid cells X,Y=V (0 empty, 1 wall, 2 pellet)")
+    p.add_argument('--map-cell', nargs='*', type=parse_assignment, default=[], help="Clean-map label cells X,Y=V")
+
+    p = sub.add_parser('verify', help="Mark the reviewed labels as ground truth ('verified')")
+    p.add_argument('corpus')
+    p.add_argument('--by', required=True, help="Who reviewed the labels")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.corpus, MANIFEST_FILENAME)):
+        raise SystemExit(f"No corpus in {args.corpus}")
+    if args.command == 'review':
+        review(args.corpus)
+    elif args.command == 'edit':
+        edit(args.corpus, args)
+    else:
+        verify(args.corpus, args.by)
+
+if __name__ == "__main__":
+    main()
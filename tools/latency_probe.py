@@ -0,0 +1,121 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from utils.latency import LatencyProbe, COMPONENTS
+from vision.object_detection_cv import ObjectDetectorCV
+from vision.frame_context import FramePreprocessor
+from vision.maze_graph import DIRECTIONS, OPPOSITE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure action-to-observation latency (key press -> Pac-Man visibly reverses).")
+    parser.add_argument('--live', action='store_true', help="Use the real screen and keyboard instead of the simulator")
+    parser.add_argument('--samples', type=int, default=40, help="Number of latency samples to collect")
+    parser.add_argument('--press-duration', type=float, default=config.KEY_PRESS_DURATION,
+                        help="Key hold time; the loop blocks for it, like main.py")
+    parser.add_argument('--fps', type=float, default=config.TARGET_FPS, help="Capture rate of the probe loop")
+    parser.add_argument('--input-delay', type=float, default=0.030, help="Simulator: key -> game delay (s)")
+    parser.add_argument('--display-delay', type=float, default=0.017, help="Simulator: game -> screen delay (s)")
+    parser.add_argument('--json', type=str, default=None, help="Write raw samples and summary to this file")
+    parser.add_argument('--max-seconds', type=float, default=60.0)
+    args = parser.parse_args()
+
+    if args.live:
+        from capture.screen_capture import ScreenCapturer
+        from control.keyboard_controller import KeyboardController
+        capturer = ScreenCapturer(region=config.CAPTURE_REGION)
+        controller = KeyboardController()
+        detector = ObjectDetectorCV(template_dir=config.TEMPLATE_DIR)
+        print("Probing the live game: keep it focused. Pac-Man will be reversed repeatedly.")
+    else:
+        from capture.sim_game import SimGame
+        # No ghosts: the shape-only sim templates would match them as well
+        game = SimGame(input_delay=args.input_delay, display_delay=args.display_delay, ghosts=0)
+        capturer = controller = game
+        template_dir = tempfile.mkdtemp(prefix="pacman_sim_templates_")
+        game.write_templates(template_dir)
+        detector = ObjectDetectorCV(template_dir=template_dir)
+        print(f"Probing the simulator (input {args.input_delay * 1000:.0f} ms, display {args.display_delay * 1000:.0f} ms, "
+              f"tick {game.tick * 1000:.1f} ms).")
+
+    preprocessor = FramePreprocessor()
+    probe = LatencyProbe()
+    rng = random.Random(0)
+    frame_duration = 1.0 / args.fps
+    next_probe = time.perf_counter() + 0.5
+    last_motion = time.perf_counter()
+    deadline = time.perf_counter() + args.max_seconds
+
+    while len(probe.samples) < args.samples and time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        frame = capturer.capture()
+        t1 = time.perf_counter()
+        if frame is None:
+            continue
+        ctx = preprocessor.begin(frame)
+        boxes = detector.detect_objects(frame, ctx)['pacman']
+        t2 = time.perf_counter()
+
+        pos = None
+        if boxes:
+            # Neighbouring matches of the same sprite: their mean center is steadier than any one box
+            x0, y0 = boxes[0][:2]
+            near = [(x + w / 2.0, y + h / 2.0) for x, y, w, h in boxes if abs(x - x0) <= w and abs(y - y0) <= h]
+            pos = (sum(p[0] for p in near) / len(near), sum(p[1] for p in near) / len(near))
+        before = probe.direction
+        sample = probe.observe(pos, t0, t1, t2)
+        if sample:
+            print(f"  sample {len(probe.samples):3d}: total {sample['total'] * 1000:6.1f} ms "
+                  f"(response {sample['response'] * 1000:5.1f}, capture {sample['capture'] * 1000:4.1f}, "
+                  f"processing {sample['processing'] * 1000:4.1f})")
+        if probe.direction != before or sample:
+            last_motion = t2
+
+        now = time.perf_counter()
+        if not probe.pending:
+            if now - last_motion > 0.5:
+                # Stuck against a wall: get moving again (not measured)
+                controller.press_key(rng.choice(list(DIRECTIONS)), args.press_duration)
+                last_motion = time.perf_counter()
+            elif probe.direction and now >= next_probe:
+                # Reversals are always legal and take effect at once, so they isolate the latency
+                action = OPPOSITE[probe.direction]
+                t_sent = time.perf_counter()
+                controller.press_key(action, args.press_duration)
+                probe.action_sent(action, t_sent)
+                next_probe = time.perf_counter() + rng.uniform(0.3, 0.7)
+
+        elapsed = time.perf_counter() - t0
+        if elapsed < frame_duration:
+            time.sleep(frame_duration - elapsed)
+
+    summary = probe.summary()
+    print(f"\n--- Action-to-observation latency ({summary['count']} samples, {summary['timeouts']} timeouts, "
+          f"{args.fps:.0f} FPS, key hold {args.press_duration * 1000:.0f} ms) ---")
+    print(f"{'component':<11} {'mean':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}  (ms)")
+    for name in COMPONENTS:
+        s = summary[name]
+        if s:
+            print(f"{name:<11} {s['mean']:7.1f} {s['p50']:7.1f} {s['p90']:7.1f} {s['p99']:7.1f} {s['max']:7.1f}")
+    if not args.live:
+        floor = (args.input_delay + args.display_delay) * 1000
+        print(f"Simulator floor (input + display delay): {floor:.0f} ms, plus up to one tick and one frame interval.")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary, 'samples': probe.samples, 'args': vars(args)}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+    sys.exit(0 if probe.samples else 1)
+
+if __name__ == "__main__":
+    main()
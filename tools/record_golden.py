@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from utils.golden import GoldenWriter
+
+def record_sim(writer: GoldenWriter, frames: int, fps: float, stride: int, ghosts: int, seed: int, cell: int):
+    """
+    Frames from the simulator, labelled with its exact state.
+    Synthetic: flat sprites in the simulator's colours (capture/sim_game.py), not the real game's.
+    """
+    from capture.sim_game import SimGame
+    from vision.maze_graph import OPPOSITE
+    game = SimGame(ghosts=ghosts, seed=seed, cell=cell)
+    rng = random.Random(seed)
+    template_dir = tempfile.mkdtemp(prefix="pacman_sim_templates_")
+    game.write_templates(template_dir)
+    writer.add_templates(template_dir)
+
+    pellet_votes = np.zeros(game.grid.shape, dtype=np.int32)
+    for i in range(frames):
+        for _ in range(stride):
+            if rng.random() < 0.2:
+                # Any turn but a reversal; the game keeps it queued until it is possible
+                game.steer(rng.choice([d for d in ('UP', 'DOWN', 'LEFT', 'RIGHT') if d != OPPOSITE[game.direction]]))
+            game.step(1.0 / fps)
+        frame = game.render(game.pos, game.ghosts)
+        writer.add_frame(frame, game.cell_of(game.pos), [game.cell_of(g) for g in game.ghosts], game.grid)
+        pellet_votes += game.grid == 2
+    # The clean map is a median over all frames: a pellet is on it if it was there in most of them
+    writer.set_map(game.grid == 1, pellet_votes * 2 > frames)
+
+def record_capture(writer: GoldenWriter, source: str, frames: int, stride: int):
+    """Frames from the screen or a recorded session, labelled with the current vision stack's output."""
+    from vision.map_extractor import MapExtractor
+    from vision.object_detection_cv import create_detector
+    from vision.frame_context import FramePreprocessor
+    from vision.state_estimator import StateEstimator
+    if source == 'screen':
+        from capture.screen_capture import ScreenCapturer
+        capturer = ScreenCapturer(region=config.CAPTURE_REGION)
+    else:
+        from capture.replay_capture import ReplayCapturer
+        capturer = ReplayCapturer(source, loop=False)
+
+    captured = []
+    while len(captured) < frames:
+        frame = None
+        for _ in range(stride):
+            frame = capturer.capture()
+            if frame is None:
+                break
+            if source == 'screen':
+                time.sleep(1.0 / config.TARGET_FPS)
+        if frame is None:
+            break
+        captured.append(frame)
+    if not captured:
+        raise SystemExit(f"No frames from {source}")
+
+    extractor = MapExtractor()
+    extractor.frames = list(captured)
+    estimator = StateEstimator()
+    estimator.initialize_from_map(extractor.extract_clean_map())
+    writer.set_map(estimator.maze.walls.astype(bool), estimator.grid == 2)
+    detector = create_detector(estimator)
+    if os.path.isdir(config.TEMPLATE_DIR):
+        writer.add_templates(config.TEMPLATE_DIR)
+    preprocessor = FramePreprocessor()
+    for frame in captured:
+        ctx = preprocessor.begin(frame)
+        state = estimator.update(detector.detect_objects(frame, ctx), frame, ctx)
+        writer.add_frame(frame, state['pacman_pos'], list(state['ghost_positions']), state['grid'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a labelled golden corpus for tools/vision_regression.py.")
+    parser.add_argument('--source', default='sim',
+                        help="'sim' (exact labels), 'screen', or a recorded session / image folder "
+                             "(labels from the current vision stack: review and verify them with "
+                             "tools/label_golden.py before committing)")
+    parser.add_argument('--out', default=config.GOLDEN_DIR, help="Corpus directory")
+    parser.add_argument('--frames', type=int, default=40)
+    parser.add_argument('--stride', type=int, default=30, help="Game ticks / source frames between recorded frames")
+    parser.add_argument('--fps', type=float, default=60.0, help="Simulator tick rate")
+    parser.add_argument('--ghosts', type=int, default=2, help="Simulator ghosts")
+    parser.add_argument('--cell', type=int, default=8, help="Simulator cell size in pixels")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.out, 'manifest.json')):
+        raise SystemExit(f"{args.out} already holds a corpus; remove it or pick another --out")
+
+    writer = GoldenWriter(args.out, 'sim' if args.source == 'sim' else 'auto', config.GRID_SIZE)
+    if args.source == 'sim':
+        record_sim(writer, args.frames, args.fps, args.stride, args.ghosts, args.seed, args.cell)
+    else:
+        record_capture(writer, args.source, args.frames, args.stride)
+    manifest = writer.close()
+
+    print(f"Wrote {len(manifest['frames'])} labelled frames to {args.out} (labels: {manifest['source']}).")
+    if manifest['source'] == 'auto':
+        print("Labels come from the current vision stack: review and correct them, then mark them verified:")
+        print(f"  python tools/label_golden.py review {args.out}")
+        print(f"  python tools/label_golden.py verify {args.out} --by <name>")
+    print(f"Next: python tools/vision_regression.py --corpus {args.out} --update-baseline")
+
+if __name__ == "__main__":
+    main()
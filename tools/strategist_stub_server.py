@@ -0,0 +1,57 @@
+import sys
+import os
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Offline stand-in for Gemini, for use with ai_google.strategist.HttpTransport:
+#   python tools/strategist_stub_server.py --port 8765 --delay 0.5
+# then set STRATEGIST_URL = 'http://127.0.0.1:8765/advise' in config.py
+
+def make_handler(delay):
+    class StubHandler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            time.sleep(delay)  # Simulate network + model latency
+            StubHandler.requests_served += 1
+
+            image_kb = len(payload.get('image_b64') or '') * 3 / 4 / 1024
+            advice = f"Stub advice #{StubHandler.requests_served} for [{payload.get('summary')}] ({image_kb:.0f} KB image)"
+            body = json.dumps({'advice': advice}).encode('utf-8')
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            print(f"[stub] {fmt % args}")
+
+    return StubHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub for the Gemini strategist.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.5, help="Artificial response delay (s)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay))
+    print(f"Strategist stub listening on http://{args.host}:{args.port}/advise")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
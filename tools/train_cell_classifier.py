@@ -0,0 +1,181 @@
+import sys
+import os
+import time
+import argparse
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+import config
+from vision.cell_classifier import CellClassifier, extract_patches, CLASSES
+from vision.state_estimator import StateEstimator
+from utils.sample_maze import sample_grid
+
+def render_synthetic(rng: np.random.Generator, grid_w: int, grid_h: int):
+    """
+    Render a clean map of the sample maze at the configured capture size, with
+    the hard cases from geminiLumina/qa.md: pellets and bonuses with a dark
+    gradient halo, wall color per level, brightness jitter and sensor noise.
+    Returns (frame, labels) with labels in grid encoding (bonus counts as pellet).
+    """
+    pad = config.GRID_PADDING
+    width, height = config.CAPTURE_REGION['width'], config.CAPTURE_REGION['height']
+    cell_w = (width - pad['left'] - pad['right']) / grid_w
+    cell_h = (height - pad['top'] - pad['bottom']) / grid_h
+
+    labels = sample_grid()
+    if rng.random() < 0.5:
+        labels = labels[:, ::-1].copy()
+    # Some pellets already eaten
+    eaten = (labels == 2) & (rng.random(labels.shape) < rng.uniform(0.0, 0.8))
+    labels[eaten] = 0
+
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    wall_color = config.GAME_COLORS['WALLS'][rng.integers(len(config.GAME_COLORS['WALLS']))]
+    radius = max(1.0, min(cell_w, cell_h) * rng.uniform(0.15, 0.3))
+    for r in range(grid_h):
+        for c in range(grid_w):
+            x1, y1 = int(pad['left'] + c * cell_w), int(pad['top'] + r * cell_h)
+            x2, y2 = int(pad['left'] + (c + 1) * cell_w), int(pad['top'] + (r + 1) * cell_h)
+            if labels[r, c] == 1:
+                frame[y1:y2, x1:x2] = wall_color
+            elif labels[r, c] == 2:
+                center = ((x1 + x2) // 2, (y1 + y2) // 2)
+                if rng.random() < 0.03:
+                    color, halo, rad = config.GAME_COLORS['BONUS'][0], (110, 131, 203), radius * 1.8
+                else:
+                    color, halo, rad = config.GAME_COLORS['PELLETS'][0], config.GAME_COLORS['PELLETS'][1], radius
+                cv2.circle(frame, center, int(round(rad + 1)), halo, -1, lineType=cv2.LINE_AA)
+                cv2.circle(frame, center, int(round(rad)), color, -1, lineType=cv2.LINE_AA)
+
+    frame = cv2.GaussianBlur(frame, (3, 3), 0)
+    noisy = frame.astype(np.float32) * rng.uniform(0.8, 1.15) + rng.normal(0, 6, frame.shape)
+    return np.clip(noisy, 0, 255).astype(np.uint8), labels
+
+def golden_frames(corpus_dir: str, grid_w: int, grid_h: int):
+    """
+    (frame, grid, keep) per frame of a golden corpus (tools/record_golden.py).
+    Only ground-truth corpora are used: 'sim' (labels from the simulator) or
+    'verified' (a recorded session whose labels were corrected by hand with
+    tools/label_golden.py). An unreviewed 'auto' corpus is labelled by the color
+    rules themselves and would only teach the classifier to copy them. `keep`
+    drops the cells next to Pac-Man or a ghost, since the sprite hides what is underneath.
+    """
+    from utils.golden import load_corpus, decode_grid, GROUND_TRUTH_SOURCES, MANIFEST_FILENAME
+    if not os.path.exists(os.path.join(corpus_dir, MANIFEST_FILENAME)):
+        print(f"{corpus_dir}: not a golden corpus. To train on a logged session, record it with "
+              f"tools/record_golden.py --source {corpus_dir} and verify its labels with tools/label_golden.py.")
+        return []
+    manifest, frames = load_corpus(corpus_dir)
+    if manifest.get('source') not in GROUND_TRUTH_SOURCES:
+        print(f"{corpus_dir}: labels are '{manifest.get('source')}', not ground truth "
+              f"(verify them with tools/label_golden.py); skipped.")
+        return []
+    if tuple(manifest['grid_size']) != (grid_w, grid_h):
+        print(f"{corpus_dir}: grid size {manifest['grid_size']} does not match GRID_SIZE; skipped.")
+        return []
+    samples = []
+    for entry, frame in zip(manifest['frames'], frames):
+        grid = decode_grid(entry['grid'])
+        keep = np.ones(grid.shape, dtype=bool)
+        for pos in [entry.get('pacman')] + list(entry.get('ghosts') or []):
+            if pos:
+                x, y = pos
+                keep[max(0, y - 1):y + 2, max(0, x - 1):x + 2] = False
+        samples.append((frame, grid, keep))
+    return samples
+
+def compare(title: str, model, estimator, samples, grid_w: int, grid_h: int):
+    """Accuracy, per-class recall and time per map of the color rules and the classifier on `samples`."""
+    totals = {'rules': [0, 0.0], 'classifier': [0, 0.0]}  # correct cells, seconds
+    per_class = {name: np.zeros((len(CLASSES), 2), dtype=np.int64) for name in totals}
+    cells = 0
+    for frame, grid, keep in samples:
+        cells += int(keep.sum())
+
+        t0 = time.perf_counter()
+        rules = estimator.build_maze(frame, use_classifier=False).snapshot()
+        totals['rules'][1] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        learned = model.classify_frame(frame, grid_w, grid_h)
+        totals['classifier'][1] += time.perf_counter() - t0
+
+        for name, pred in (('rules', rules), ('classifier', learned)):
+            hit = (pred == grid) & keep
+            totals[name][0] += int(hit.sum())
+            for k in range(len(CLASSES)):
+                per_class[name][k] += (hit & (grid == k)).sum(), ((grid == k) & keep).sum()
+
+    print(f"\n--- Held-out comparison: {title} ({len(samples)} maps, {cells} cells) ---")
+    print(f"{'method':<11} {'accuracy':>9} " + ' '.join(f'{n.lower():>8}' for n in CLASSES) + f" {'ms/map':>8}")
+    for name, (correct, seconds) in totals.items():
+        recalls = ' '.join(f'{c / t:>8.1%}' if t else f"{'-':>8}" for c, t in per_class[name])
+        print(f"{name:<11} {correct / max(1, cells):>9.2%} {recalls} {seconds / len(samples) * 1000:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the per-cell classifier and compare it with the color rules.")
+    parser.add_argument('corpora', nargs='*', help="Golden corpora with ground-truth labels ('sim' or 'verified') to train on")
+    parser.add_argument('--holdout', type=float, default=0.25,
+                        help="Fraction of each corpus' frames (the last ones) kept out of training for the comparison")
+    parser.add_argument('--synthetic', type=int, default=40, help="Rendered training maps")
+    parser.add_argument('--test', type=int, default=8, help="Rendered held-out maps for the comparison")
+    parser.add_argument('--out', default='assets/cell_classifier.npz', help="Where to save the weights")
+    parser.add_argument('--hidden', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    grid_w, grid_h = config.GRID_SIZE
+    rng = np.random.default_rng(args.seed)
+    features, labels = [], []
+
+    held_out = {}
+    for corpus_dir in args.corpora:
+        samples = golden_frames(corpus_dir, grid_w, grid_h)
+        if not samples:
+            continue
+        # Consecutive frames look alike, so the test frames are the tail rather than a random pick
+        split = len(samples) - int(round(len(samples) * args.holdout))
+        held_out[corpus_dir] = samples[split:]
+        for frame, grid, keep in samples[:split]:
+            features.append(extract_patches(frame, grid_w, grid_h)[keep.ravel()])
+            labels.append(grid.ravel()[keep.ravel()])
+        print(f"{corpus_dir}: {split} training frames, {len(samples) - split} held out")
+
+    for _ in range(args.synthetic):
+        frame, grid = render_synthetic(rng, grid_w, grid_h)
+        features.append(extract_patches(frame, grid_w, grid_h))
+        labels.append(grid.ravel())
+    if not features:
+        print("No training data.")
+        sys.exit(1)
+
+    x = np.concatenate(features)
+    y = np.concatenate(labels).astype(np.int64)
+    print(f"Training on {len(x)} cells ({', '.join(f'{n}: {int((y == i).sum())}' for i, n in enumerate(CLASSES))})...")
+    t0 = time.perf_counter()
+    model = CellClassifier.train(x, y, hidden=args.hidden, epochs=args.epochs, seed=args.seed)
+    print(f"Trained in {time.perf_counter() - t0:.1f}s")
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    model.save(args.out)
+    print(f"Saved weights to {args.out}")
+
+    # --- Held-out comparison with the color rules ---
+    estimator = StateEstimator()
+    test_rng = np.random.default_rng(args.seed + 1000)
+    rendered = []
+    for _ in range(args.test):
+        frame, grid = render_synthetic(test_rng, grid_w, grid_h)
+        rendered.append((frame, grid, np.ones(grid.shape, dtype=bool)))
+    if rendered:
+        compare("rendered maps", model, estimator, rendered, grid_w, grid_h)
+    for corpus_dir, samples in held_out.items():
+        if samples:
+            compare(f"last frames of {corpus_dir}", model, estimator, samples, grid_w, grid_h)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+import argparse
+
+# Add parent directory to path to find config.py
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from utils.golden import (evaluate_corpus, load_baseline, load_manifest, save_baseline, check, latency_scale,
+                          ACCURACY_METRICS, LATENCY_METRICS, REFERENCE_METRIC, DEFAULT_TOLERANCE, SETTINGS,
+                          GROUND_TRUTH_SOURCES)
+
+def run_corpus(corpus: str, args, overrides: dict) -> tuple:
+    """Evaluate one corpus under its baseline's settings; returns (ok, metrics)."""
+    baseline = load_baseline(corpus)
+    metrics, settings = evaluate_corpus(corpus, overrides, args.repeat, args.templates, args.verbose)
+
+    expected = baseline['metrics'] if baseline else {}
+    manifest = load_manifest(corpus)
+    print(f"Golden corpus {corpus}: {metrics['frames']} frames, labels '{manifest['source']}' "
+          f"(detector {settings['DETECTOR'] or 'template'}, vision mode {settings['VISION_MODE'] or 'full'})")
+    if manifest['source'] not in GROUND_TRUTH_SOURCES:
+        print("  Warning: unreviewed labels (the vision stack's own output); see tools/label_golden.py")
+    for name in ACCURACY_METRICS + LATENCY_METRICS + (REFERENCE_METRIC,):
+        if name not in metrics:
+            continue
+        ref = f"  (baseline {expected[name]:.4f})" if name in expected else ""
+        print(f"  {name:<18} {metrics[name]:10.4f}{ref}")
+    if baseline:
+        print(f"  Latency baselines scaled by {latency_scale(metrics, baseline):.2f} (reference workload)")
+
+    if args.update_baseline:
+        tolerance = dict(DEFAULT_TOLERANCE, **baseline.get('tolerance', {})) if baseline else dict(DEFAULT_TOLERANCE)
+        save_baseline(corpus, metrics, tolerance, settings)
+        print("Baseline updated.")
+        return True, metrics
+    if baseline is None:
+        print("No baseline yet: run with --update-baseline to create one.")
+        return False, metrics
+    recorded = baseline.get('settings', {})
+    if recorded and any(settings[k] != recorded.get(k, settings[k]) for k in SETTINGS):
+        print(f"Note: the baseline was measured with {recorded}.")
+
+    failures = check(metrics, baseline, timing=not args.no_timing)
+    if failures:
+        print("REGRESSION:")
+        for line in failures:
+            print(f"  {line}")
+        return False, metrics
+    print("OK: no regression against the baseline.")
+    return True, metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the vision stack over the golden corpora and compare each with its committed baseline "
+                                                 "(measured with the detector / vision mode recorded in it; latencies relative "
+                                                 "to a reference workload timed in the same run). "
+                                                 "Exits with status 1 on a regression.")
+    parser.add_argument('--corpus', nargs='+', default=None,
+                        help="Corpus directories (tools/record_golden.py; default: config.GOLDEN_DIRS)")
+    parser.add_argument('--templates', default=None, help="Template directory (default: the corpus' own templates)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs to take the fastest latency from (less timing noise)")
+    parser.add_argument('--no-timing', action='store_true', help="Only gate on accuracy (e.g. on a slower machine)")
+    parser.add_argument('--update-baseline', action='store_true', help="Write the current results as the new baseline")
+    parser.add_argument('--json', type=str, default=None, help="Write the metrics to this file (keyed by corpus)")
+    parser.add_argument('--verbose', action='store_true', help="Keep the vision stack's own output")
+    parser.add_argument('--detector', choices=['template', 'background'], default=None, help="Override the baseline's / config's DETECTOR")
+    parser.add_argument('--vision-mode', choices=['full', 'tile'], default=None, help="Override the baseline's / config's VISION_MODE")
+    args = parser.parse_args()
+
+    corpora = args.corpus or getattr(config, 'GOLDEN_DIRS', [config.GOLDEN_DIR])
+    overrides = {'DETECTOR': args.detector, 'VISION_MODE': args.vision_mode}
+    ok = True
+    results = {}
+    for corpus in corpora:
+        passed, results[corpus] = run_corpus(corpus, args, overrides)
+        ok = ok and passed
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
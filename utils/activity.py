@@ -0,0 +1,118 @@
+import math
+import time
+from typing import Dict
+import cv2
+import numpy as np
+import config
+
+
+class ActivityMonitor:
+    """
+    Decides whether the game is active or idle (paused, menu, frozen screen) from
+    cheap frame differences, so the loop can drop to a low rate while idle.
+
+    Each frame the maze ROI is downscaled about `downscale` times (the shared
+    FrameContext pyramid level, rounded to a power of two) to a small gray image
+    and compared with the previous one. The frame counts as
+    motion when at least `min_pixels` small pixels changed by more than
+    `pixel_threshold` gray levels. After `idle_after` seconds without motion the
+    mode becomes 'idle'; the first frame with motion switches back to 'active'.
+    Time spent in each mode is accumulated in `time_in_mode`.
+    """
+
+    ACTIVE = 'active'
+    IDLE = 'idle'
+
+    def __init__(self, idle_fps: float = None, idle_after: float = None, downscale: int = None,
+                 pixel_threshold: int = None, min_pixels: int = None):
+        self.idle_fps = idle_fps if idle_fps is not None else getattr(config, 'IDLE_FPS', 4)
+        self.idle_after = idle_after if idle_after is not None else getattr(config, 'IDLE_AFTER_SECONDS', 1.5)
+        self.downscale = downscale if downscale is not None else getattr(config, 'ACTIVITY_DOWNSCALE', 4)
+        self.pixel_threshold = pixel_threshold if pixel_threshold is not None else getattr(config, 'ACTIVITY_PIXEL_THRESHOLD', 12)
+        self.min_pixels = min_pixels if min_pixels is not None else getattr(config, 'ACTIVITY_MIN_PIXELS', 4)
+        # pyrDown levels that halve the ROI until it is about `downscale` times smaller
+        self.level = max(0, int(round(math.log2(max(1, self.downscale)))))
+
+        self.mode = self.ACTIVE
+        self.time_in_mode: Dict[str, float] = {self.ACTIVE: 0.0, self.IDLE: 0.0}
+        self.frames_in_mode: Dict[str, int] = {self.ACTIVE: 0, self.IDLE: 0}
+        self.switches = 0
+        self.last_changed = 0   # Changed pixels in the last comparison
+
+        self._prev = None
+        self._small = None
+        self._diff = None
+        self._pre = None    # Own FramePreprocessor for callers without a context
+        self._last_motion = time.perf_counter()
+        self._mode_since = self._last_motion
+
+    def _downscaled(self, ctx) -> np.ndarray:
+        """The context's pyramid level as gray, in a buffer of our own (the context's is reused next frame)."""
+        image = ctx.pyramid(self.level)
+        if self._small is None or self._small.shape != image.shape[:2]:
+            self._small = np.empty(image.shape[:2], dtype=np.uint8)
+        if image.ndim == 3:
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._small)
+        else:
+            np.copyto(self._small, image)
+        return self._small
+
+    def observe(self, frame: np.ndarray, ctx=None) -> bool:
+        """Feed one frame (and its FrameContext, if any); returns True if the loop should run at full rate."""
+        now = time.perf_counter()
+        if ctx is None:
+            if self._pre is None:
+                from vision.frame_context import FramePreprocessor
+                self._pre = FramePreprocessor()
+            ctx = self._pre.begin(frame)
+        small = self._downscaled(ctx)
+
+        motion = True
+        if self._prev is not None and self._prev.shape == small.shape:
+            if self._diff is None or self._diff.shape != small.shape:
+                self._diff = np.empty_like(small)
+            cv2.absdiff(small, self._prev, dst=self._diff)
+            self.last_changed = int(np.count_nonzero(self._diff > self.pixel_threshold))
+            motion = self.last_changed >= self.min_pixels
+        # Swap the buffers: this frame becomes the reference, the old one is overwritten next
+        self._prev, self._small = small, self._prev
+
+        if motion:
+            self._last_motion = now
+        mode = self.ACTIVE if motion or now - self._last_motion < self.idle_after else self.IDLE
+        if mode != self.mode:
+            self._switch(mode, now)
+        self.frames_in_mode[self.mode] += 1
+        return self.mode == self.ACTIVE
+
+    def _switch(self, mode: str, now: float):
+        self.time_in_mode[self.mode] += now - self._mode_since
+        self.mode = mode
+        self._mode_since = now
+        self.switches += 1
+
+    def frame_rate(self, full_fps: float) -> float:
+        """Loop rate for the current mode."""
+        return full_fps if self.mode == self.ACTIVE else min(full_fps, self.idle_fps)
+
+    def stats(self) -> Dict[str, float]:
+        """Seconds and frames per mode so far, plus the number of mode switches."""
+        now = time.perf_counter()
+        seconds = dict(self.time_in_mode)
+        seconds[self.mode] += now - self._mode_since
+        return {
+            'mode': self.mode,
+            'active_s': seconds[self.ACTIVE],
+            'idle_s': seconds[self.IDLE],
+            'active_frames': self.frames_in_mode[self.ACTIVE],
+            'idle_frames': self.frames_in_mode[self.IDLE],
+            'switches': self.switches,
+        }
+
+    def print_summary(self):
+        s = self.stats()
+        total = s['active_s'] + s['idle_s']
+        idle_share = s['idle_s'] / total * 100 if total > 0 else 0.0
+        print(f"Activity: {s['active_s']:.1f}s active ({s['active_frames']} frames), "
+              f"{s['idle_s']:.1f}s idle ({s['idle_frames']} frames, {idle_share:.0f}% of the time), "
+              f"{s['switches']} mode switches")
@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Set
+import config
+
+# What each state field is derived from in the StateEstimator output
+STATE_FIELDS = ('pacman', 'ghosts', 'pellets', 'map')
+
+
+def _state_values(game_state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'pacman': game_state.get('pacman_pos'),
+        'ghosts': tuple(sorted(game_state.get('ghost_positions') or [])),
+        'pellets': (game_state.get('pellets_remaining'), game_state.get('pellets_total')),
+        # The graph object is replaced when a new map is installed (compared by identity)
+        'map': game_state.get('graph'),
+    }
+
+
+class ChangeTracker:
+    """
+    Tells downstream stages whether their inputs changed since they last ran.
+
+    `update(game_state)` compares the state with the previous frame, bumps
+    `version` when anything changed and records which fields did (`changed`).
+    Derived inputs such as the chosen action are added with `note()`.
+    Stages are registered with the inputs they depend on; `should_run(stage)`
+    is True when one of them changed since the stage last ran, or when the
+    stage has been idle for `refresh_frames` frames (a safety net against
+    missed key presses and the like).
+
+    Skipped invocations are counted per stage, and the CPU time saved is
+    estimated from the stage's measured average cost (see `timed()`).
+    """
+
+    def __init__(self, enabled: bool = True, refresh_frames: int = None):
+        self.enabled = enabled
+        self.refresh_frames = refresh_frames if refresh_frames is not None else getattr(config, 'CHANGE_REFRESH_FRAMES', 15)
+        self.version = 0
+        self.frame = 0
+        self.changed: Set[str] = set()
+        self._values: Dict[str, Any] = {}
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    # --- State ---
+
+    def update(self, game_state: Dict[str, Any]) -> Set[str]:
+        """Start a frame: diff the state against the previous one. Returns the changed fields."""
+        self.frame += 1
+        self.changed = set()
+        for name, value in _state_values(game_state).items():
+            self.note(name, value)
+        return self.changed
+
+    def note(self, name: str, value: Any) -> bool:
+        """Record a derived input for this frame (e.g. the action). Returns True if it changed."""
+        if name in self._values and self._values[name] == value:
+            return False
+        self._values[name] = value
+        if name not in self.changed:
+            self.changed.add(name)
+            if len(self.changed) == 1:
+                self.version += 1
+        return True
+
+    @property
+    def diff(self) -> Dict[str, Any]:
+        """Compact description of this frame's change."""
+        return {'version': self.version, 'frame': self.frame, 'changed': sorted(self.changed)}
+
+    # --- Stages ---
+
+    def stage(self, name: str, inputs: Iterable[str]):
+        """Register a stage that only needs to run when one of `inputs` changed."""
+        self._stages[name] = {'inputs': set(inputs), 'seen': set(), 'last_run': None,
+                              'runs': 0, 'skipped': 0, 'cpu': 0.0, 'wall': 0.0}
+
+    def should_run(self, name: str) -> bool:
+        """Whether the stage has to run this frame (counts a skip when it does not)."""
+        stage = self._stages[name]
+        if self.changed:
+            stage['seen'] |= self.changed & stage['inputs']
+        due = (not self.enabled or stage['last_run'] is None or stage['seen']
+               or (self.refresh_frames and self.frame - stage['last_run'] >= self.refresh_frames))
+        if not due:
+            stage['skipped'] += 1
+            return False
+        stage['seen'] = set()
+        stage['last_run'] = self.frame
+        stage['runs'] += 1
+        return True
+
+    @contextmanager
+    def timed(self, name: str):
+        """Add the enclosed work to the stage's cost (thread CPU time and wall time); may be used more than once per run."""
+        stage = self._stages[name]
+        cpu0, wall0 = time.thread_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            stage['cpu'] += time.thread_time() - cpu0
+            stage['wall'] += time.perf_counter() - wall0
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: runs, skipped, average cost and estimated savings (ms)."""
+        out = {}
+        for name, s in self._stages.items():
+            runs = max(1, s['runs'])
+            out[name] = {
+                'runs': s['runs'],
+                'skipped': s['skipped'],
+                'avg_cpu_ms': s['cpu'] / runs * 1000.0,
+                'saved_cpu_ms': s['cpu'] / runs * s['skipped'] * 1000.0,
+                'saved_wall_ms': s['wall'] / runs * s['skipped'] * 1000.0,
+            }
+        return out
+
+    def print_summary(self):
+        report = self.report()
+        skipped = sum(r['skipped'] for r in report.values())
+        saved = sum(r['saved_cpu_ms'] for r in report.values())
+        print(f"Change gating: {self.frame} frames, {self.version} state versions, "
+              f"{skipped} stage runs skipped, ~{saved:.0f} ms CPU saved")
+        for name, r in report.items():
+            print(f"  {name:<10} ran {r['runs']:6d}  skipped {r['skipped']:6d}  avg {r['avg_cpu_ms']:6.2f} ms CPU  "
+                  f"saved ~{r['saved_cpu_ms']:8.0f} ms CPU / {r['saved_wall_ms']:8.0f} ms wall")
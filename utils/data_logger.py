@@ -1,6 +1,5 @@
 import os
 import json
-import cv2
 import time
 import datetime
 from typing import Dict, Any
@@ -9,13 +8,18 @@ class DataLogger:
     """
     Logs game data (frames and state) for analysis and training.
     """
+    # State fields left out of the log: the maze graph (game_state['graph']) is
+    # not JSON-serialisable and is rebuilt from the walls in the logged grid
+    EXCLUDED_FIELDS = ('graph',)
+
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = log_dir
         self.session_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         self.session_dir = os.path.join(self.log_dir, self.session_id)
         
-        # Create directories
-        os.makedirs(os.path.join(self.session_dir, "frames"), exist_ok=True)
+        # Directories are created on the first saved frame, so runs with
+        # logging disabled don't leave empty session folders behind
+        self._dirs_ready = False
         
         self.log_file = os.path.join(self.session_dir, "data.jsonl")
         self.frame_count = 0
@@ -58,6 +62,10 @@ class DataLogger:
         self.last_decision = action
         
     def _save_log(self, frame, game_state, action, reason):
+        import cv2
+        if not self._dirs_ready:
+            os.makedirs(os.path.join(self.session_dir, "frames"), exist_ok=True)
+            self._dirs_ready = True
         timestamp = time.time()
         frame_filename = f"frame_{self.frame_count:06d}.jpg"
         frame_path = os.path.join(self.session_dir, "frames", frame_filename)
@@ -67,7 +75,8 @@ class DataLogger:
         
         # Prepare log entry
         # Convert numpy types to python types for JSON serialization
-        serializable_state = self._make_serializable(game_state)
+        serializable_state = self._make_serializable(
+            {k: v for k, v in game_state.items() if k not in self.EXCLUDED_FIELDS})
         
         entry = {
             "frame_id": self.frame_count,
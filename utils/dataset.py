@@ -0,0 +1,330 @@
+import os
+import json
+import random
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+DATASET_FORMAT_VERSION = 1
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+# Ghost positions are stored as a fixed-width column, padded with -1
+MAX_GHOSTS = 4
+
+# Columns of the per-shard state/action table: name -> dtype
+COLUMNS = {
+    'session': np.int16,
+    'frame_id': np.int32,
+    'timestamp': np.float64,
+    'action': np.int8,           # Index into ACTIONS, -1 if unknown
+    'pacman': np.int16,          # (x, y), -1 if not seen
+    'ghosts': np.int16,          # (MAX_GHOSTS, 2), -1 padded
+    'pellets_remaining': np.int16,
+    'pellets_total': np.int16,
+}
+
+
+# --- Raw sessions (as written by utils/data_logger.py) ---
+
+def read_session(session_dir: str) -> List[Dict[str, Any]]:
+    """Entries of a DataLogger session, in recording order."""
+    entries = []
+    with open(os.path.join(session_dir, 'data.jsonl')) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def _row(entry: Dict[str, Any], session: int) -> Dict[str, Any]:
+    """Flatten one log entry into table columns."""
+    state = entry.get('state') or {}
+    pos = state.get('pacman_pos')
+    ghosts = np.full((MAX_GHOSTS, 2), -1, dtype=np.int16)
+    for i, g in enumerate((state.get('ghost_positions') or [])[:MAX_GHOSTS]):
+        ghosts[i] = g
+    action = entry.get('action')
+    return {
+        'session': session,
+        'frame_id': entry.get('frame_id', -1),
+        'timestamp': entry.get('timestamp', 0.0),
+        'action': ACTIONS.index(action) if action in ACTIONS else -1,
+        'pacman': pos if pos else (-1, -1),
+        'ghosts': ghosts,
+        'pellets_remaining': state.get('pellets_remaining', -1),
+        'pellets_total': state.get('pellets_total', -1),
+    }
+
+
+# --- Writer ---
+
+class ShardWriter:
+    """
+    Packs logged frames into fixed-size shards under `out_dir`:
+
+    - shard_NNNNN.frames.npy   (N, H, W, 3) uint8 decoded frames (memory-mappable), or
+      shard_NNNNN.jpeg.bin + the 'jpeg_offsets' column for compressed frames,
+    - shard_NNNNN.table.npz    one array per column (see COLUMNS),
+    - index.json               format, frame shape, sessions and shard sizes.
+
+    All frames are resized to one shape so a batch is a single array.
+    """
+
+    def __init__(self, out_dir: str, shard_size: int = 1024, encoding: str = 'raw',
+                 frame_size: Optional[Tuple[int, int]] = None, jpeg_quality: int = 90):
+        if encoding not in ('raw', 'jpeg'):
+            raise ValueError(f"Unknown encoding: {encoding}")
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.encoding = encoding
+        self.frame_size = frame_size  # (width, height); taken from the first frame if None
+        self.jpeg_quality = jpeg_quality
+
+        self.sessions: List[str] = []
+        self.shards: List[Dict[str, Any]] = []
+        self._frames: List[np.ndarray] = []
+        self._rows: List[Dict[str, Any]] = []
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add_session(self, session_dir: str) -> int:
+        """Append every logged frame of a session. Returns the number of frames added."""
+        import cv2
+        session = len(self.sessions)
+        self.sessions.append(os.path.abspath(session_dir))
+        added = 0
+        for entry in read_session(session_dir):
+            frame = cv2.imread(os.path.join(session_dir, entry['image_file']))
+            if frame is None:
+                print(f"Skipping unreadable frame: {entry['image_file']}")
+                continue
+            if self.frame_size is None:
+                self.frame_size = (frame.shape[1], frame.shape[0])
+            if (frame.shape[1], frame.shape[0]) != tuple(self.frame_size):
+                frame = cv2.resize(frame, tuple(self.frame_size), interpolation=cv2.INTER_AREA)
+            self._frames.append(frame)
+            self._rows.append(_row(entry, session))
+            added += 1
+            if len(self._frames) >= self.shard_size:
+                self._flush()
+        return added
+
+    def _flush(self):
+        if not self._frames:
+            return
+        import cv2
+        name = f"shard_{len(self.shards):05d}"
+        table = {col: np.array([row[col] for row in self._rows], dtype=dtype) for col, dtype in COLUMNS.items()}
+
+        if self.encoding == 'raw':
+            np.save(os.path.join(self.out_dir, name + '.frames.npy'), np.stack(self._frames))
+        else:
+            offsets = [0]
+            with open(os.path.join(self.out_dir, name + '.jpeg.bin'), 'wb') as f:
+                for frame in self._frames:
+                    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    f.write(buf.tobytes())
+                    offsets.append(offsets[-1] + len(buf))
+            table['jpeg_offsets'] = np.array(offsets, dtype=np.int64)
+
+        np.savez(os.path.join(self.out_dir, name + '.table.npz'), **table)
+        self.shards.append({'name': name, 'count': len(self._frames)})
+        self._frames = []
+        self._rows = []
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the last (partial) shard and write the index."""
+        self._flush()
+        width, height = self.frame_size or (0, 0)
+        index = {
+            'version': DATASET_FORMAT_VERSION,
+            'encoding': self.encoding,
+            'frame_shape': [height, width, 3],
+            'actions': ACTIONS,
+            'columns': list(COLUMNS),
+            'sessions': self.sessions,
+            'shards': self.shards,
+            'total': sum(s['count'] for s in self.shards),
+        }
+        tmp_path = os.path.join(self.out_dir, 'index.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.out_dir, 'index.json'))
+        return index
+
+
+# --- Reader ---
+
+class ShardedDataset:
+    """
+    Random access to an exported dataset.
+    Raw frames are memory-mapped; the tables are small and loaded eagerly.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, 'index.json')) as f:
+            self.index = json.load(f)
+        if self.index.get('version') != DATASET_FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset version in {root}: {self.index.get('version')}")
+        self.encoding = self.index['encoding']
+        self.frame_shape = tuple(self.index['frame_shape'])
+
+        self._tables = []
+        for shard in self.index['shards']:
+            with np.load(os.path.join(root, shard['name'] + '.table.npz')) as data:
+                self._tables.append({k: data[k] for k in data.files})
+        counts = [s['count'] for s in self.index['shards']]
+        self._starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._frames = [None] * len(counts)
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def locate(self, i: int) -> Tuple[int, int]:
+        """(shard, row) of a global sample index."""
+        shard = int(np.searchsorted(self._starts, i, side='right')) - 1
+        return shard, i - int(self._starts[shard])
+
+    def column(self, name: str) -> np.ndarray:
+        """A whole column across all shards."""
+        return np.concatenate([t[name] for t in self._tables])
+
+    def _shard_frames(self, shard: int):
+        if self._frames[shard] is None:
+            name = self.index['shards'][shard]['name']
+            if self.encoding == 'raw':
+                self._frames[shard] = np.load(os.path.join(self.root, name + '.frames.npy'), mmap_mode='r')
+            else:
+                self._frames[shard] = np.memmap(os.path.join(self.root, name + '.jpeg.bin'), dtype=np.uint8, mode='r')
+        return self._frames[shard]
+
+    def frame(self, shard: int, row: int) -> np.ndarray:
+        frames = self._shard_frames(shard)
+        if self.encoding == 'raw':
+            return frames[row]
+        import cv2
+        offsets = self._tables[shard]['jpeg_offsets']
+        return cv2.imdecode(np.asarray(frames[offsets[row]:offsets[row + 1]]), cv2.IMREAD_COLOR)
+
+    def batch(self, indices: Sequence[int], out: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        Frames and table columns of the given samples, as stacked arrays.
+        Frames are written into `out` when given (e.g. a shared-memory slot).
+        """
+        frames = out if out is not None else np.empty((len(indices),) + self.frame_shape, dtype=np.uint8)
+        columns = {name: [] for name in COLUMNS}
+        for k, i in enumerate(indices):
+            shard, row = self.locate(i)
+            frames[k] = self.frame(shard, row)
+            table = self._tables[shard]
+            for name in COLUMNS:
+                columns[name].append(table[name][row])
+        out = {name: np.stack(values) if values else np.empty(0, dtype=COLUMNS[name]) for name, values in columns.items()}
+        out['frames'] = frames
+        return out
+
+
+# --- Parallel batch iterator ---
+
+_worker_dataset: Optional[ShardedDataset] = None
+_worker_slots: Dict[int, Tuple[Any, np.ndarray]] = {}
+
+
+def _init_worker(root: str):
+    global _worker_dataset
+    _worker_dataset = ShardedDataset(root)
+
+
+def _fill_slot(slot_name: str, slot: int, batch_size: int, indices: List[int]) -> Tuple[int, Dict[str, np.ndarray]]:
+    """Worker: write the batch's frames into a shared slot and return the (small) table columns."""
+    if slot not in _worker_slots:
+        shm = shared_memory.SharedMemory(name=slot_name)
+        view = np.ndarray((batch_size,) + _worker_dataset.frame_shape, dtype=np.uint8, buffer=shm.buf)
+        _worker_slots[slot] = (shm, view)
+    batch = _worker_dataset.batch(indices, out=_worker_slots[slot][1][:len(indices)])
+    del batch['frames']
+    return len(indices), batch
+
+
+class BatchLoader:
+    """
+    Streams shuffled batches of an exported dataset.
+
+    By default (`workers=0`) batches are loaded in the calling process. With
+    workers > 0, a pool of worker processes (each with its own memory maps)
+    assembles batches while the consumer works on earlier ones. Frames travel
+    through a ring of shared-memory slots rather than the result pipe, so only
+    the small table columns are pickled; each batch's frames are copied out of
+    their slot before it is yielded, so batches stay valid after the loader
+    moves on or finishes. The pool only pays off with spare cores: on one CPU
+    it is slower than loading in-process (tools/bench_dataset.py).
+    Each pass over the data is one epoch with a fresh shuffle.
+    """
+
+    def __init__(self, root: str, batch_size: int = 64, shuffle: bool = True, workers: int = 0,
+                 seed: int = None, drop_last: bool = False, prefetch: int = 2):
+        self.root = root
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.workers = workers
+        self.drop_last = drop_last
+        # Batches in flight per worker
+        self.prefetch = prefetch
+        self._rng = random.Random(seed)
+        self._dataset = ShardedDataset(root)
+
+    def __len__(self) -> int:
+        n = len(self._dataset)
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+    def _batches(self) -> List[List[int]]:
+        order = list(range(len(self._dataset)))
+        if self.shuffle:
+            self._rng.shuffle(order)
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches.pop()
+        return batches
+
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        batches = self._batches()
+        if self.workers <= 0:
+            for indices in batches:
+                yield self._dataset.batch(indices)
+            return
+
+        frame_shape = self._dataset.frame_shape
+        slot_bytes = max(1, self.batch_size * int(np.prod(frame_shape)))
+        slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(self.workers * self.prefetch)]
+        views = [np.ndarray((self.batch_size,) + frame_shape, dtype=np.uint8, buffer=shm.buf) for shm in slots]
+        try:
+            with mp.get_context().Pool(self.workers, initializer=_init_worker, initargs=(self.root,)) as pool:
+                todo = iter(batches)
+                free = deque(range(len(slots)))
+                pending = deque()
+
+                def submit():
+                    while free:
+                        indices = next(todo, None)
+                        if indices is None:
+                            return
+                        slot = free.popleft()
+                        args = (slots[slot].name, slot, self.batch_size, indices)
+                        pending.append((slot, pool.apply_async(_fill_slot, args)))
+
+                submit()
+                while pending:
+                    slot, result = pending.popleft()
+                    count, batch = result.get()
+                    # Copied out, so the slot can be refilled (and finally unlinked) under the consumer
+                    batch['frames'] = views[slot][:count].copy()
+                    free.append(slot)
+                    submit()
+                    yield batch
+        finally:
+            del views
+            for shm in slots:
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,369 @@
+import os
+import io
+import json
+import time
+import shutil
+import tempfile
+import contextlib
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+GOLDEN_FORMAT_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+BASELINE_FILENAME = 'baseline.json'
+
+# Metrics where higher is better; everything ending in _ms is a latency (lower is better)
+ACCURACY_METRICS = ('map_wall_acc', 'map_pellet_acc', 'grid_acc',
+                    'pacman_precision', 'pacman_recall', 'ghost_precision', 'ghost_recall')
+LATENCY_METRICS = ('frame_p50_ms', 'frame_p95_ms', 'frame_p99_ms', 'map_ms')
+# Fixed workload timed in the same run (see reference_ms()); latencies are compared relative to it
+REFERENCE_METRIC = 'reference_ms'
+# Allowed drift before check() reports a regression: absolute for accuracies, relative for latencies
+# (after scaling the baseline latencies by this run's reference / the baseline's reference).
+# A latency metric's own key overrides 'latency'. Three get 100%: map_ms is a single map build (best
+# of MAP_RUNS), whose large allocations swing it by up to ~70% between runs on an idle machine, and
+# over a 40-frame corpus frame_p95_ms / frame_p99_ms are the second-slowest / slowest frame, which one
+# scheduler preemption on a busy machine can double. frame_p50_ms keeps the 50% gate.
+DEFAULT_TOLERANCE = {'accuracy': 0.01, 'latency': 0.5, 'map_ms': 1.0, 'frame_p95_ms': 1.0, 'frame_p99_ms': 1.0}
+# Clean-map builds per evaluate(); map_ms is the fastest
+MAP_RUNS = 3
+# Config values a baseline records (see save_baseline()) and evaluate_corpus() runs with
+SETTINGS = ('DETECTOR', 'VISION_MODE')
+# Where a corpus' labels came from: the simulator's exact state, the vision stack's own output
+# (unreviewed), or 'auto' labels a person checked and corrected (tools/label_golden.py)
+LABEL_SOURCES = ('sim', 'auto', 'verified')
+# Sources that count as ground truth (e.g. for training, tools/train_cell_classifier.py)
+GROUND_TRUTH_SOURCES = ('sim', 'verified')
+# A detection matches a label this many cells away (sprites straddle cell borders)
+MATCH_RADIUS = 1
+
+
+# --- Corpus files ---
+#
+# <corpus>/manifest.json   version, source, grid size, map labels and one entry per frame
+# <corpus>/frames/*.png    the captured frames, in order
+# <corpus>/templates/      sprite templates the frames were recorded with (optional)
+# <corpus>/baseline.json   committed metrics, tolerances and the settings they were measured with (see check())
+#
+# Grids are stored as one string per row: '1' wall, '2' pellet, '0' empty.
+
+def encode_grid(grid: np.ndarray) -> List[str]:
+    return [''.join(str(int(v)) for v in row) for row in grid]
+
+
+def decode_grid(rows: List[str]) -> np.ndarray:
+    return np.array([[int(c) for c in row] for row in rows], dtype=np.uint8)
+
+
+class GoldenWriter:
+    """
+    Writes a golden corpus: frames with their labels, plus the labels of the clean map.
+
+    Labels are Pac-Man's cell (or None), the ghost cells and the full grid as
+    it was when the frame was shown. `source` says where the labels came from
+    (LABEL_SOURCES): 'sim' (exact, from the simulator) or 'auto' (the vision
+    stack's own output, to be reviewed and marked 'verified' with
+    tools/label_golden.py before the corpus is trusted).
+    """
+
+    def __init__(self, corpus_dir: str, source: str, grid_size: Tuple[int, int]):
+        self.corpus_dir = corpus_dir
+        self.source = source
+        self.grid_size = tuple(grid_size)
+        self.frames: List[Dict[str, Any]] = []
+        self.map_labels: Optional[Dict[str, Any]] = None
+        os.makedirs(os.path.join(corpus_dir, 'frames'), exist_ok=True)
+
+    def add_frame(self, frame: np.ndarray, pacman: Optional[Tuple[int, int]], ghosts: List[Tuple[int, int]],
+                  grid: np.ndarray):
+        import cv2
+        name = f"frames/frame_{len(self.frames):04d}.png"
+        cv2.imwrite(os.path.join(self.corpus_dir, name), frame)
+        self.frames.append({
+            'image': name,
+            'pacman': list(pacman) if pacman else None,
+            'ghosts': [list(g) for g in ghosts],
+            'grid': encode_grid(grid),
+        })
+
+    def set_map(self, walls: np.ndarray, pellets: np.ndarray):
+        """Labels for the clean map extracted from all frames (walls and pellets as bool grids)."""
+        grid = np.where(walls, 1, np.where(pellets, 2, 0)).astype(np.uint8)
+        self.map_labels = {'grid': encode_grid(grid)}
+
+    def add_templates(self, template_dir: str):
+        out = os.path.join(self.corpus_dir, 'templates')
+        os.makedirs(out, exist_ok=True)
+        for name in sorted(os.listdir(template_dir)):
+            if name.lower().endswith('.png'):
+                shutil.copy(os.path.join(template_dir, name), os.path.join(out, name))
+
+    def close(self) -> Dict[str, Any]:
+        manifest = {
+            'version': GOLDEN_FORMAT_VERSION,
+            'source': self.source,
+            'grid_size': list(self.grid_size),
+            'map': self.map_labels,
+            'frames': self.frames,
+        }
+        save_manifest(self.corpus_dir, manifest)
+        return manifest
+
+
+def load_manifest(corpus_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(corpus_dir, MANIFEST_FILENAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != GOLDEN_FORMAT_VERSION:
+        raise ValueError(f"Unsupported golden corpus version {manifest.get('version')} in {corpus_dir}")
+    return manifest
+
+
+def save_manifest(corpus_dir: str, manifest: Dict[str, Any]):
+    if manifest.get('source') not in LABEL_SOURCES:
+        raise ValueError(f"Unknown label source {manifest.get('source')!r}")
+    with open(os.path.join(corpus_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def load_corpus(corpus_dir: str) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """Manifest and decoded frames of a golden corpus."""
+    import cv2
+    manifest = load_manifest(corpus_dir)
+    frames = []
+    for entry in manifest['frames']:
+        frame = cv2.imread(os.path.join(corpus_dir, entry['image']))
+        if frame is None:
+            raise IOError(f"Unreadable golden frame: {entry['image']}")
+        frames.append(frame)
+    return manifest, frames
+
+
+# --- Evaluation ---
+
+def _match(predicted: List[Tuple[int, int]], labels: List[Tuple[int, int]]) -> int:
+    """Greedy one-to-one matching within MATCH_RADIUS cells (Chebyshev); returns the number of matches."""
+    free = list(labels)
+    hits = 0
+    for p in predicted:
+        for i, l in enumerate(free):
+            if max(abs(p[0] - l[0]), abs(p[1] - l[1])) <= MATCH_RADIUS:
+                del free[i]
+                hits += 1
+                break
+    return hits
+
+
+def _ratio(num: int, den: int) -> float:
+    return num / den if den else 1.0
+
+
+def evaluate(corpus_dir: str, template_dir: str = None, verbose: bool = False) -> Dict[str, float]:
+    """
+    Run the vision stack over a corpus and score it against the labels.
+
+    MapExtractor builds the clean map from every frame and StateEstimator
+    classifies it (map_wall_acc / map_pellet_acc, per cell). Each frame then
+    goes through FramePreprocessor -> detector (config.DETECTOR) -> StateEstimator.update
+    like the main loop: grid_acc compares the estimator's grid with the frame's
+    label, and the Pac-Man / ghost cells give precision and recall. Per-frame
+    latency covers those three stages. reference_ms is the fixed workload timed
+    before and after the run (the faster of the two). Returns a flat metrics dict.
+    """
+    manifest, frames = load_corpus(corpus_dir)
+    reference = reference_ms()
+    if template_dir is None:
+        template_dir = os.path.join(corpus_dir, 'templates')
+    # Work on a copy: the detector compiles a template bank next to the PNGs
+    work_dir = tempfile.mkdtemp(prefix="pacman_golden_")
+    if os.path.isdir(template_dir):
+        shutil.copytree(template_dir, os.path.join(work_dir, 'templates'))
+
+    # The stack prints per-event debug lines ("Nom nom!") that would drown the report
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            metrics = _run(manifest, frames, os.path.join(work_dir, 'templates'))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    metrics['frames'] = len(frames)
+    metrics[REFERENCE_METRIC] = min(reference, reference_ms())
+    return metrics
+
+
+def evaluate_corpus(corpus_dir: str, overrides: Dict[str, str] = None, repeat: int = 1, template_dir: str = None,
+                    verbose: bool = False) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """
+    evaluate() with the config SETTINGS the corpus' baseline was measured with
+    (or `overrides`, for the ones given), restored afterwards. Accuracy is
+    deterministic; latencies and the reference take the best of `repeat` runs.
+    Returns (metrics, settings used).
+    """
+    import config
+    baseline = load_baseline(corpus_dir)
+    recorded = baseline.get('settings', {}) if baseline else {}
+    overrides = overrides or {}
+    saved = {name: getattr(config, name, None) for name in SETTINGS}
+    for name in SETTINGS:
+        value = overrides.get(name) or recorded.get(name)
+        if value:
+            setattr(config, name, value)
+    try:
+        runs = [evaluate(corpus_dir, template_dir, verbose) for _ in range(max(1, repeat))]
+        settings = {name: getattr(config, name, None) for name in SETTINGS}
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+    metrics = dict(runs[0])
+    for name in LATENCY_METRICS + (REFERENCE_METRIC,):
+        metrics[name] = min(r[name] for r in runs)
+    return metrics, settings
+
+
+def reference_ms(repeat: int = 15) -> float:
+    """
+    Milliseconds for a fixed, vision-like workload (template matching, an area
+    resize and a median over frames on seeded synthetic images), best of `repeat`.
+    Timed in the same run as the corpus, it tells how fast the machine is right
+    now, so latencies are compared with the baseline relative to it.
+    """
+    import cv2
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(5, 248, 224, 3), dtype=np.uint8)
+    template = np.ascontiguousarray(frames[0, 100:124, 100:124])
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        cv2.matchTemplate(frames[1], template, cv2.TM_CCOEFF_NORMED)
+        cv2.resize(frames[2], (28, 31), interpolation=cv2.INTER_AREA)
+        np.median(frames, axis=0)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _run(manifest, frames, template_dir: str) -> Dict[str, float]:
+    from vision.map_extractor import MapExtractor
+    from vision.object_detection_cv import create_detector
+    from vision.frame_context import FramePreprocessor
+    from vision.state_estimator import StateEstimator
+
+    metrics: Dict[str, float] = {}
+
+    # 1. Clean map (built MAP_RUNS times, the fastest build is reported)
+    map_times = []
+    for _ in range(MAP_RUNS):
+        t0 = time.perf_counter()
+        extractor = MapExtractor()
+        extractor.frames = list(frames)
+        clean_map = extractor.extract_clean_map()
+        estimator = StateEstimator()
+        estimator.initialize_from_map(clean_map)
+        map_times.append(time.perf_counter() - t0)
+    metrics['map_ms'] = min(map_times) * 1000.0
+
+    if manifest.get('map'):
+        truth = decode_grid(manifest['map']['grid'])
+        walls = estimator.maze.walls.astype(bool)
+        pellets = estimator.grid == 2
+        metrics['map_wall_acc'] = float(np.mean(walls == (truth == 1)))
+        metrics['map_pellet_acc'] = float(np.mean(pellets == (truth == 2)))
+
+    # 2. Frame by frame, like the main loop
+    detector = create_detector(estimator, template_dir=template_dir)
+    detector.templates  # Load outside the timed loop
+    preprocessor = FramePreprocessor()
+    latencies = []
+    grid_hits = grid_cells = 0
+    counts = {'pacman': [0, 0, 0], 'ghost': [0, 0, 0]}  # matched, predicted, labelled
+    for entry, frame in zip(manifest['frames'], frames):
+        t0 = time.perf_counter()
+        ctx = preprocessor.begin(frame)
+        detections = detector.detect_objects(frame, ctx)
+        state = estimator.update(detections, frame, ctx)
+        latencies.append(time.perf_counter() - t0)
+
+        truth = decode_grid(entry['grid'])
+        grid_hits += int(np.count_nonzero(state['grid'] == truth))
+        grid_cells += truth.size
+
+        predicted = [tuple(state['pacman_pos'])] if state['pacman_pos'] else []
+        labelled = [tuple(entry['pacman'])] if entry['pacman'] else []
+        c = counts['pacman']
+        c[0] += _match(predicted, labelled)
+        c[1] += len(predicted)
+        c[2] += len(labelled)
+
+        predicted = [tuple(g) for g in state['ghost_positions']]
+        labelled = [tuple(g) for g in entry['ghosts']]
+        c = counts['ghost']
+        c[0] += _match(predicted, labelled)
+        c[1] += len(predicted)
+        c[2] += len(labelled)
+
+    metrics['grid_acc'] = _ratio(grid_hits, grid_cells)
+    for name, (matched, predicted, labelled) in counts.items():
+        metrics[f'{name}_precision'] = _ratio(matched, predicted)
+        metrics[f'{name}_recall'] = _ratio(matched, labelled)
+    ms = np.array(latencies) * 1000.0
+    metrics['frame_p50_ms'] = float(np.percentile(ms, 50))
+    metrics['frame_p95_ms'] = float(np.percentile(ms, 95))
+    metrics['frame_p99_ms'] = float(np.percentile(ms, 99))
+    return metrics
+
+
+# --- Baselines ---
+
+def load_baseline(corpus_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(corpus_dir, BASELINE_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(corpus_dir: str, metrics: Dict[str, float], tolerance: Dict[str, float] = None,
+                  settings: Dict[str, str] = None):
+    """`settings` are the config values the metrics were measured with (e.g. {'VISION_MODE': 'tile'})."""
+    keep = ACCURACY_METRICS + LATENCY_METRICS + (REFERENCE_METRIC,)
+    baseline = {
+        'metrics': {k: round(v, 4) for k, v in metrics.items() if k in keep},
+        'tolerance': tolerance or dict(DEFAULT_TOLERANCE),
+    }
+    if settings:
+        baseline['settings'] = dict(settings)
+    with open(os.path.join(corpus_dir, BASELINE_FILENAME), 'w') as f:
+        json.dump(baseline, f, indent=1)
+    return baseline
+
+
+def check(metrics: Dict[str, float], baseline: Dict[str, Any], timing: bool = True, accuracy: bool = True) -> List[str]:
+    """
+    Regressions of `metrics` against a baseline, as readable lines (empty = pass).
+    Accuracies may drop by tolerance['accuracy'] (absolute). Latencies may grow
+    by tolerance[name] or tolerance['latency'] (relative) over the baseline scaled by latency_scale()
+    (so a slower or busier machine does not fail the gate). Latencies are skipped
+    when `timing` is False, accuracies when `accuracy` is False.
+    """
+    tolerance = dict(DEFAULT_TOLERANCE, **baseline.get('tolerance', {}))
+    scale = latency_scale(metrics, baseline)
+    failures = []
+    for name, expected in baseline['metrics'].items():
+        if name == REFERENCE_METRIC:
+            continue
+        if name not in metrics:
+            failures.append(f"{name}: missing (baseline {expected:.4f})")
+            continue
+        value = metrics[name]
+        if accuracy and name in ACCURACY_METRICS and value < expected - tolerance['accuracy']:
+            failures.append(f"{name}: {value:.4f} < baseline {expected:.4f} - {tolerance['accuracy']}")
+        elif timing and name in LATENCY_METRICS:
+            margin = tolerance.get(name, tolerance['latency'])
+            if value > expected * scale * (1.0 + margin):
+                failures.append(f"{name}: {value:.2f} ms > baseline {expected:.2f} ms x {scale:.2f} (reference) "
+                                f"+ {margin * 100:.0f}%")
+    return failures
+
+
+def latency_scale(metrics: Dict[str, float], baseline: Dict[str, Any]) -> float:
+    """This run's reference_ms over the baseline's (1.0 if either is missing)."""
+    ref, base = metrics.get(REFERENCE_METRIC), baseline['metrics'].get(REFERENCE_METRIC)
+    return ref / base if ref and base else 1.0
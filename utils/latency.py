@@ -0,0 +1,99 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from vision.maze_graph import DIRECTIONS
+
+COMPONENTS = ('total', 'response', 'capture', 'processing')
+
+
+def motion_direction(prev: Tuple[float, float], cur: Tuple[float, float], min_move: float = 1.0) -> Optional[str]:
+    """Action matching the movement between two pixel positions (None if it barely moved)."""
+    dx, dy = cur[0] - prev[0], cur[1] - prev[1]
+    if max(abs(dx), abs(dy)) < min_move:
+        return None
+    if abs(dx) >= abs(dy):
+        return 'RIGHT' if dx > 0 else 'LEFT'
+    return 'DOWN' if dy > 0 else 'UP'
+
+
+class LatencyProbe:
+    """
+    Measures action-to-observation latency from the tracked Pac-Man position.
+
+    Each probed action is timestamped when it is sent; the first frame whose
+    observed motion matches the action closes the sample. A sample is split into:
+    - response:   action sent -> start of the capture that showed the change
+                  (input handling, game tick, display, and waiting for the next frame),
+    - capture:    grab start -> grab end,
+    - processing: grab end -> vision finished with the frame,
+    - total:      action sent -> the agent could have known.
+    Probes without a matching observation within `timeout` count as timeouts.
+    """
+
+    def __init__(self, timeout: float = 1.0, min_move: float = 1.0):
+        self.timeout = timeout
+        self.min_move = min_move
+        self.samples: List[Dict[str, float]] = []
+        self.timeouts = 0
+        self.superseded = 0
+        self._pending: Optional[Tuple[str, float]] = None
+        self._last_pos = None
+        self.direction = None  # Last observed motion direction
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+
+    def action_sent(self, action: str, t_sent: float):
+        """Start a probe for `action`, sent at `t_sent` (perf_counter clock)."""
+        if action not in DIRECTIONS:
+            return
+        if self._pending is not None:
+            self.superseded += 1
+        self._pending = (action, t_sent)
+
+    def observe(self, pixel_pos: Optional[Tuple[float, float]], t_capture_start: float,
+                t_capture_end: float, t_processed: float) -> Optional[Dict[str, float]]:
+        """
+        Feed one processed frame. Returns the completed sample, if this frame closed one.
+        `pixel_pos` is Pac-Man's sprite center in the frame (None if not found).
+        """
+        if self._pending is not None and t_capture_start - self._pending[1] > self.timeout:
+            self.timeouts += 1
+            self._pending = None
+        if pixel_pos is None:
+            return None
+
+        sample = None
+        if self._last_pos is not None:
+            direction = motion_direction(self._last_pos, pixel_pos, self.min_move)
+            if direction is not None:
+                self.direction = direction
+            if self._pending is not None and direction == self._pending[0] and t_capture_start >= self._pending[1]:
+                t_sent = self._pending[1]
+                sample = {
+                    'total': t_processed - t_sent,
+                    'response': t_capture_start - t_sent,
+                    'capture': t_capture_end - t_capture_start,
+                    'processing': t_processed - t_capture_end,
+                }
+                self.samples.append(sample)
+                self._pending = None
+        self._last_pos = pixel_pos
+        return sample
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles (ms) per component, plus sample/timeout counts."""
+        out = {'count': len(self.samples), 'timeouts': self.timeouts, 'superseded': self.superseded}
+        for name in COMPONENTS:
+            values = np.array([s[name] for s in self.samples]) * 1000.0
+            if len(values) == 0:
+                out[name] = {}
+                continue
+            out[name] = {
+                'mean': float(values.mean()),
+                'p50': float(np.percentile(values, 50)),
+                'p90': float(np.percentile(values, 90)),
+                'p99': float(np.percentile(values, 99)),
+                'max': float(values.max()),
+            }
+        return out
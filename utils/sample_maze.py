@@ -0,0 +1,52 @@
+import numpy as np
+
+# Classic 28x31 Pac-Man layout, used by benchmarks and offline tools.
+# '#' / '-' = wall (the ghost-house door is a wall for Pac-Man), '.' / 'o' = pellet, ' ' = empty path.
+CLASSIC_LAYOUT = [
+    "############################",
+    "#............##............#",
+    "#.####.#####.##.#####.####.#",
+    "#o####.#####.##.#####.####o#",
+    "#.####.#####.##.#####.####.#",
+    "#..........................#",
+    "#.####.##.########.##.####.#",
+    "#.####.##.########.##.####.#",
+    "#......##....##....##......#",
+    "######.##### ## #####.######",
+    "######.##### ## #####.######",
+    "######.##          ##.######",
+    "######.## ###--### ##.######",
+    "######.## #      # ##.######",
+    "      .   #      #   .      ",
+    "######.## #      # ##.######",
+    "######.## ######## ##.######",
+    "######.##          ##.######",
+    "######.## ######## ##.######",
+    "######.## ######## ##.######",
+    "#............##............#",
+    "#.####.#####.##.#####.####.#",
+    "#.####.#####.##.#####.####.#",
+    "#o..##.......  .......##..o#",
+    "###.##.##.########.##.##.###",
+    "###.##.##.########.##.##.###",
+    "#......##....##....##......#",
+    "#.##########.##.##########.#",
+    "#.##########.##.##########.#",
+    "#..........................#",
+    "############################",
+]
+
+# Pac-Man's starting cell in CLASSIC_LAYOUT (x, y)
+PACMAN_START = (13, 23)
+
+
+def sample_grid(layout=CLASSIC_LAYOUT) -> np.ndarray:
+    """Return the layout as a uint8 grid (0=Empty, 1=Wall, 2=Pellet)."""
+    grid = np.zeros((len(layout), len(layout[0])), dtype=np.uint8)
+    for y, row in enumerate(layout):
+        for x, ch in enumerate(row):
+            if ch in '#-':
+                grid[y, x] = 1
+            elif ch in '.o':
+                grid[y, x] = 2
+    return grid
@@ -0,0 +1,138 @@
+import math
+import time
+from collections import deque
+from typing import Dict
+
+import numpy as np
+
+
+def sleep_until(deadline: float, spin: float = 0.001):
+    """
+    Block until perf_counter() reaches `deadline`.
+    Sleeps for most of the wait and busy-waits the last `spin` seconds, since
+    time.sleep() can overshoot by a millisecond or more (much more on Windows).
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class FrameScheduler:
+    """
+    Fixed-timestep loop pacing on absolute deadlines (perf_counter, so wall-clock
+    jumps don't matter). Deadlines are start + n * period rather than
+    "now + whatever is left", so the loop does not drift.
+
+    When a frame overruns its deadline, the policy decides what happens:
+    - 'skip':    start the next frame right away and realign to the next free
+                 slot; the slots that were overrun are counted as skipped.
+    - 'catchup': keep the schedule and run frames back to back until caught up,
+                 unless more than `max_catchup` periods behind (then resync).
+
+    Usage:
+        scheduler = FrameScheduler(30)
+        while True:
+            ...  # one frame of work
+            scheduler.wait()
+    """
+
+    POLICIES = ('skip', 'catchup')
+
+    def __init__(self, fps: float, policy: str = 'skip', spin: float = 0.001,
+                 max_catchup: int = 3, history: int = 1000):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown scheduler policy '{policy}' (expected one of {self.POLICIES})")
+        self.period = 1.0 / fps if fps else 0.0
+        self.policy = policy
+        self.spin = spin
+        self.max_catchup = max_catchup
+
+        self.frames = 0
+        self.misses = 0      # Frames that finished after their deadline
+        self.skipped = 0     # Whole slots dropped by the 'skip' policy
+        self.resyncs = 0     # Times 'catchup' gave up and restarted the schedule
+        self._jitter = deque(maxlen=history)    # Wake-up time - deadline (s), on time frames
+        self._lateness = deque(maxlen=history)  # Finish time - deadline (s), missed frames
+        self._created = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        """Restart the schedule from now (e.g. after a pause); counts are kept."""
+        self._next = time.perf_counter() + self.period
+
+    def set_fps(self, fps: float):
+        """
+        Change the rate. The current frame's deadline moves with the new period,
+        so speeding up takes effect on this very frame.
+        """
+        period = 1.0 / fps if fps else 0.0
+        if period != self.period:
+            self._next += period - self.period
+            self.period = period
+
+    @property
+    def next_deadline(self) -> float:
+        return self._next
+
+    def time_left(self) -> float:
+        """Seconds until the current frame's deadline (negative once it is missed)."""
+        return self._next - time.perf_counter()
+
+    def wait(self) -> float:
+        """
+        End the current frame: wait for its deadline, or apply the miss policy.
+        Returns how late the frame finished (0.0 if it was on time).
+        """
+        self.frames += 1
+        if self.period <= 0:
+            return 0.0
+
+        deadline = self._next
+        now = time.perf_counter()
+        if now <= deadline:
+            sleep_until(deadline, self.spin)
+            self._jitter.append(time.perf_counter() - deadline)
+            self._next = deadline + self.period
+            return 0.0
+
+        late = now - deadline
+        self.misses += 1
+        self._lateness.append(late)
+        if self.policy == 'skip':
+            # First slot boundary after now; the ones in between are dropped
+            slots = math.floor(late / self.period) + 1
+            self.skipped += slots - 1
+            self._next = deadline + slots * self.period
+        elif late > self.max_catchup * self.period:
+            self.resyncs += 1
+            self._next = now + self.period
+        else:
+            self._next = deadline + self.period
+        return late
+
+    def stats(self) -> Dict[str, float]:
+        """Counts plus jitter / lateness percentiles in milliseconds."""
+        elapsed = time.perf_counter() - self._created
+        out = {
+            'frames': self.frames,
+            'misses': self.misses,
+            'miss_rate': self.misses / self.frames if self.frames else 0.0,
+            'skipped': self.skipped,
+            'resyncs': self.resyncs,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+        }
+        for name, values in (('jitter', self._jitter), ('late', self._lateness)):
+            v = np.array(values) * 1000.0
+            out[f'{name}_p50_ms'] = float(np.percentile(v, 50)) if len(v) else 0.0
+            out[f'{name}_p99_ms'] = float(np.percentile(v, 99)) if len(v) else 0.0
+            out[f'{name}_max_ms'] = float(v.max()) if len(v) else 0.0
+        return out
+
+    def print_summary(self):
+        s = self.stats()
+        print(f"Loop: {s['frames']} frames at {s['fps']:.1f} FPS, {s['misses']} deadline misses "
+              f"({s['miss_rate'] * 100:.1f}%), {s['skipped']} skipped slots, {s['resyncs']} resyncs")
+        print(f"      wake-up jitter p50 {s['jitter_p50_ms']:.3f} ms, p99 {s['jitter_p99_ms']:.3f} ms, "
+              f"max {s['jitter_max_ms']:.3f} ms; late frames p99 {s['late_p99_ms']:.1f} ms")
@@ -0,0 +1,163 @@
+import json
+import cv2
+import numpy as np
+from typing import Dict, Optional
+import config
+
+CLASSIFIER_FORMAT_VERSION = 1
+# Side of the downsampled patch per cell (pixels)
+PATCH = 6
+# Output classes, same encoding as the grid
+CLASSES = ('EMPTY', 'WALL', 'PELLET')
+
+
+def extract_patches(frame: np.ndarray, grid_width: int, grid_height: int, padding: Dict[str, int] = None,
+                    patch: int = PATCH) -> np.ndarray:
+    """
+    Cut the padded maze area into one small patch per cell.
+
+    The whole ROI is resampled once (INTER_AREA) to grid * patch pixels and
+    reshaped, so there is no per-cell Python loop.
+    Returns (grid_height * grid_width, patch * patch * 3) float32 in [0, 1], row-major cells.
+    """
+    pad = padding if padding is not None else getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+    h, w = frame.shape[:2]
+    roi = frame[pad['top']:h - pad['bottom'], pad['left']:w - pad['right']]
+    small = cv2.resize(roi, (grid_width * patch, grid_height * patch), interpolation=cv2.INTER_AREA)
+    cells = small.reshape(grid_height, patch, grid_width, patch, 3).transpose(0, 2, 1, 3, 4)
+    return cells.reshape(grid_height * grid_width, patch * patch * 3).astype(np.float32) / 255.0
+
+
+class CellClassifier:
+    """
+    Tiny MLP (one ReLU hidden layer, softmax output) that labels every grid
+    cell as EMPTY / WALL / PELLET from its downsampled patch.
+
+    Inference over the whole maze is two matrix multiplies. Weights are stored
+    as an .npz with the layer arrays, the input normalization and a JSON meta
+    record (format version, patch size, classes).
+    """
+
+    def __init__(self, w1: np.ndarray, b1: np.ndarray, w2: np.ndarray, b2: np.ndarray,
+                 mean: np.ndarray, std: np.ndarray, patch: int = PATCH):
+        self.w1, self.b1, self.w2, self.b2 = w1, b1, w2, b2
+        self.mean, self.std = mean, std
+        self.patch = patch
+
+    # --- Inference ---
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        x = (features - self.mean) / self.std
+        h = np.maximum(x @ self.w1 + self.b1, 0.0)
+        logits = h @ self.w2 + self.b2
+        logits -= logits.max(axis=1, keepdims=True)
+        e = np.exp(logits)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        x = (features - self.mean) / self.std
+        h = np.maximum(x @ self.w1 + self.b1, 0.0)
+        return np.argmax(h @ self.w2 + self.b2, axis=1).astype(np.uint8)
+
+    def classify_frame(self, frame: np.ndarray, grid_width: int, grid_height: int,
+                       padding: Dict[str, int] = None) -> np.ndarray:
+        """Label grid of a frame: (grid_height, grid_width) uint8 with 0=Empty, 1=Wall, 2=Pellet."""
+        features = extract_patches(frame, grid_width, grid_height, padding, self.patch)
+        return self.predict(features).reshape(grid_height, grid_width)
+
+    # --- Training ---
+
+    @classmethod
+    def train(cls, features: np.ndarray, labels: np.ndarray, hidden: int = 32, epochs: int = 30,
+              batch_size: int = 256, lr: float = 0.01, l2: float = 1e-4, seed: int = 0,
+              patch: int = PATCH) -> 'CellClassifier':
+        """
+        Fit with mini-batch Adam on softmax cross-entropy.
+        Classes are reweighted by inverse frequency (walls and empty cells far outnumber pellets).
+        """
+        rng = np.random.default_rng(seed)
+        n, d = features.shape
+        k = len(CLASSES)
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-3
+        x_all = ((features - mean) / std).astype(np.float32)
+
+        counts = np.bincount(labels, minlength=k).astype(np.float32)
+        class_weight = np.where(counts > 0, n / (k * np.maximum(counts, 1)), 0.0).astype(np.float32)
+
+        params = {
+            'w1': (rng.standard_normal((d, hidden)) * np.sqrt(2.0 / d)).astype(np.float32),
+            'b1': np.zeros(hidden, dtype=np.float32),
+            'w2': (rng.standard_normal((hidden, k)) * np.sqrt(1.0 / hidden)).astype(np.float32),
+            'b2': np.zeros(k, dtype=np.float32),
+        }
+        m = {name: np.zeros_like(p) for name, p in params.items()}
+        v = {name: np.zeros_like(p) for name, p in params.items()}
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        step = 0
+
+        for _ in range(epochs):
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                idx = order[start:start + batch_size]
+                x, y = x_all[idx], labels[idx]
+                sw = class_weight[y]
+                sw = sw / sw.sum()
+
+                # Forward
+                z1 = x @ params['w1'] + params['b1']
+                h = np.maximum(z1, 0.0)
+                logits = h @ params['w2'] + params['b2']
+                logits -= logits.max(axis=1, keepdims=True)
+                p = np.exp(logits)
+                p /= p.sum(axis=1, keepdims=True)
+
+                # Backward (weighted mean cross-entropy + L2 on weights)
+                dlogits = p
+                dlogits[np.arange(len(y)), y] -= 1.0
+                dlogits *= sw[:, None]
+                grads = {
+                    'w2': h.T @ dlogits + l2 * params['w2'],
+                    'b2': dlogits.sum(axis=0),
+                }
+                dh = (dlogits @ params['w2'].T) * (z1 > 0)
+                grads['w1'] = x.T @ dh + l2 * params['w1']
+                grads['b1'] = dh.sum(axis=0)
+
+                step += 1
+                for name in params:
+                    m[name] = beta1 * m[name] + (1 - beta1) * grads[name]
+                    v[name] = beta2 * v[name] + (1 - beta2) * grads[name] ** 2
+                    m_hat = m[name] / (1 - beta1 ** step)
+                    v_hat = v[name] / (1 - beta2 ** step)
+                    params[name] -= (lr * m_hat / (np.sqrt(v_hat) + eps)).astype(np.float32)
+
+        return cls(params['w1'], params['b1'], params['w2'], params['b2'],
+                   mean.astype(np.float32), std.astype(np.float32), patch)
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        meta = {'version': CLASSIFIER_FORMAT_VERSION, 'patch': self.patch, 'classes': list(CLASSES)}
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2, mean=self.mean, std=self.std,
+                 meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: str) -> 'CellClassifier':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != CLASSIFIER_FORMAT_VERSION or tuple(meta.get('classes', ())) != CLASSES:
+                raise ValueError(f"Incompatible cell classifier weights: {path}")
+            return cls(data['w1'], data['b1'], data['w2'], data['b2'], data['mean'], data['std'], meta['patch'])
+
+
+def load_configured() -> Optional[CellClassifier]:
+    """The classifier named by config.CELL_CLASSIFIER_WEIGHTS, or None to use the color rules."""
+    path = getattr(config, 'CELL_CLASSIFIER_WEIGHTS', None)
+    if not path:
+        return None
+    try:
+        return CellClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cell classifier unavailable ({e}), falling back to color rules.")
+        return None
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+
+Box = Tuple[int, int, int, int]
+
+
+class SearchMask:
+    """
+    Where detections may be, compiled once per frame size from config.GRID_PADDING
+    and config.IGNORE_AREAS.
+
+    `allowed` is a boolean image (frame coordinates) that is True where a detection
+    center is accepted: inside the padded maze area and outside every ignore area
+    (ignore rectangles are inclusive, as before). The detector uses it to match
+    only inside the smallest window that can contain an allowed center, and to
+    drop disallowed positions straight from the match result; `filter()` does the
+    same for finished boxes with one array lookup.
+    """
+
+    def __init__(self, frame_shape: Tuple[int, ...], padding: Dict[str, int] = None,
+                 ignore_areas: List[Box] = None):
+        h, w = frame_shape[:2]
+        pad = padding if padding is not None else getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+        ignore = ignore_areas if ignore_areas is not None else getattr(config, 'IGNORE_AREAS', [])
+
+        x1, y1 = max(0, pad['left']), max(0, pad['top'])
+        x2, y2 = min(w, w - pad['right']), min(h, h - pad['bottom'])
+        if x2 <= x1 or y2 <= y1:
+            # Padding does not fit this frame: fall back to the whole frame
+            x1, y1, x2, y2 = 0, 0, w, h
+        self.shape = (h, w)
+        self.roi = (x1, y1, x2, y2)
+
+        allowed = np.zeros((h, w), dtype=bool)
+        allowed[y1:y2, x1:x2] = True
+        for (ix, iy, iw, ih) in ignore:
+            allowed[max(0, iy):max(0, iy + ih + 1), max(0, ix):max(0, ix + iw + 1)] = False
+        self.allowed = allowed
+
+        rows = np.flatnonzero(allowed.any(axis=1))
+        cols = np.flatnonzero(allowed.any(axis=0))
+        # Bounding box of the allowed centers (None if everything is masked out)
+        self.bounds = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1) if len(rows) else None
+        self._windows: Dict[Tuple[int, int], Optional[Tuple[Box, Optional[np.ndarray]]]] = {}
+
+    def window(self, template_shape: Tuple[int, ...]) -> Optional[Tuple[Box, Optional[np.ndarray]]]:
+        """
+        Search window for a template of this size, as ((x1, y1, x2, y2), valid).
+        `valid` is the boolean mask over the matchTemplate result of that window
+        (True where the match center is allowed), or None when every position is.
+        Returns None if no match of this size can be accepted.
+        """
+        th, tw = template_shape[:2]
+        key = (th, tw)
+        if key not in self._windows:
+            self._windows[key] = self._compile_window(th, tw)
+        return self._windows[key]
+
+    def _compile_window(self, th: int, tw: int):
+        if self.bounds is None:
+            return None
+        bx1, by1, bx2, by2 = self.bounds
+        rx1, ry1, rx2, ry2 = self.roi
+        # Templates whose center lands in the bounds, kept inside the ROI
+        x1, y1 = max(rx1, bx1 - tw // 2), max(ry1, by1 - th // 2)
+        x2, y2 = min(rx2, bx2 - 1 - tw // 2 + tw), min(ry2, by2 - 1 - th // 2 + th)
+        rw, rh = x2 - x1 - tw + 1, y2 - y1 - th + 1
+        if rw <= 0 or rh <= 0:
+            return None
+        valid = self.allowed[y1 + th // 2:y1 + th // 2 + rh, x1 + tw // 2:x1 + tw // 2 + rw]
+        if not valid.any():
+            return None
+        return (x1, y1, x2, y2), (None if valid.all() else valid)
+
+    def filter(self, boxes: List[Box]) -> List[Box]:
+        """Keep the boxes whose center is allowed (vectorized lookup in `allowed`)."""
+        if not boxes:
+            return []
+        arr = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        cx = arr[:, 0] + arr[:, 2] // 2
+        cy = arr[:, 1] + arr[:, 3] // 2
+        h, w = self.shape
+        keep = (cx >= 0) & (cx < w) & (cy >= 0) & (cy < h)
+        keep[keep] = self.allowed[cy[keep], cx[keep]]
+        return [boxes[i] for i in np.flatnonzero(keep)]
+
+
+@lru_cache(maxsize=8)
+def _search_mask(h: int, w: int) -> SearchMask:
+    return SearchMask((h, w))
+
+
+def search_mask_for(frame_shape: Tuple[int, ...]) -> SearchMask:
+    """Shared SearchMask for this frame size from the current config (built once per size)."""
+    return _search_mask(frame_shape[0], frame_shape[1])
@@ -0,0 +1,171 @@
+import time
+import cv2
+import numpy as np
+from typing import Dict, Tuple
+import config
+from vision.detection_mask import search_mask_for
+from vision.tile_view import tile_geometry_for
+
+# Palette indices (match the grid encoding where it overlaps)
+PALETTE_PATH = 0
+PALETTE_WALL = 1
+PALETTE_PELLET = 2
+PALETTE_GHOST = 3
+PALETTE_OTHER = 255
+
+# Bits kept per channel when indexing the palette LUT (5 -> 32768 entries)
+_LUT_BITS = 5
+_LUT_SHIFT = 8 - _LUT_BITS
+
+
+def build_palette_lut(tolerance: float = 60.0) -> np.ndarray:
+    """
+    Map every quantized BGR value to the nearest game color class.
+    Colors further than `tolerance` (Euclidean) from all game colors map to PALETTE_OTHER.
+    """
+    colors = config.GAME_COLORS
+    refs = [(PALETTE_PATH, colors['PATH'])]
+    refs += [(PALETTE_WALL, c) for c in colors.get('WALLS', [])]
+    refs += [(PALETTE_PELLET, c) for c in colors.get('PELLETS', [])]
+    refs += [(PALETTE_GHOST, c) for c in colors.get('GHOSTS', [])]
+    labels = np.array([label for label, _ in refs], dtype=np.uint8)
+    ref_colors = np.array([c for _, c in refs], dtype=np.float32)
+
+    # Center of each quantization bin, in the same (b, g, r) bit order as the index
+    levels = (np.arange(1 << _LUT_BITS, dtype=np.float32) + 0.5) * (1 << _LUT_SHIFT)
+    b, g, r = np.meshgrid(levels, levels, levels, indexing='ij')
+    bins = np.stack([b.ravel(), g.ravel(), r.ravel()], axis=1)
+
+    dist = np.linalg.norm(bins[:, None, :] - ref_colors[None, :, :], axis=2)
+    nearest = np.argmin(dist, axis=1)
+    lut = labels[nearest]
+    lut[dist[np.arange(len(bins)), nearest] >= tolerance] = PALETTE_OTHER
+    return lut
+
+
+class FrameContext:
+    """
+    Views of one frame, shared by every stage that looks at pixels.
+
+    `roi` is the padded maze area (a view of the frame); `roi_offset` converts
+    ROI coordinates back to the frame. Derived images are computed at most once
+    per frame, on first access, into a buffer owned by the FramePreprocessor:
+    `gray`, `hsv`, `palette` (game color class per pixel) and `pyramid(level)`
+    cover the ROI, so stages read them instead of converting the frame themselves.
+    `search_mask` is the compiled SearchMask (padding + ignore areas) for this frame size.
+    `timestamp` is when the frame entered vision (perf_counter).
+    `tile` is the maze area resampled to TILE_PIXELS per grid cell (vision/tile_view.py).
+    A context is only valid until the preprocessor starts the next frame.
+    """
+
+    def __init__(self, frame: np.ndarray, preprocessor: 'FramePreprocessor'):
+        self.frame = frame
+        # When the frame entered vision (perf_counter)
+        self.timestamp = time.perf_counter()
+        self._pre = preprocessor
+        self._cache: Dict[str, np.ndarray] = {}
+
+        self.search_mask = search_mask_for(frame.shape)
+        x1, y1, x2, y2 = self.search_mask.roi
+        self.roi_offset: Tuple[int, int] = (x1, y1)
+        # A view, not a copy
+        self.roi = frame[y1:y2, x1:x2]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.frame.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        if 'gray' not in self._cache:
+            h, w = self.roi.shape[:2]
+            buf = self._pre.buffer('gray', (h, w))
+            self._cache['gray'] = cv2.cvtColor(self.roi, cv2.COLOR_BGR2GRAY, dst=buf)
+        return self._cache['gray']
+
+    @property
+    def hsv(self) -> np.ndarray:
+        if 'hsv' not in self._cache:
+            buf = self._pre.buffer('hsv', self.roi.shape)
+            self._cache['hsv'] = cv2.cvtColor(self.roi, cv2.COLOR_BGR2HSV, dst=buf)
+        return self._cache['hsv']
+
+    @property
+    def palette(self) -> np.ndarray:
+        """Per-pixel game color class (PALETTE_*), via one LUT gather."""
+        if 'palette' not in self._cache:
+            h, w = self.roi.shape[:2]
+            idx = self._pre.buffer('palette_idx', (h, w), np.uint16)
+            tmp = self._pre.buffer('palette_tmp', (h, w), np.uint16)
+            out = self._pre.buffer('palette', (h, w))
+            # idx = (b >> s) << 2k | (g >> s) << k | (r >> s), all in place
+            np.copyto(idx, self.roi[..., 0])
+            idx >>= _LUT_SHIFT
+            idx <<= 2 * _LUT_BITS
+            np.copyto(tmp, self.roi[..., 1])
+            tmp >>= _LUT_SHIFT
+            tmp <<= _LUT_BITS
+            idx |= tmp
+            np.copyto(tmp, self.roi[..., 2])
+            tmp >>= _LUT_SHIFT
+            idx |= tmp
+            self._cache['palette'] = np.take(self._pre.palette_lut, idx, out=out)
+        return self._cache['palette']
+
+    @property
+    def tile_geometry(self):
+        return tile_geometry_for(self.frame.shape)
+
+    @property
+    def tile(self) -> np.ndarray:
+        """The maze area at TILE_PIXELS x TILE_PIXELS per grid cell (one INTER_AREA resample)."""
+        if 'tile' not in self._cache:
+            geometry = self.tile_geometry
+            w, h = geometry.size
+            buf = self._pre.buffer('tile', (h, w) + self.frame.shape[2:])
+            self._cache['tile'] = geometry.resample(self.frame, dst=buf)
+        return self._cache['tile']
+
+    def pyramid(self, level: int) -> np.ndarray:
+        """ROI downscaled `level` times by pyrDown (level 0 is the ROI itself)."""
+        if level <= 0:
+            return self.roi
+        key = f'pyr{level}'
+        if key not in self._cache:
+            src = self.pyramid(level - 1)
+            h, w = src.shape[:2]
+            buf = self._pre.buffer(key, ((h + 1) // 2, (w + 1) // 2) + src.shape[2:])
+            self._cache[key] = cv2.pyrDown(src, dst=buf)
+        return self._cache[key]
+
+
+class FramePreprocessor:
+    """
+    Hands out one FrameContext per frame and owns the buffers behind it.
+
+    Buffers are allocated on first use and reused for every following frame of
+    the same size, so steady-state preprocessing does not allocate.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._palette_lut = None
+        self.frames = 0
+
+    @property
+    def palette_lut(self) -> np.ndarray:
+        if self._palette_lut is None:
+            self._palette_lut = build_palette_lut()
+        return self._palette_lut
+
+    def buffer(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+
+    def begin(self, frame: np.ndarray) -> FrameContext:
+        """Start a new frame. Contexts from earlier frames must not be used afterwards."""
+        self.frames += 1
+        return FrameContext(frame, self)
@@ -0,0 +1,97 @@
+from typing import Any, Iterator, Optional, Tuple
+import numpy as np
+
+Cell = Tuple[int, int]
+
+
+class GameState:
+    """
+    One frame's perceived game state, as produced by StateEstimator.update().
+
+    Fixed, typed fields in `__slots__` instead of a fresh dict per frame. The grid
+    is the maze's read-only snapshot (vision/maze_grid.py): the maze replaces it
+    instead of writing to it, so a state keeps seeing the board of its own frame
+    and can be handed to another thread or queue without copying the array.
+    `snapshot()` makes that hand-off explicit; it copies the handful of fields
+    but shares the grid and graph.
+
+    Reads like the dict it replaces (`state['pacman_pos']`, `state.get(...)`,
+    `items()`), and item assignment works for the slot fields (main.py sets
+    'advice'). Unknown keys raise KeyError.
+    """
+
+    __slots__ = ('grid', 'graph', 'pacman_pos', 'ghost_positions',
+                 'pellets_total', 'pellets_remaining', 'pellets_eaten',
+                 'frame_id', 'captured_at', 'updated_at', 'version', 'advice')
+
+    def __init__(self, grid: Optional[np.ndarray] = None, graph=None, pacman_pos: Optional[Cell] = None,
+                 ghost_positions: Tuple[Cell, ...] = (), pellets_total: int = 0, pellets_remaining: int = 0,
+                 pellets_eaten: int = 0, frame_id: int = 0, captured_at: float = 0.0, updated_at: float = 0.0,
+                 version: int = 0, advice: Optional[str] = None):
+        self.grid = grid                          # Read-only (1=Wall, 2=Pellet, 0=Empty)
+        self.graph = graph                        # MazeGraph, replaced (not mutated) on a new map
+        self.pacman_pos = pacman_pos
+        self.ghost_positions = tuple(ghost_positions)
+        self.pellets_total = pellets_total
+        self.pellets_remaining = pellets_remaining
+        self.pellets_eaten = pellets_eaten
+        self.frame_id = frame_id                  # Estimator update count
+        self.captured_at = captured_at            # perf_counter when the frame entered vision
+        self.updated_at = updated_at              # perf_counter when this state was built
+        self.version = version                    # Bumped only when the content changed
+        self.advice = advice                      # Latest strategist advice (main.py), if any
+
+    # --- Dict-compatible access ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, k) for k in self.__slots__]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.__slots__]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    # --- Snapshots ---
+
+    def snapshot(self) -> 'GameState':
+        """Independent copy of the fields; the grid and graph are shared (never mutated in place)."""
+        copy = GameState.__new__(GameState)
+        for key in self.__slots__:
+            setattr(copy, key, getattr(self, key))
+        return copy
+
+    def same_content(self, other: Optional['GameState']) -> bool:
+        """True if `other` describes the same board: positions, pellets and map."""
+        return (other is not None and self.graph is other.graph and self.grid is other.grid
+                and self.pacman_pos == other.pacman_pos and self.ghost_positions == other.ghost_positions
+                and self.pellets_total == other.pellets_total)
+
+    def __repr__(self) -> str:
+        return (f"GameState(frame={self.frame_id}, v{self.version}, pacman={self.pacman_pos}, "
+                f"ghosts={list(self.ghost_positions)}, pellets={self.pellets_remaining}/{self.pellets_total})")
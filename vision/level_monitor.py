@@ -0,0 +1,205 @@
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Optional
+import config
+from vision.maze_graph import MazeGraph
+from vision.map_extractor import MapExtractor
+from vision.frame_context import FramePreprocessor
+from vision.tile_view import tile_mode
+
+# Minimum eaten pellets before a refill can be told apart from noise
+MIN_EATEN_FOR_REFILL = 10
+# Fraction of eaten cells that must show a pellet again to call it a refill
+REFILL_FRACTION = 0.6
+# Seconds to wait after a failed remap before watching again
+RETRY_COOLDOWN = 2.0
+
+
+class LevelMonitor:
+    """
+    Spots a level change or game reset and remaps the maze without stalling the loop.
+
+    Every frame the maze area is shrunk to one mean color per grid cell
+    (cv2.resize with INTER_AREA, ~900 pixels) and compared with the same
+    signature of the clean map. The resize starts from the shared FrameContext:
+    the tile image in VISION_MODE = 'tile', else a pyramid level of the ROI.
+    - refill: most cells whose pellet was eaten look like the clean map again
+      (a pellet is visible) rather than like an empty path,
+    - new maze: the wall cells no longer match the clean map's colors.
+
+    A change seen for `confirm_frames` frames starts a remap: the next frames
+    are collected, and a background thread builds the median clean map, the
+    new MazeGrid and MazeGraph, then hands them to StateEstimator.swap_map,
+    which installs them as one bundle on its next update.
+    """
+
+    WATCHING = 'watching'
+    COLLECTING = 'collecting'
+    BUILDING = 'building'
+
+    def __init__(self, estimator, confirm_frames: int = None, remap_frames: int = None,
+                 maze_tolerance: float = None, on_remap: Callable = None):
+        self.estimator = estimator
+        self.confirm_frames = confirm_frames if confirm_frames is not None else getattr(config, 'LEVEL_CONFIRM_FRAMES', 3)
+        self.remap_frames = remap_frames if remap_frames is not None else getattr(config, 'LEVEL_REMAP_FRAMES', 20)
+        self.maze_tolerance = maze_tolerance if maze_tolerance is not None else getattr(config, 'LEVEL_MAZE_TOLERANCE', 25.0)
+        # Called as on_remap(clean_map, maze) from the builder thread (e.g. MapCache.save)
+        self.on_remap = on_remap
+
+        self.state = self.WATCHING
+        self.last_event = None
+        self._streak = 0
+        self._stride = 0
+        self._extractor = None
+        self._thread = None
+        self._cooldown_until = 0.0
+
+        # Reference built from the estimator's current clean map / maze
+        self._ref_map = None
+        self._ref_maze = None
+        self._ref_sig = None
+        self._ref_shape = None
+        self._ref_pellets = None
+        self._wall_cells = None
+        self._sig_buf = None
+        self._path_color = np.array(config.GAME_COLORS['PATH'], dtype=np.int16)
+        self._pre = FramePreprocessor()     # For the clean map and frames without a context
+
+        self.stats = {'frames': 0, 'refills': 0, 'new_mazes': 0, 'remaps': 0, 'failed_remaps': 0, 'last_ms': 0.0}
+
+    # --- Signatures ---
+
+    def _image(self, frame: np.ndarray, ctx=None) -> np.ndarray:
+        """
+        The maze image the signature is taken from: the tile image in VISION_MODE = 'tile',
+        else the smallest ROI pyramid level that keeps two pixels per grid cell each way.
+        Frames without a FrameContext (the clean map) go through our own preprocessor,
+        so the reference and the live signature are computed the same way.
+        """
+        if ctx is None:
+            ctx = self._pre.begin(frame)
+        if tile_mode():
+            return ctx.tile
+        return ctx.pyramid(self._pyramid_level(ctx.roi.shape))
+
+    def _pyramid_level(self, roi_shape) -> int:
+        h, w = roi_shape[:2]
+        level = 0
+        while (h >> (level + 1)) >= 2 * self.estimator.grid_height and (w >> (level + 1)) >= 2 * self.estimator.grid_width:
+            level += 1
+        return level
+
+    def signature(self, roi: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+        """Mean color of every grid cell, (grid_height, grid_width, 3) uint8."""
+        size = (self.estimator.grid_width, self.estimator.grid_height)
+        return cv2.resize(roi, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+    def _refresh_reference(self):
+        clean_map = self.estimator.clean_map
+        maze = self.estimator.maze
+        if clean_map is self._ref_map and maze is self._ref_maze:
+            return
+        self._ref_map = clean_map
+        self._ref_maze = maze
+        ref_image = self._image(clean_map)
+        self._ref_shape = ref_image.shape[:2]
+        self._ref_sig = self.signature(ref_image).astype(np.int16)
+        # Observed before the estimator's first update on this maze, so nothing is eaten yet
+        self._ref_pellets = maze.pellet_mask()
+        self._wall_cells = maze.walls == 1
+        self._streak = 0
+
+    # --- Per frame ---
+
+    def observe(self, frame: np.ndarray, ctx=None) -> Optional[str]:
+        """
+        Check one frame. Returns 'refill' or 'new_maze' on the frame a remap is
+        triggered, else None. Cheap enough to call every frame.
+        """
+        if self.estimator.clean_map is None or frame is None:
+            return None
+        start = time.perf_counter()
+        self.stats['frames'] += 1
+
+        if self.state == self.COLLECTING:
+            self._collect(frame)
+        elif self.state == self.BUILDING:
+            # Done once the thread finished and the estimator installed the new map
+            if not self._thread.is_alive() and not self.estimator.map_pending:
+                self._thread = None
+                self.state = self.WATCHING
+        elif time.monotonic() >= self._cooldown_until:
+            self._refresh_reference()
+            image = self._image(frame, ctx)
+            if image.shape[:2] == self._ref_shape:
+                self._sig_buf = self.signature(image, dst=self._sig_buf)
+                event = self._classify(self._sig_buf.astype(np.int16))
+                self._streak = self._streak + 1 if event else 0
+                if event and self._streak >= self.confirm_frames:
+                    self.stats['refills' if event == 'refill' else 'new_mazes'] += 1
+                    self.stats['last_ms'] = (time.perf_counter() - start) * 1000
+                    self._begin_remap(event)
+                    return event
+
+        self.stats['last_ms'] = (time.perf_counter() - start) * 1000
+        return None
+
+    def _classify(self, sig: np.ndarray) -> Optional[str]:
+        if self._wall_cells.any():
+            wall_diff = np.abs(sig - self._ref_sig).mean(axis=2)[self._wall_cells].mean()
+            if wall_diff > self.maze_tolerance:
+                return 'new_maze'
+
+        eaten = self._ref_pellets & ~self._ref_maze.pellet_mask()
+        n_eaten = int(np.count_nonzero(eaten))
+        if n_eaten < MIN_EATEN_FOR_REFILL:
+            return None
+        ref_dist = np.abs(sig - self._ref_sig).sum(axis=2)
+        empty_dist = np.abs(sig - self._path_color).sum(axis=2)
+        # A cell shows a pellet again if it is closer to the clean map than to an empty path
+        visible = (ref_dist < empty_dist) & eaten
+        if np.count_nonzero(visible) >= REFILL_FRACTION * n_eaten:
+            return 'refill'
+        return None
+
+    # --- Remap ---
+
+    def _begin_remap(self, event: str):
+        print(f"Level monitor: {event} detected, remapping in the background...")
+        self.last_event = event
+        self.state = self.COLLECTING
+        self._extractor = MapExtractor()
+        self._stride = 0
+        self._streak = 0
+
+    def _collect(self, frame: np.ndarray):
+        # Every other frame, so the median spans enough motion to erase the sprites
+        self._stride += 1
+        if self._stride % 2:
+            return
+        self._extractor.frames.append(frame.copy())
+        if len(self._extractor.frames) >= self.remap_frames:
+            extractor, self._extractor = self._extractor, None
+            self.state = self.BUILDING
+            self._thread = threading.Thread(target=self._build, args=(extractor,), name="level-remap", daemon=True)
+            self._thread.start()
+
+    def _build(self, extractor: MapExtractor):
+        clean_map = extractor.extract_clean_map()
+        maze = self.estimator.build_maze(clean_map)
+        if maze.pellets_total == 0:
+            # Probably a transition screen: keep the old map and look again later
+            print("Level monitor: no pellets on the new map, keeping the current one.")
+            self.stats['failed_remaps'] += 1
+            self._cooldown_until = time.monotonic() + RETRY_COOLDOWN
+            return
+        graph = MazeGraph.from_maze(maze)
+        self.estimator.swap_map(clean_map, maze, graph)
+        self.stats['remaps'] += 1
+        if self.on_remap is not None:
+            try:
+                self.on_remap(clean_map, maze)
+            except Exception as e:
+                print(f"Level monitor: on_remap failed: {e}")
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import hashlib
+import cv2
+import numpy as np
+from typing import Dict, Any, Optional
+import config
+
+# Size of the downscaled image used to recognise the maze (width, height)
+FINGERPRINT_SIZE = (64, 32)
+
+
+class MapCache:
+    """
+    Persistent cache of the mapping phase (clean map + classified walls).
+
+    Entries are keyed by the capture region, grid padding and grid size, and
+    carry a fingerprint (tiny color thumbnail) of the clean map. On startup
+    one live frame is fingerprinted and compared; if it is close enough, the
+    cached map is reused and the 3 s capture + per-cell classification is skipped.
+    Pellets are not cached: eaten ones would come back, so the estimator
+    detects them on the live frame instead (StateEstimator.initialize_from_cache).
+    """
+
+    def __init__(self, cache_dir: str = None, tolerance: float = None, region=None):
+        self.cache_dir = cache_dir or getattr(config, 'MAP_CACHE_DIR', 'logs/map_cache')
+        # Max mean absolute difference (0-255) between fingerprints to count as the same maze.
+        # Moving sprites and eaten pellets only change a few thumbnail pixels.
+        self.tolerance = tolerance if tolerance is not None else getattr(config, 'MAP_CACHE_TOLERANCE', 4.0)
+        # Capture region the entry belongs to (one entry per game window)
+        self.region = region if region is not None else getattr(config, 'CAPTURE_REGION', None)
+
+    @staticmethod
+    def fingerprint(frame: np.ndarray) -> np.ndarray:
+        """Cheap signature of a frame: color thumbnail via area averaging (colors tell levels apart)."""
+        return cv2.resize(frame, FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+
+    def _key(self) -> Dict[str, Any]:
+        return {
+            'region': self.region,
+            'padding': getattr(config, 'GRID_PADDING', None),
+            'grid_size': list(getattr(config, 'GRID_SIZE', (28, 31))),
+        }
+
+    def _path(self) -> str:
+        digest = hashlib.sha1(json.dumps(self._key(), sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"map_{digest}.npz")
+
+    def load(self, frame: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached map entry if it matches the live frame, else None.
+        The entry has 'clean_map' and 'walls'.
+        """
+        path = self._path()
+        if frame is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                clean_map = data['clean_map']
+                if clean_map.shape != frame.shape:
+                    print("Map cache: frame size changed, remapping.")
+                    return None
+                diff = np.mean(cv2.absdiff(data['fingerprint'], self.fingerprint(frame)))
+                if diff > self.tolerance:
+                    print(f"Map cache: maze looks different (diff {diff:.1f} > {self.tolerance}), remapping.")
+                    return None
+                entry = {
+                    'clean_map': clean_map,
+                    'walls': data['walls'],
+                }
+        except Exception as e:
+            print(f"Map cache: could not read {path}: {e}")
+            return None
+        print(f"Map cache: hit (diff {diff:.1f}), skipping the mapping phase.")
+        return entry
+
+    def save(self, clean_map: np.ndarray, maze):
+        """Store the clean map and the maze's walls for the current capture setup."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path()
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            clean_map=clean_map,
+            fingerprint=self.fingerprint(clean_map),
+            walls=maze.walls,
+            meta=np.array(json.dumps(dict(self._key(), created=time.time()))),
+        )
+        # Atomic replace so a crash never leaves a half-written cache behind
+        os.replace(tmp_path, path)
+        print(f"Map cache: saved {path}")
@@ -0,0 +1,291 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Action name -> (dx, dy) in grid coordinates
+DIRECTIONS = {
+    'UP': (0, -1),
+    'DOWN': (0, 1),
+    'LEFT': (-1, 0),
+    'RIGHT': (1, 0),
+}
+
+OPPOSITE = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+
+def step_direction(a: Tuple[int, int], b: Tuple[int, int]) -> Optional[str]:
+    """Direction of a one-cell step from a to b (tunnel wrap-around included)."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dy == 0 and abs(dx) > 1:
+        dx = -1 if dx > 0 else 1  # Wrapped through the tunnel
+    for name, vec in DIRECTIONS.items():
+        if vec == (dx, dy):
+            return name
+    return None
+
+
+class Edge:
+    """
+    A corridor between two junction nodes.
+    `cells` are the interior cells ordered from node `a` to node `b`,
+    so cells[i] is at offset i + 1 from `a` and `length` is the number of steps a -> b.
+    """
+    __slots__ = ('a', 'b', 'cells', 'length', 'pellets')
+
+    def __init__(self, a: int, b: int, cells: List[Tuple[int, int]]):
+        self.a = a
+        self.b = b
+        self.cells = cells
+        self.length = len(cells) + 1
+        self.pellets = 0
+
+    def other(self, node: int) -> int:
+        return self.b if node == self.a else self.a
+
+
+class MazeGraph:
+    """
+    Compiles the walls grid into a graph of junction nodes and corridor edges.
+
+    Nodes are walkable cells that do not have exactly two walkable neighbours
+    (junctions and dead ends). Everything in between is folded into an edge
+    annotated with its length and pellet count, so planners work on ~60 nodes
+    instead of ~300 cells and only need to decide at junctions.
+    """
+
+    def __init__(self, walls: np.ndarray):
+        self.height, self.width = walls.shape
+        self.walkable = (np.asarray(walls) == 0)
+
+        self.nodes: List[Tuple[int, int]] = []
+        self.edges: List[Edge] = []
+        # node id -> list of (edge id, direction leaving the node)
+        self.adjacency: List[List[Tuple[int, str]]] = []
+        self.node_pellets: List[int] = []
+
+        # Per-cell lookup: node id, or edge id + offset from the edge's `a` node (-1 = none)
+        self.cell_node = np.full((self.height, self.width), -1, dtype=np.int32)
+        self.cell_edge = np.full((self.height, self.width), -1, dtype=np.int32)
+        self.cell_offset = np.zeros((self.height, self.width), dtype=np.int32)
+
+        self._build()
+
+    # --- Compilation ---
+
+    def _neighbours(self, x: int, y: int) -> List[Tuple[str, int, int]]:
+        result = []
+        for name, (dx, dy) in DIRECTIONS.items():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height and self.walkable[ny, nx]:
+                result.append((name, nx, ny))
+        return result
+
+    def _add_node(self, x: int, y: int) -> int:
+        node_id = len(self.nodes)
+        self.nodes.append((x, y))
+        self.adjacency.append([])
+        self.node_pellets.append(0)
+        self.cell_node[y, x] = node_id
+        return node_id
+
+    def _build(self):
+        ys, xs = np.nonzero(self.walkable)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if len(self._neighbours(x, y)) != 2:
+                self._add_node(x, y)
+
+        traced = set()  # (node id, direction) already covered by an edge
+        for node_id in range(len(self.nodes)):
+            self._trace_from(node_id, traced)
+
+        # Corridors that form a closed loop have no junction at all:
+        # promote one cell per loop to a node so every walkable cell is covered.
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if self.cell_node[y, x] < 0 and self.cell_edge[y, x] < 0:
+                node_id = self._add_node(x, y)
+                self._trace_from(node_id, traced)
+
+    def _trace_from(self, node_id: int, traced: set):
+        x0, y0 = self.nodes[node_id]
+        for direction, x, y in self._neighbours(x0, y0):
+            if (node_id, direction) in traced:
+                continue
+            cells = []
+            heading = direction
+            # Walk the corridor until we hit another node
+            while self.cell_node[y, x] < 0:
+                cells.append((x, y))
+                for nd, nx, ny in self._neighbours(x, y):
+                    if nd != OPPOSITE[heading]:
+                        heading, x, y = nd, nx, ny
+                        break
+            end_id = int(self.cell_node[y, x])
+
+            edge_id = len(self.edges)
+            edge = Edge(node_id, end_id, cells)
+            self.edges.append(edge)
+            self.adjacency[node_id].append((edge_id, direction))
+            self.adjacency[end_id].append((edge_id, OPPOSITE[heading]))
+            traced.add((node_id, direction))
+            traced.add((end_id, OPPOSITE[heading]))
+
+            for i, (cx, cy) in enumerate(cells):
+                self.cell_edge[cy, cx] = edge_id
+                self.cell_offset[cy, cx] = i + 1
+
+    # --- Pellets ---
+
+    def sync_pellets(self, pellet_mask: np.ndarray):
+        """Recount pellets on every node and edge from a boolean (height, width) mask."""
+        for node_id, (x, y) in enumerate(self.nodes):
+            self.node_pellets[node_id] = int(pellet_mask[y, x])
+        for edge in self.edges:
+            edge.pellets = sum(1 for (x, y) in edge.cells if pellet_mask[y, x])
+
+    def on_pellet_eaten(self, x: int, y: int):
+        """Incrementally update the counts after the maze reports an eaten pellet."""
+        node_id = self.cell_node[y, x]
+        if node_id >= 0:
+            self.node_pellets[node_id] = max(0, self.node_pellets[node_id] - 1)
+            return
+        edge_id = self.cell_edge[y, x]
+        if edge_id >= 0:
+            edge = self.edges[edge_id]
+            edge.pellets = max(0, edge.pellets - 1)
+
+    # --- Queries ---
+
+    def locate(self, cell: Tuple[int, int]) -> Tuple[Optional[int], Optional[int], int]:
+        """
+        Map a cell to (node id, edge id, offset).
+        Exactly one of node id / edge id is set for walkable cells, neither for walls.
+        """
+        x, y = cell
+        node_id = int(self.cell_node[y, x])
+        if node_id >= 0:
+            return node_id, None, 0
+        edge_id = int(self.cell_edge[y, x])
+        if edge_id >= 0:
+            return None, edge_id, int(self.cell_offset[y, x])
+        return None, None, 0
+
+    def is_decision_point(self, cell: Tuple[int, int]) -> bool:
+        """True if the cell is a junction with more than one way forward."""
+        x, y = cell
+        node_id = self.cell_node[y, x]
+        return node_id >= 0 and len(self.adjacency[node_id]) >= 3
+
+    def _anchors(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Nodes reachable from a cell without passing another node, as (node id, distance)."""
+        node_id, edge_id, offset = self.locate(cell)
+        if node_id is not None:
+            return [(node_id, 0)]
+        if edge_id is not None:
+            edge = self.edges[edge_id]
+            return [(edge.a, offset), (edge.b, edge.length - offset)]
+        return []
+
+    def node_distances(self, start: Tuple[int, int]) -> Tuple[Dict[int, int], Dict[int, Tuple[int, int]]]:
+        """
+        Dijkstra over the junction graph from any walkable cell.
+        Returns (distance per node, predecessor per node as (previous node, edge id)).
+        """
+        dist: Dict[int, int] = {}
+        prev: Dict[int, Tuple[int, int]] = {}
+        heap = []
+        for node_id, d in self._anchors(start):
+            if d < dist.get(node_id, 1 << 30):
+                dist[node_id] = d
+                heapq.heappush(heap, (d, node_id))
+
+        while heap:
+            d, node_id = heapq.heappop(heap)
+            if d > dist[node_id]:
+                continue
+            for edge_id, _ in self.adjacency[node_id]:
+                edge = self.edges[edge_id]
+                other = edge.other(node_id)
+                nd = d + edge.length
+                if nd < dist.get(other, 1 << 30):
+                    dist[other] = nd
+                    prev[other] = (node_id, edge_id)
+                    heapq.heappush(heap, (nd, other))
+        return dist, prev
+
+    def distance(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[int]:
+        """Shortest path length in steps between two walkable cells (None if unreachable)."""
+        path = self.shortest_path(start, goal)
+        return None if path is None else len(path) - 1
+
+    def shortest_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Shortest path between two walkable cells as a list of (x, y), both ends included.
+        Planning happens on nodes; corridor cells are only expanded for the result.
+        """
+        if start == goal:
+            return [start]
+        start_anchors = self._anchors(start)
+        goal_anchors = self._anchors(goal)
+        if not start_anchors or not goal_anchors:
+            return None
+
+        best = None  # (length, path)
+
+        # Both cells on the same corridor: walking straight along it is a candidate
+        _, s_edge, s_off = self.locate(start)
+        _, g_edge, g_off = self.locate(goal)
+        if s_edge is not None and s_edge == g_edge:
+            cells = self.edges[s_edge].cells
+            step = 1 if g_off > s_off else -1
+            best = (abs(g_off - s_off), [cells[i - 1] for i in range(s_off, g_off + step, step)])
+
+        dist, prev = self.node_distances(start)
+        for goal_node, tail in goal_anchors:
+            if goal_node not in dist:
+                continue
+            length = dist[goal_node] + tail
+            if best is not None and length >= best[0]:
+                continue
+
+            # Expand node chain back to the start
+            chain = [goal_node]
+            while chain[-1] in prev:
+                chain.append(prev[chain[-1]][0])
+            chain.reverse()
+
+            path = self._cells_to_node(start, chain[0])
+            path.append(self.nodes[chain[0]])
+            for i in range(1, len(chain)):
+                _, edge_id = prev[chain[i]]
+                path.extend(self._edge_cells(edge_id, chain[i - 1]))
+                path.append(self.nodes[chain[i]])
+            path.extend(self._cells_from_node(goal_node, goal))
+            best = (length, path)
+
+        return best[1] if best else None
+
+    def _edge_cells(self, edge_id: int, from_node: int) -> List[Tuple[int, int]]:
+        edge = self.edges[edge_id]
+        return list(edge.cells) if from_node == edge.a else list(reversed(edge.cells))
+
+    def _cells_to_node(self, cell: Tuple[int, int], node_id: int) -> List[Tuple[int, int]]:
+        """Cells from `cell` (included) up to but excluding `node_id`, along the cell's corridor."""
+        _, edge_id, offset = self.locate(cell)
+        if edge_id is None:
+            return []
+        edge = self.edges[edge_id]
+        # A loop corridor starts and ends at the same node: leave by the nearer end
+        toward_a = offset <= edge.length - offset if edge.a == edge.b else node_id == edge.a
+        if toward_a:
+            return [edge.cells[i - 1] for i in range(offset, 0, -1)]
+        return [edge.cells[i - 1] for i in range(offset, edge.length)]
+
+    def _cells_from_node(self, node_id: int, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return list(reversed(self._cells_to_node(cell, node_id)))
+
+    @classmethod
+    def from_maze(cls, maze) -> 'MazeGraph':
+        """Compile a graph from a MazeGrid, including its current pellet counts."""
+        graph = cls(maze.walls)
+        graph.sync_pellets(maze.pellet_mask())
+        return graph
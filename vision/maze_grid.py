@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Tuple
+
+class MazeGrid:
+    """
+    Compact representation of the maze.
+
+    - Walls are a uint8 layer that is written once during mapping and never changes.
+    - Pellets are a packed bitboard (1 bit per cell) with a running remaining count,
+      so eating a pellet is O(1) and nobody has to count the grid every frame.
+    - Consumers get an immutable uint8 snapshot (0=Empty, 1=Wall, 2=Pellet) which is
+      only rebuilt when the pellet state actually changes.
+    """
+
+    EMPTY = 0
+    WALL = 1
+    PELLET = 2
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.walls = np.zeros((height, width), dtype=np.uint8)
+        self.pellet_bits = np.zeros((width * height + 7) // 8, dtype=np.uint8)
+
+        self.pellets_total = 0
+        self.pellets_remaining = 0
+
+        # Bumped on every pellet change, used to invalidate snapshots/caches
+        self.version = 0
+        self._snapshot = None
+        self._snapshot_version = -1
+
+    # --- Pellets ---
+
+    def _bit(self, x: int, y: int) -> Tuple[int, int]:
+        """Byte index and bit mask of a cell (same bit order as np.packbits)."""
+        i = y * self.width + x
+        return i >> 3, 0x80 >> (i & 7)
+
+    def has_pellet(self, x: int, y: int) -> bool:
+        byte, mask = self._bit(x, y)
+        return bool(self.pellet_bits[byte] & mask)
+
+    def set_pellets(self, mask: np.ndarray):
+        """
+        Load the pellet layer from a boolean (height, width) mask.
+        Resets the total/remaining counters.
+        """
+        mask = np.asarray(mask, dtype=bool) & (self.walls == 0)
+        self.pellet_bits = np.packbits(mask.ravel())
+        self.pellets_total = int(np.count_nonzero(mask))
+        self.pellets_remaining = self.pellets_total
+        self.version += 1
+
+    def eat(self, x: int, y: int) -> bool:
+        """
+        Clear the pellet at (x, y).
+        Returns True if there was a pellet to eat.
+        """
+        byte, mask = self._bit(x, y)
+        if not self.pellet_bits[byte] & mask:
+            return False
+        self.pellet_bits[byte] &= ~mask & 0xFF
+        self.pellets_remaining -= 1
+        self.version += 1
+        return True
+
+    def pellet_mask(self) -> np.ndarray:
+        """Unpack the bitboard into a boolean (height, width) array."""
+        n = self.width * self.height
+        return np.unpackbits(self.pellet_bits, count=n).reshape(self.height, self.width).astype(bool)
+
+    @property
+    def pellets_eaten(self) -> int:
+        return self.pellets_total - self.pellets_remaining
+
+    # --- Consumers ---
+
+    def snapshot(self) -> np.ndarray:
+        """
+        Return the combined grid (0=Empty, 1=Wall, 2=Pellet) as a read-only array.
+        The same object is returned until the pellet state changes, so holding on
+        to a snapshot is safe: it is never mutated afterwards.
+        """
+        if self._snapshot is None or self._snapshot_version != self.version:
+            grid = self.walls.copy()
+            grid[self.pellet_mask()] = self.PELLET
+            grid.flags.writeable = False
+            self._snapshot = grid
+            self._snapshot_version = self.version
+        return self._snapshot
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and self.walls[y, x] == 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the mutable layers (walls + pellet bitboard)."""
+        return self.walls.nbytes + self.pellet_bits.nbytes
+
+    @classmethod
+    def from_grid(cls, grid: np.ndarray) -> 'MazeGrid':
+        """Build a MazeGrid from a legacy int grid (1=Wall, 2=Pellet)."""
+        grid = np.asarray(grid)
+        maze = cls(grid.shape[1], grid.shape[0])
+        maze.walls[:] = (grid == cls.WALL)
+        maze.set_pellets(grid == cls.PELLET)
+        return maze
@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
 import os
+import threading
 from typing import List, Dict, Any
 import config
+from vision.detection_mask import search_mask_for
+from vision.tile_view import tile_geometry_for, tile_mode
 
 class ObjectDetectorCV:
     """
@@ -12,29 +15,51 @@ class ObjectDetectorCV:
     
     def __init__(self, template_dir: str = 'assets/templates'):
         self.template_dir = template_dir
-        self.templates = {}
-        self.load_templates()
+        # Templates are read from disk on first use (or by preload_async), not on construction
+        self._templates = None
+        # Compiled TemplateBank with all preprocessed variants (gray, pyramids, rotations, masks)
+        self.bank = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def templates(self) -> Dict[str, np.ndarray]:
+        if self._templates is None:
+            with self._load_lock:
+                if self._templates is None:
+                    self.load_templates()
+        return self._templates
+
+    def preload_async(self):
+        """Start loading the templates in a background thread (e.g. during the mapping phase)."""
+        threading.Thread(target=lambda: self.templates, name="template-loader", daemon=True).start()
         
     def load_templates(self):
-        """Load template images from the config directory."""
-        if not os.path.exists(config.TEMPLATE_DIR):
-            print(f"Warning: Template directory {config.TEMPLATE_DIR} not found.")
+        """
+        Load templates from the compiled bank in the template directory.
+        The bank is rebuilt from the PNGs only when they changed; otherwise this is one mmap.
+        """
+        if not os.path.exists(self.template_dir):
+            print(f"Warning: Template directory {self.template_dir} not found.")
+            self.bank = None
+            self._templates = {}
             return
 
-        for filename in os.listdir(config.TEMPLATE_DIR):
-            if filename.endswith('.png') and 'snapshot' not in filename:
-                name = os.path.splitext(filename)[0]
-                path = os.path.join(config.TEMPLATE_DIR, filename)
-                template = cv2.imread(path)
-                if template is not None:
-                    self.templates[name] = template
-                    print(f"Loaded template: {name}")
-                else:
-                    print(f"Failed to load template: {path}")
-
-    def detect_objects(self, frame: np.ndarray) -> Dict[str, List[Any]]:
+        from vision.template_bank import TemplateBank
+        self.bank = TemplateBank(self.template_dir).load()
+        templates = {}
+        for name in self.bank.names():
+            templates[name] = self.bank.get(name, 'bgr')
+            print(f"Loaded template: {name}")
+        self._templates = templates
+
+    def detect_objects(self, frame: np.ndarray, ctx=None) -> Dict[str, List[Any]]:
         """
         Detect Pac-Man, Ghosts, and Pellets in the frame.
+        Only the part of the frame allowed by the SearchMask (padded maze area minus
+        IGNORE_AREAS, see vision/detection_mask.py) is searched; boxes are always
+        returned in frame coordinates. `ctx` is the shared FrameContext, if any.
+        With VISION_MODE = 'tile' the matching runs on the tile image instead
+        (vision/tile_view.py), with the templates scaled to it.
         """
         results = {
             'pacman': None,
@@ -45,38 +70,95 @@ class ObjectDetectorCV:
         if not self.templates:
             return results
 
+        if ctx is not None:
+            frame, mask = ctx.frame, ctx.search_mask
+        else:
+            mask = search_mask_for(frame.shape)
+
+        geometry = tile = None
+        if tile_mode():
+            # Match scaled templates on the small tile image instead of the frame
+            geometry = ctx.tile_geometry if ctx is not None else tile_geometry_for(frame.shape)
+            tile = ctx.tile if ctx is not None else geometry.resample(frame)
+
         # 1. Detect Pac-Man
         if 'pacman' in self.templates:
-            pacman_locs = self._match_template(frame, self.templates['pacman'], threshold=0.7)
-            results['pacman'] = pacman_locs
+            if geometry is not None:
+                results['pacman'] = self._match_tiles(tile, self.templates['pacman'], 0.7, geometry)
+            else:
+                results['pacman'] = self._match_masked(frame, self.templates['pacman'], 0.7, mask)
 
-        # 2. Detect Ghosts (if template exists)
-        if 'ghost' in self.templates:
-            ghost_locs = self._match_template(frame, self.templates['ghost'], threshold=0.8)
-            results['ghosts'] = ghost_locs
+        # 2. Detect Ghosts: one template per ghost colour ('ghost', 'ghost_1', ...)
+        for name in self._ghost_names():
+            if geometry is not None:
+                results['ghosts'] += self._match_tiles(tile, self.templates[name], 0.8, geometry)
+            else:
+                results['ghosts'] += self._match_masked(frame, self.templates[name], 0.8, mask)
 
         return results
 
-    def _match_template(self, frame, template, threshold=0.8):
+    def _ghost_names(self) -> List[str]:
+        """Template names matched as ghosts: 'ghost' and 'ghost_<anything>'."""
+        return sorted(n for n in self.templates if n == 'ghost' or n.startswith('ghost_'))
+
+    def _match_masked(self, frame, template, threshold, mask):
+        """Match only inside the mask's window for this template size, keeping allowed positions."""
+        window = mask.window(template.shape)
+        if window is None:
+            return []
+        (x1, y1, x2, y2), valid = window
+        return self._match_template(frame[y1:y2, x1:x2], template, threshold, offset=(x1, y1), valid=valid)
+
+    def _match_tiles(self, tile, template, threshold, geometry):
+        """Match a template scaled to the tile image; boxes are returned in frame coordinates."""
+        # Resampling softens sprite edges, which costs some correlation
+        threshold -= getattr(config, 'TILE_MATCH_RELAX', 0.0)
+        boxes = self._match_masked(tile, geometry.template(template), threshold, geometry.mask)
+        return [geometry.to_frame(b) for b in boxes]
+
+    def _match_template(self, frame, template, threshold=0.8, offset=(0, 0), valid=None):
         """
         Helper to perform template matching.
-        Returns list of (x, y, w, h) tuples.
+        Returns list of (x, y, w, h) tuples, shifted by `offset` (ROI origin in the frame),
+        best match first (callers that want one object take the first box).
+        `valid` optionally masks the match result (False = position not accepted).
         """
         # Convert to grayscale for faster/robust matching? 
         # For now, let's stick to BGR if colors matter (ghosts are different colors).
         # Actually, Pac-Man rotates, so simple template matching might fail if he faces a different way.
         # We might need templates for each direction or use color detection.
         
+        fh, fw = frame.shape[:2]
+        if fh < template.shape[0] or fw < template.shape[1]:
+            return []
         res = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
-        loc = np.where(res >= threshold)
+        hits = res >= threshold
+        if valid is not None:
+            hits &= valid
+        loc = np.where(hits)
+        # Strongest correlation first, so another sprite that passes the threshold is never picked over the right one
+        order = np.argsort(-res[loc], kind='stable')
         
         matches = []
         h, w = template.shape[:2]
         
         # Zip the results and format
-        for pt in zip(*loc[::-1]):
-            matches.append((pt[0], pt[1], w, h))
+        for i in order:
+            matches.append((int(loc[1][i]) + offset[0], int(loc[0][i]) + offset[1], w, h))
             
         # Non-maximum suppression could go here to remove duplicate detections of the same object
         # For MVP, we just return all high-confidence matches
         return matches
+
+
+def create_detector(estimator=None, template_dir: str = None):
+    """
+    The detector selected by config.DETECTOR: 'template' (ObjectDetectorCV) or
+    'background' (vision/sprite_localizer.py, reading the clean map from
+    `estimator`, with template matching until a clean map exists).
+    """
+    templates = ObjectDetectorCV(template_dir=template_dir or config.TEMPLATE_DIR)
+    if getattr(config, 'DETECTOR', 'template') == 'background' and estimator is not None:
+        from vision.sprite_localizer import SpriteLocalizer
+        return SpriteLocalizer(estimator, fallback=templates)
+    return templates
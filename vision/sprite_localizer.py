@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+import config
+from vision.frame_context import FramePreprocessor
+from vision.tile_view import tile_mode
+
+Box = Tuple[int, int, int, int]
+
+
+class SpriteLocalizer:
+    """
+    Finds the moving sprites by subtracting the clean map (config.DETECTOR = 'background').
+
+    The clean map is the median background from the mapping phase
+    (StateEstimator.clean_map, replaced on a remap). Per frame, on the shared
+    FrameContext's ROI pyramid level SPRITE_PYRAMID_LEVEL (or the tile image in
+    VISION_MODE = 'tile'), with the clean map reduced the same way:
+    1. absdiff against the clean map, max over the channels, thresholded at
+       SPRITE_DIFF_THRESHOLD,
+    2. one connectedComponentsWithStats pass; blobs smaller than
+       SPRITE_MIN_AREA cells are dropped (eaten pellets, noise),
+    3. each blob's dominant colour is its mean frame colour, brightness-normalised
+       so anti-aliased edges do not darken it, and the nearest reference colour
+       (GAME_COLORS 'PACMAN' / 'GHOSTS', within SPRITE_COLOR_TOLERANCE) names it.
+       Blobs of no known colour are ignored.
+
+    The cost does not depend on how many templates or ghost types there are.
+    Boxes are the blobs' bounding boxes in frame coordinates, largest first, in
+    the same result format as ObjectDetectorCV. Until a clean map exists (or if
+    its size does not match the frame) detection falls back to `fallback`.
+    Two touching sprites form one blob and are reported once, by dominant colour.
+    """
+
+    def __init__(self, estimator, fallback=None, diff_threshold: int = None, min_area: float = None,
+                 color_tolerance: float = None, pyramid_level: int = None):
+        self.estimator = estimator
+        self.fallback = fallback
+        self.diff_threshold = diff_threshold if diff_threshold is not None else getattr(config, 'SPRITE_DIFF_THRESHOLD', 40)
+        self.min_area = min_area if min_area is not None else getattr(config, 'SPRITE_MIN_AREA', 0.2)
+        self.color_tolerance = color_tolerance if color_tolerance is not None else getattr(config, 'SPRITE_COLOR_TOLERANCE', 100.0)
+        self.pyramid_level = pyramid_level if pyramid_level is not None else getattr(config, 'SPRITE_PYRAMID_LEVEL', 1)
+
+        colors = config.GAME_COLORS
+        refs = [('pacman', c) for c in colors.get('PACMAN', [(0, 255, 255)])]
+        refs += [('ghosts', c) for c in colors.get('GHOSTS', [])]
+        self._labels = [name for name, _ in refs]
+        self._colors = np.array([self._normalized(c) for _, c in refs], dtype=np.float32).reshape(-1, 3)
+
+        self._background = None     # (clean map object, its ROI / tile image, tile mode)
+        self._diff = None
+        self._binary = None
+        self._pre = FramePreprocessor()     # For the clean map and frames without a context
+
+    @staticmethod
+    def _normalized(color) -> np.ndarray:
+        color = np.asarray(color, dtype=np.float32)
+        peak = color.max()
+        return color * (255.0 / peak) if peak > 0 else color
+
+    # --- ObjectDetectorCV interface ---
+
+    @property
+    def templates(self) -> Dict[str, np.ndarray]:
+        return self.fallback.templates if self.fallback is not None else {}
+
+    def preload_async(self):
+        if self.fallback is not None:
+            self.fallback.preload_async()
+
+    def detect_objects(self, frame: np.ndarray, ctx=None) -> Dict[str, List[Any]]:
+        """Pac-Man and ghost boxes (frame coordinates) from the difference to the clean map."""
+        if ctx is None:
+            ctx = self._pre.begin(frame)
+        frame = ctx.frame
+        background = self._background_for(frame.shape)
+        if background is None:
+            if self.fallback is not None:
+                return self.fallback.detect_objects(frame, ctx)
+            return {'pacman': [], 'ghosts': [], 'pellets': []}
+
+        if tile_mode():
+            geometry = ctx.tile_geometry
+            image, cell_area, to_frame = ctx.tile, float(geometry.tile_pixels ** 2), geometry.to_frame
+        else:
+            image = ctx.pyramid(self.pyramid_level)
+            (x1, y1), scale = ctx.roi_offset, 1 << self.pyramid_level
+            h, w = ctx.roi.shape[:2]
+            gw, gh = getattr(config, 'GRID_SIZE', (28, 31))
+            cell_area = h * w / float(gw * gh * scale * scale)
+            to_frame = lambda b: (b[0] * scale + x1, b[1] * scale + y1, b[2] * scale, b[3] * scale)
+
+        results = {'pacman': [], 'ghosts': [], 'pellets': []}
+        for box, label in self._blobs(image, background, cell_area):
+            results[label].append(to_frame(box))
+        return results
+
+    # --- Internals ---
+
+    def _background_for(self, frame_shape) -> Optional[np.ndarray]:
+        """The clean map reduced like this frame's image; cached until the map or mode changes."""
+        clean_map = getattr(self.estimator, 'clean_map', None)
+        if clean_map is None or clean_map.shape[:2] != frame_shape[:2]:
+            return None
+        tiles = tile_mode()
+        if self._background is None or self._background[0] is not clean_map or self._background[2] != tiles:
+            # Same FrameContext products as the live frames; copied, since the buffers are reused
+            ctx = self._pre.begin(clean_map)
+            image = np.array(ctx.tile if tiles else ctx.pyramid(self.pyramid_level))
+            self._background = (clean_map, image, tiles)
+        return self._background[1]
+
+    def _blobs(self, image: np.ndarray, background: np.ndarray, cell_area: float) -> List[Tuple[Box, str]]:
+        h, w = image.shape[:2]
+        if self._diff is None or self._diff.shape != image.shape:
+            self._diff = np.empty_like(image)
+            self._binary = np.empty((h, w), dtype=np.uint8)
+        cv2.absdiff(image, background, dst=self._diff)
+        np.max(self._diff, axis=2, out=self._binary)
+        cv2.threshold(self._binary, self.diff_threshold, 255, cv2.THRESH_BINARY, dst=self._binary)
+
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(self._binary, connectivity=8)
+        found = []
+        min_pixels = self.min_area * cell_area
+        for i in range(1, count):
+            x, y, bw, bh, area = stats[i]
+            if area < min_pixels:
+                continue
+            blob = (labels[y:y + bh, x:x + bw] == i).astype(np.uint8)
+            mean = cv2.mean(image[y:y + bh, x:x + bw], mask=blob)[:3]
+            label = self._classify(mean)
+            if label is not None:
+                found.append((int(area), (int(x), int(y), int(bw), int(bh)), label))
+        found.sort(key=lambda f: -f[0])
+        return [(box, label) for _, box, label in found]
+
+    def _classify(self, mean_bgr) -> Optional[str]:
+        """Entity whose reference colour is nearest the blob's brightness-normalised colour, if close enough."""
+        if max(mean_bgr) < self.diff_threshold:
+            return None  # Darker than the background change: something vanished (e.g. an eaten pellet)
+        dist = np.linalg.norm(self._colors - self._normalized(mean_bgr), axis=1)
+        best = int(np.argmin(dist))
+        return self._labels[best] if dist[best] <= self.color_tolerance else None
@@ -1,6 +1,12 @@
+import time
 from typing import Dict, Any, List, Tuple
 import numpy as np
 import config
+from vision.maze_grid import MazeGrid
+from vision.maze_graph import MazeGraph
+from vision.detection_mask import search_mask_for
+from vision.game_state import GameState
+from vision.tile_view import tile_geometry_for, tile_mode
 
 class StateEstimator:
     """
@@ -12,35 +18,121 @@ class StateEstimator:
         # Load from config if available, else default
         self.grid_width = getattr(config, 'GRID_SIZE', (28, 31))[0]
         self.grid_height = getattr(config, 'GRID_SIZE', (28, 31))[1]
-        self.grid = np.zeros((self.grid_height, self.grid_width), dtype=int)
+        # Walls layer + pellet bitboard (see vision/maze_grid.py)
+        self.maze = MazeGrid(self.grid_width, self.grid_height)
+        # Junction/corridor graph compiled from the walls (see vision/maze_graph.py)
+        self.graph = None
+        # Median background from the mapping phase (no moving sprites)
+        self.clean_map = None
+        # (clean_map, maze, graph) waiting to be swapped in by update()
+        self._pending_map = None
+        # Learned cell classifier (config.CELL_CLASSIFIER_WEIGHTS), loaded on first mapping
+        self._classifier = None
+        self._classifier_loaded = False
         
         # We need to know the pixel size of the game board to map to grid
         # These will be updated on the first frame
         self.pixel_width = 0
         self.pixel_height = 0
-        
-        # Static map (walls, pellets)
-        self.static_grid = None # 1=Wall, 2=Pellet, 0=Empty
-        self.total_pellets = 0
-        self.pellets_eaten = 0
+
+        # Previous update's state; `version` moves when the content differs from it
+        self.last_state = None
+        self.frames = 0
+
+    @property
+    def grid(self) -> np.ndarray:
+        """Read-only snapshot of the maze (1=Wall, 2=Pellet, 0=Empty)."""
+        return self.maze.snapshot()
+
+    @property
+    def total_pellets(self) -> int:
+        return self.maze.pellets_total
+
+    @property
+    def pellets_eaten(self) -> int:
+        return self.maze.pellets_eaten
         
     def initialize_from_map(self, clean_map: np.ndarray):
         """
         Initialize the grid using the clean static map.
         """
-        self.pixel_height, self.pixel_width = clean_map.shape[:2]
-        self.grid = np.zeros((self.grid_height, self.grid_width), dtype=int)
+        maze = self.build_maze(clean_map)
+        # Compile the junction graph once the walls and pellets are known
+        self._install_map(clean_map, maze, MazeGraph.from_maze(maze))
+        print(f"DEBUG: Maze graph has {len(self.graph.nodes)} nodes and {len(self.graph.edges)} edges.")
+
+    def build_maze(self, clean_map: np.ndarray, use_classifier: bool = True) -> MazeGrid:
+        """
+        Classify a clean static map into a new MazeGrid.
+        Does not touch the current state, so it is safe to run in a background thread.
+        Uses the learned cell classifier if one is configured, else the color rules.
+        """
+        maze = MazeGrid(self.grid_width, self.grid_height)
+
+        if use_classifier and not self._classifier_loaded:
+            from vision.cell_classifier import load_configured
+            self._classifier = load_configured()
+            self._classifier_loaded = True
+        if use_classifier and self._classifier is not None:
+            # One batched pass over all cells instead of the per-cell color rules
+            labels = self._classifier.classify_frame(clean_map, self.grid_width, self.grid_height)
+            maze.walls[:] = labels == MazeGrid.WALL
+            maze.set_pellets(labels == MazeGrid.PELLET)
+            print(f"DEBUG: Cell classifier found {maze.pellets_total} pellets on the map.")
+            return maze
         
+        # Tile mode: classify the tile image, where every cell is TILE_PIXELS square and unpadded
+        image, pad = clean_map, None
+        if tile_mode():
+            image, pad = tile_geometry_for(clean_map.shape).resample(clean_map), {'top': 0, 'bottom': 0, 'left': 0, 'right': 0}
+
         # Run the color detection ONCE on the clean map
-        self._update_grid_from_colors(clean_map)
+        self._update_grid_from_colors(image, maze, pad)
         
         # Detect pellets
-        self._detect_pellets(clean_map)
+        self._detect_pellets(image, maze, pad)
+        return maze
         
-    def _detect_pellets(self, clean_map: np.ndarray):
+    def initialize_from_cache(self, clean_map: np.ndarray, walls: np.ndarray, frame: np.ndarray):
+        """
+        Initialize the grid from a previously classified map (see vision/map_cache.py),
+        skipping the per-cell wall classification. Pellets are detected on the live
+        `frame` instead of being restored, since the game may have moved on since
+        the map was cached (a pellet hidden under a sprite in that frame is missed).
+        """
+        maze = MazeGrid(self.grid_width, self.grid_height)
+        maze.walls[:] = walls
+        image, pad = frame, None
+        if tile_mode():
+            image, pad = tile_geometry_for(frame.shape).resample(frame), {'top': 0, 'bottom': 0, 'left': 0, 'right': 0}
+        self._detect_pellets(image, maze, pad)
+        self._install_map(clean_map, maze, MazeGraph.from_maze(maze))
+        print(f"DEBUG: Restored the walls and a {len(self.graph.nodes)}-node graph from cache, "
+              f"{self.maze.pellets_total} pellets on screen.")
+
+    def swap_map(self, clean_map: np.ndarray, maze: MazeGrid, graph: MazeGraph):
+        """
+        Stage a freshly built map (e.g. from vision/level_monitor.py's background remap).
+        It replaces the current one at the start of the next update(), as a whole.
+        """
+        # One reference assignment: update() sees either nothing or the complete bundle
+        self._pending_map = (clean_map, maze, graph)
+
+    @property
+    def map_pending(self) -> bool:
+        """True while a swapped map waits for the next update()."""
+        return self._pending_map is not None
+
+    def _install_map(self, clean_map: np.ndarray, maze: MazeGrid, graph: MazeGraph):
+        self.pixel_height, self.pixel_width = clean_map.shape[:2]
+        self.clean_map = clean_map
+        self.maze = maze
+        self.graph = graph
+
+    def _detect_pellets(self, clean_map: np.ndarray, maze: MazeGrid, pad: Dict[str, int] = None):
         """
         Detect pellets on the static map based on color.
-        Updates self.grid with value 2 for pellets.
+        Loads the pellet bitboard of `maze`. `pad` overrides GRID_PADDING (e.g. for a tile image).
         """
         if 'PELLETS' not in config.GAME_COLORS:
             return
@@ -48,18 +140,20 @@ class StateEstimator:
         pellet_colors = np.array(config.GAME_COLORS['PELLETS'], dtype=np.uint8)
         color_tol = 60 # Increased tolerance
         
-        pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
-        eff_w = self.pixel_width - pad['left'] - pad['right']
-        eff_h = self.pixel_height - pad['top'] - pad['bottom']
+        pixel_height, pixel_width = clean_map.shape[:2]
+        if pad is None:
+            pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+        eff_w = pixel_width - pad['left'] - pad['right']
+        eff_h = pixel_height - pad['top'] - pad['bottom']
         
         cell_w = eff_w / self.grid_width
         cell_h = eff_h / self.grid_height
         
-        pellet_count = 0
+        pellet_mask = np.zeros((self.grid_height, self.grid_width), dtype=bool)
         for r in range(self.grid_height):
             for c in range(self.grid_width):
                 # If it's a wall, skip
-                if self.grid[r, c] == 1:
+                if maze.walls[r, c] == 1:
                     continue
                     
                 # Check center of cell for pellet color
@@ -67,7 +161,7 @@ class StateEstimator:
                 cy = int(pad['top'] + (r + 0.5) * cell_h)
                 
                 # Safety check
-                if cx < 0 or cx >= self.pixel_width or cy < 0 or cy >= self.pixel_height:
+                if cx < 0 or cx >= pixel_width or cy < 0 or cy >= pixel_height:
                     continue
                     
                 # Sample a larger area (60% of the cell) to catch dots even if off-center
@@ -80,9 +174,9 @@ class StateEstimator:
                 scan_h = max(4, scan_h)
                 
                 x1 = max(0, cx - scan_w // 2)
-                x2 = min(self.pixel_width, cx + scan_w // 2)
+                x2 = min(pixel_width, cx + scan_w // 2)
                 y1 = max(0, cy - scan_h // 2)
-                y2 = min(self.pixel_height, cy + scan_h // 2)
+                y2 = min(pixel_height, cy + scan_h // 2)
                 
                 patch = clean_map[y1:y2, x1:x2]
                 
@@ -100,17 +194,34 @@ class StateEstimator:
                         break
                 
                 if is_pellet:
-                    self.grid[r, c] = 2 # 2 = Pellet
-                    pellet_count += 1
+                    pellet_mask[r, c] = True
         
-        self.total_pellets = pellet_count
-        print(f"DEBUG: Detected {pellet_count} pellets on the map.")
+        maze.set_pellets(pellet_mask)
+        print(f"DEBUG: Detected {maze.pellets_total} pellets on the map.")
         
-    def update(self, detections: Dict[str, Any], frame: np.ndarray) -> Dict[str, Any]:
+    def update(self, detections: Dict[str, Any], frame: np.ndarray, ctx=None) -> GameState:
         """
         Update the internal state based on new detections.
+        `ctx` is the shared FrameContext of this frame (vision/frame_context.py), if any.
+        Returns a new GameState (vision/game_state.py), readable like the old dict.
         """
+        self.frames += 1
+        captured_at = ctx.timestamp if ctx is not None else time.perf_counter()
+        pending = self._pending_map
+        if pending is not None:
+            self._pending_map = None
+            self._install_map(*pending)
+            print(f"Swapped in a new map with {self.maze.pellets_total} pellets.")
+
+        if ctx is not None:
+            frame = ctx.frame
         self.pixel_height, self.pixel_width = frame.shape[:2]
+        # Detections outside the maze or inside IGNORE_AREAS (lives, HUD) are dropped
+        mask = ctx.search_mask if ctx is not None else search_mask_for(frame.shape)
+        # Tile mode: cells come from the tile image the detectors matched on, not the padded frame
+        geometry = None
+        if tile_mode():
+            geometry = ctx.tile_geometry if ctx is not None else tile_geometry_for(frame.shape)
         
         pacman_grid = None
         if detections['pacman']:
@@ -118,54 +229,21 @@ class StateEstimator:
             # We assume the playable maze is the main part of the screen.
             # Let's pick the detection that is closest to the center of the screen OR
             # just filter out anything in the bottom 10% if it's a lives counter.
-            
-            valid_detections = []
-            for (x, y, w, h) in detections['pacman']:
-                # Check against ignored areas
-                ignored = False
-                # Center of detection
-                cx, cy = x + w//2, y + h//2
-                
-                if hasattr(config, 'IGNORE_AREAS'):
-                    for (ix, iy, iw, ih) in config.IGNORE_AREAS:
-                        # Check if center is inside ignore rect
-                        if ix <= cx <= ix + iw and iy <= cy <= iy + ih:
-                            ignored = True
-                            break
-                
-                if ignored:
-                    continue
-                    
-                valid_detections.append((x, y, w, h))
+            valid_detections = mask.filter(detections['pacman'])
             
             if valid_detections:
-                # If multiple valid ones, pick the first (or closest to last known pos)
+                # If multiple valid ones, pick the first: detectors list the best match first
                 x, y, w, h = valid_detections[0]
                 
                 # Center of Pac-Man
-                cx, cy = x + w // 2, y + h // 2
-                
-                # Map to grid
-                # Apply Padding
-                pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
-                
-                eff_w = self.pixel_width - pad['left'] - pad['right']
-                eff_h = self.pixel_height - pad['top'] - pad['bottom']
-                
-                if eff_w > 0 and eff_h > 0:
-                    # Adjust cx, cy to be relative to the padded area
-                    cx_rel = cx - pad['left']
-                    cy_rel = cy - pad['top']
-                    
-                    # Formula: grid_x = (cx_rel / eff_w) * grid_width
-                    gx = int((cx_rel / eff_w) * self.grid_width)
-                    gy = int((cy_rel / eff_h) * self.grid_height)
-                    
-                    # Clamp to bounds
-                    gx = max(0, min(gx, self.grid_width - 1))
-                    gy = max(0, min(gy, self.grid_height - 1))
-                    
-                    pacman_grid = (gx, gy)
+                pacman_grid = self._box_to_grid((x, y, w, h), geometry)
+
+        # Ghosts: one grid cell per ghost (overlapping matches collapse onto the same cell)
+        ghost_positions = []
+        for (x, y, w, h) in mask.filter(detections.get('ghosts') or []):
+            cell = self._box_to_grid((x, y, w, h), geometry)
+            if cell and cell not in ghost_positions:
+                ghost_positions.append(cell)
 
         # Update grid (static map) occasionally or if empty
         # For MVP, we update it every frame or just once? 
@@ -175,33 +253,74 @@ class StateEstimator:
         # Check for eating
         if pacman_grid:
             gx, gy = pacman_grid
-            if self.grid[gy, gx] == 2:
-                self.grid[gy, gx] = 0 # Eat pellet
+            if self.maze.eat(gx, gy):
+                if self.graph is not None:
+                    self.graph.on_pellet_eaten(gx, gy)
                 print(f"Nom nom! Ate pellet at {gx}, {gy}")
 
-        # Count remaining pellets
-        remaining_pellets = np.count_nonzero(self.grid == 2)
-        self.pellets_eaten = self.total_pellets - remaining_pellets
+        # Remaining count is maintained by the maze on each eat (no per-frame count)
+        state = GameState(
+            grid=self.maze.snapshot(),
+            graph=self.graph,
+            pacman_pos=pacman_grid,
+            ghost_positions=ghost_positions,
+            pellets_total=self.maze.pellets_total,
+            pellets_remaining=self.maze.pellets_remaining,
+            pellets_eaten=self.maze.pellets_eaten,
+            frame_id=self.frames,
+            captured_at=captured_at,
+            updated_at=time.perf_counter(),
+        )
+        last = self.last_state
+        state.version = last.version if state.same_content(last) else (last.version + 1 if last else 1)
+        self.last_state = state
+        return state
 
-        return {
-            'grid': self.grid,
-            'pacman_pos': pacman_grid,
-            'ghost_positions': [],
-            'pellets_total': self.total_pellets,
-            'pellets_remaining': remaining_pellets,
-            'pellets_eaten': self.pellets_eaten
-        }
+    def _box_to_grid(self, box: Tuple[int, int, int, int], geometry=None) -> Tuple[int, int]:
+        """Grid cell of a detection box's center (frame coordinates), through the tile image if `geometry` is given."""
+        x, y, w, h = box
+        if geometry is not None:
+            return geometry.frame_cell(x + w / 2.0, y + h / 2.0)
+        return self._pixel_to_grid(x + w // 2, y + h // 2)
 
-    def _update_grid_from_colors(self, frame):
-        """
-        Scan the grid cells and determine if they are walls based on color.
-        """
+    def _pixel_to_grid(self, cx: int, cy: int) -> Tuple[int, int]:
+        """Map a pixel position (frame coordinates) to a grid cell, or None."""
         # Apply Padding
         pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
         
         eff_w = self.pixel_width - pad['left'] - pad['right']
         eff_h = self.pixel_height - pad['top'] - pad['bottom']
         
+        if eff_w <= 0 or eff_h <= 0:
+            return None
+            
+        # Adjust cx, cy to be relative to the padded area
+        cx_rel = cx - pad['left']
+        cy_rel = cy - pad['top']
+        
+        # Formula: grid_x = (cx_rel / eff_w) * grid_width
+        gx = int((cx_rel / eff_w) * self.grid_width)
+        gy = int((cy_rel / eff_h) * self.grid_height)
+        
+        # Clamp to bounds
+        gx = max(0, min(gx, self.grid_width - 1))
+        gy = max(0, min(gy, self.grid_height - 1))
+        
+        return (gx, gy)
+
+    def _update_grid_from_colors(self, frame, maze: MazeGrid, pad: Dict[str, int] = None):
+        """
+        Scan the grid cells and determine if they are walls based on color.
+        Writes the walls layer of `maze`. `pad` overrides GRID_PADDING (e.g. for a tile image).
+        """
+        pixel_height, pixel_width = frame.shape[:2]
+        # Apply Padding
+        if pad is None:
+            pad = getattr(config, 'GRID_PADDING', {'top': 0, 'bottom': 0, 'left': 0, 'right': 0})
+        
+        eff_w = pixel_width - pad['left'] - pad['right']
+        eff_h = pixel_height - pad['top'] - pad['bottom']
+        
         if eff_w <= 0 or eff_h <= 0:
             return
 
@@ -222,7 +341,7 @@ class StateEstimator:
                 cy = cy_rel + pad['top']
                 
                 # Safety check
-                if cx >= self.pixel_width or cy >= self.pixel_height:
+                if cx >= pixel_width or cy >= pixel_height:
                     continue
                 
                 # Sample a small patch (3x3) to catch thin walls
@@ -231,9 +350,9 @@ class StateEstimator:
                 
                 # Define patch bounds
                 r1 = max(0, cy-1)
-                r2 = min(self.pixel_height, cy+2)
+                r2 = min(pixel_height, cy+2)
                 c1 = max(0, cx-1)
-                c2 = min(self.pixel_width, cx+2)
+                c2 = min(pixel_width, cx+2)
                 
                 patch = frame[r1:r2, c1:c2]
                 
@@ -246,7 +365,7 @@ class StateEstimator:
                 # Check if close to black (Path color)
                 if np.linalg.norm(center_pixel - np.array(config.GAME_COLORS['PATH'])) < 40:
                     # It's black, so it's a path.
-                    self.grid[r, c] = 0
+                    maze.walls[r, c] = 0
                     continue
                 
                 for wall_color in config.GAME_COLORS['WALLS']:
@@ -262,6 +381,6 @@ class StateEstimator:
                         break
                 
                 if is_wall:
-                    self.grid[r, c] = 1 # 1 = Wall
+                    maze.walls[r, c] = 1 # 1 = Wall
                 else:
-                    self.grid[r, c] = 0 # 0 = Walkable
+                    maze.walls[r, c] = 0 # 0 = Walkable
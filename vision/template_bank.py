@@ -0,0 +1,208 @@
+import os
+import json
+import hashlib
+import tempfile
+import cv2
+import numpy as np
+from typing import Dict, List, Optional
+
+# Bumped whenever the set of variants or the file layout changes
+BANK_FORMAT_VERSION = 1
+BANK_FILENAME = 'templates.bank'
+_MAGIC = b'PMTBANK1'
+_ALIGN = 64
+
+
+def _variants(template: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every preprocessed form the detectors may ask for."""
+    gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+    pyr1 = cv2.pyrDown(template)
+    return {
+        'bgr': template,
+        'gray': gray,
+        # Non-background pixels, for masked matching (sprites on a black maze)
+        'mask': np.where(template.sum(axis=2) > 30, 255, 0).astype(np.uint8),
+        'pyr1': pyr1,
+        'pyr2': cv2.pyrDown(pyr1),
+        # Pac-Man rotates with the direction of travel
+        'rot90': cv2.rotate(template, cv2.ROTATE_90_CLOCKWISE),
+        'rot180': cv2.rotate(template, cv2.ROTATE_180),
+        'rot270': cv2.rotate(template, cv2.ROTATE_90_COUNTERCLOCKWISE),
+        'flip': cv2.flip(template, 1),
+    }
+
+
+def _file_sha1(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class TemplateBank:
+    """
+    Compiled store of all template variants in a single memory-mappable file.
+
+    Layout: 8-byte magic, 8-byte manifest length, JSON manifest, then one
+    uint8 blob (64-byte aligned) holding every variant back to back. Loading
+    is one mmap plus a JSON parse; arrays are read-only views into the map.
+
+    The manifest records mtime, size and SHA-1 of every source PNG. A source
+    whose mtime/size changed is re-hashed, and only a real content change
+    (or an added/removed file) triggers a rebuild; if the hash still matches,
+    the new mtime/size is written back so later starts skip the hash.
+
+    The bank is a build artefact next to the PNGs and is git-ignored (*.bank).
+    """
+
+    def __init__(self, template_dir: str, bank_path: str = None):
+        self.template_dir = template_dir
+        self.bank_path = bank_path or os.path.join(template_dir, BANK_FILENAME)
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        self._mmap = None
+
+    # --- Sources ---
+
+    def _source_files(self) -> List[str]:
+        if not os.path.isdir(self.template_dir):
+            return []
+        return sorted(f for f in os.listdir(self.template_dir)
+                      if f.endswith('.png') and 'snapshot' not in f)
+
+    def _is_fresh(self, manifest: dict) -> bool:
+        if manifest.get('version') != BANK_FORMAT_VERSION:
+            return False
+        sources = manifest.get('sources', {})
+        files = self._source_files()
+        if sorted(sources) != files:
+            return False
+        touched = False
+        for filename in files:
+            path = os.path.join(self.template_dir, filename)
+            st = os.stat(path)
+            recorded = sources[filename]
+            if st.st_mtime_ns == recorded['mtime_ns'] and st.st_size == recorded['size']:
+                continue
+            # Touched (e.g. copied or checked out again): only content matters
+            if _file_sha1(path) != recorded['sha1']:
+                return False
+            recorded['mtime_ns'], recorded['size'] = st.st_mtime_ns, st.st_size
+            touched = True
+        if touched:
+            self._rewrite_manifest(manifest)
+        return True
+
+    def _rewrite_manifest(self, manifest: dict):
+        """Update the manifest in place (the data blob does not move); skipped if it no longer fits."""
+        header = json.dumps(manifest).encode('utf-8')
+        if len(_MAGIC) + 8 + len(header) > manifest['data_offset']:
+            return
+        try:
+            with open(self.bank_path, 'r+b') as f:
+                f.seek(len(_MAGIC))
+                f.write(len(header).to_bytes(8, 'little'))
+                f.write(header)
+                f.write(b'\0' * (manifest['data_offset'] - f.tell()))
+        except OSError as e:
+            print(f"Template bank: could not update the manifest ({e}).")
+
+    # --- Load / build ---
+
+    def load(self) -> 'TemplateBank':
+        """Map the compiled bank, rebuilding it first if it is missing or stale."""
+        manifest = self._read_manifest()
+        if manifest is None or not self._is_fresh(manifest):
+            self.build()
+            manifest = self._read_manifest()
+            if manifest is None:
+                return self
+
+        data_offset = manifest['data_offset']
+        total = manifest['data_size']
+        self._arrays = {}
+        if total == 0:
+            return self
+        self._mmap = np.memmap(self.bank_path, dtype=np.uint8, mode='r', offset=data_offset, shape=(total,))
+        for name, variants in manifest['templates'].items():
+            self._arrays[name] = {
+                variant: self._mmap[v['offset']:v['offset'] + v['nbytes']].reshape(v['shape'])
+                for variant, v in variants.items()
+            }
+        return self
+
+    def _read_manifest(self) -> Optional[dict]:
+        if not os.path.exists(self.bank_path):
+            return None
+        try:
+            with open(self.bank_path, 'rb') as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                length = int.from_bytes(f.read(8), 'little')
+                return json.loads(f.read(length).decode('utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"Template bank unreadable ({e}), rebuilding.")
+            return None
+
+    def build(self):
+        """Decode every source PNG once and write all variants to the bank file."""
+        sources = {}
+        templates = {}
+        chunks = []
+        offset = 0
+        for filename in self._source_files():
+            path = os.path.join(self.template_dir, filename)
+            template = cv2.imread(path)
+            if template is None:
+                print(f"Failed to load template: {path}")
+                continue
+            st = os.stat(path)
+            sources[filename] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': _file_sha1(path)}
+
+            name = os.path.splitext(filename)[0]
+            templates[name] = {}
+            for variant, array in _variants(template).items():
+                array = np.ascontiguousarray(array, dtype=np.uint8)
+                templates[name][variant] = {'offset': offset, 'nbytes': array.nbytes, 'shape': list(array.shape)}
+                chunks.append(array.tobytes())
+                offset += array.nbytes
+                pad = (-offset) % _ALIGN
+                if pad:
+                    chunks.append(b'\0' * pad)
+                    offset += pad
+
+        if not os.path.isdir(self.template_dir):
+            return
+
+        manifest = {'version': BANK_FORMAT_VERSION, 'sources': sources, 'templates': templates, 'data_size': offset}
+        # The data offset depends on the manifest length; reserve room for the number itself
+        manifest['data_offset'] = 0
+        header_len = len(json.dumps(manifest).encode('utf-8')) + 32
+        data_offset = len(_MAGIC) + 8 + header_len
+        data_offset += (-data_offset) % _ALIGN
+        manifest['data_offset'] = data_offset
+        header = json.dumps(manifest).encode('utf-8')
+
+        # A private temp file per writer: concurrent supervisor workers may build the same bank,
+        # and the last os.replace wins with a complete file either way
+        fd, tmp_path = tempfile.mkstemp(prefix=BANK_FILENAME + '.', suffix='.tmp',
+                                        dir=os.path.dirname(self.bank_path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(len(header).to_bytes(8, 'little'))
+                f.write(header)
+                f.write(b'\0' * (data_offset - f.tell()))
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, self.bank_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"Compiled {len(templates)} templates into {self.bank_path}")
+
+    # --- Access ---
+
+    def names(self) -> List[str]:
+        return list(self._arrays)
+
+    def get(self, name: str, variant: str = 'bgr') -> Optional[np.ndarray]:
+        """Read-only array for a template variant (None if unknown)."""
+        return self._arrays.get(name, {}).get(variant)
@@ -0,0 +1,111 @@
+from functools import lru_cache
+from typing import Dict, Tuple
+import cv2
+import numpy as np
+import config
+from vision.detection_mask import SearchMask, search_mask_for, Box
+
+
+class TileGeometry:
+    """
+    Mapping between a frame and its tile image (VISION_MODE = 'tile').
+
+    The tile image is the padded maze area resampled to exactly
+    `tile_pixels` x `tile_pixels` pixels per grid cell, so a tile-image pixel
+    (u, v) lies in cell (u // tile_pixels, v // tile_pixels). `mask` is the
+    SearchMask of the tile image (ignore areas scaled into it); `to_frame()`
+    maps tile-image boxes back to frame coordinates and `frame_cell()` gives the
+    cell of a frame pixel through the tile image.
+    """
+
+    def __init__(self, frame_shape: Tuple[int, ...], tile_pixels: int = None, grid_size: Tuple[int, int] = None):
+        self.tile_pixels = tile_pixels if tile_pixels is not None else getattr(config, 'TILE_PIXELS', 8)
+        gw, gh = grid_size if grid_size is not None else getattr(config, 'GRID_SIZE', (28, 31))
+        self.roi = search_mask_for(frame_shape).roi
+        x1, y1, x2, y2 = self.roi
+        self.size = (gw * self.tile_pixels, gh * self.tile_pixels)   # (width, height) of the tile image
+        self.scale = (self.size[0] / float(x2 - x1), self.size[1] / float(y2 - y1))
+
+        ignore = [self._scale_rect(r) for r in getattr(config, 'IGNORE_AREAS', [])]
+        self.mask = SearchMask((self.size[1], self.size[0]), padding={'top': 0, 'bottom': 0, 'left': 0, 'right': 0},
+                               ignore_areas=ignore)
+        self._templates: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _scale_rect(self, rect: Box) -> Box:
+        x, y, w, h = rect
+        sx, sy = self.scale
+        return (int((x - self.roi[0]) * sx), int((y - self.roi[1]) * sy),
+                int(np.ceil(w * sx)), int(np.ceil(h * sy)))
+
+    def resample(self, frame: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+        """The maze area of a full frame as a tile image (INTER_AREA, into `dst` if given)."""
+        x1, y1, x2, y2 = self.roi
+        return cv2.resize(frame[y1:y2, x1:x2], self.size, dst=dst, interpolation=cv2.INTER_AREA)
+
+    def template(self, template: np.ndarray) -> np.ndarray:
+        """
+        A full-resolution template scaled into tile-image pixels (cached per template).
+
+        A sprite can start anywhere inside a tile-image pixel, and each start blurs its
+        edges differently, so the scaled template is the mean over those phases (the
+        template shifted by 0..n-1 frame pixels, n frame pixels per tile-image pixel).
+        Its box is up to n-1 pixels larger than the sprite, with the same center.
+        """
+        key = id(template)
+        cached = self._templates.get(key)
+        if cached is None or cached[0] is not template:
+            cached = (template, self._phase_average(template))
+            self._templates[key] = cached
+        return cached[1]
+
+    def _phase_average(self, template: np.ndarray) -> np.ndarray:
+        th, tw = template.shape[:2]
+        sx, sy = self.scale
+        steps = [max(1, int(round(1.0 / s))) for s in (sx, sy)]
+        out_w = max(1, int(round((tw + steps[0] - 1) * sx)))
+        out_h = max(1, int(round((th + steps[1] - 1) * sy)))
+        canvas = np.zeros((th + steps[1] - 1, tw + steps[0] - 1) + template.shape[2:], dtype=template.dtype)
+        total = None
+        for dy in range(steps[1]):
+            for dx in range(steps[0]):
+                canvas[:] = 0
+                canvas[dy:dy + th, dx:dx + tw] = template
+                scaled = cv2.resize(canvas, (out_w, out_h), interpolation=cv2.INTER_AREA).astype(np.float32)
+                total = scaled if total is None else total + scaled
+        return np.clip(np.round(total / (steps[0] * steps[1])), 0, 255).astype(template.dtype)
+
+    def to_frame(self, box: Box) -> Box:
+        """A tile-image box in frame coordinates."""
+        u, v, w, h = box
+        sx, sy = self.scale
+        return (int(round(self.roi[0] + u / sx)), int(round(self.roi[1] + v / sy)),
+                int(round(w / sx)), int(round(h / sy)))
+
+    def to_tile(self, x: float, y: float) -> Tuple[float, float]:
+        """A frame pixel in tile-image coordinates."""
+        sx, sy = self.scale
+        return (x - self.roi[0]) * sx, (y - self.roi[1]) * sy
+
+    def cell(self, u: float, v: float) -> Tuple[int, int]:
+        """Grid cell of a tile-image pixel."""
+        return int(u) // self.tile_pixels, int(v) // self.tile_pixels
+
+    def frame_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """Grid cell of a frame pixel, clamped to the grid."""
+        u, v = self.to_tile(x, y)
+        w, h = self.size
+        return self.cell(min(max(u, 0), w - 1), min(max(v, 0), h - 1))
+
+
+@lru_cache(maxsize=8)
+def _tile_geometry(h: int, w: int) -> TileGeometry:
+    return TileGeometry((h, w))
+
+
+def tile_geometry_for(frame_shape: Tuple[int, ...]) -> TileGeometry:
+    """Shared TileGeometry for this frame size from the current config (built once per size)."""
+    return _tile_geometry(frame_shape[0], frame_shape[1])
+
+
+def tile_mode() -> bool:
+    return getattr(config, 'VISION_MODE', 'full') == 'tile'